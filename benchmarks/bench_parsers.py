@@ -0,0 +1,49 @@
+"""Micro-benchmarks dos parsers de resposta do modelo."""
+
+import pytest
+
+from workloads import synthetic_text
+
+from src.models import CreativeSuggestion
+from src.services.suggestions import merge_suggestions
+
+
+@pytest.mark.parametrize("count", [3, 10])
+def bench_parse_creative_suggestions(benchmark, ai_service, suggestions_text, count):
+    suggestions = benchmark(ai_service._parse_creative_suggestions, suggestions_text, count)
+    assert len(suggestions) == count
+
+
+def bench_parse_creative_suggestions_fallback(benchmark, ai_service):
+    # Resposta fora do formato: cai no parser linha a linha
+    text = "\n".join(f"{idx}. {synthetic_text(6, idx)}" for idx in range(1, 11))
+    benchmark(ai_service._parse_creative_suggestions, text, 10)
+
+
+def bench_merge_suggestions_with_history(benchmark):
+    # 20 sugestões novas contra um histórico cheio do projeto
+    history = [
+        CreativeSuggestion(text=f"{synthetic_text(3, idx)} {synthetic_text(2, idx * 3)}")
+        for idx in range(200)
+    ]
+    new = [
+        CreativeSuggestion(text=f"{synthetic_text(3, idx)} {synthetic_text(2, idx * 7)}")
+        for idx in range(200, 240)
+    ]
+    merged = benchmark(merge_suggestions, [], new, 20, history)
+    assert len(merged) == 20
+
+
+def bench_parse_summary_response(benchmark, ai_service, summary_text):
+    result = benchmark(ai_service._parse_summary_response, summary_text)
+    assert result.characters
+
+
+def bench_parse_summary_response_json(benchmark, ai_service, summary_text):
+    text = ai_service._parse_summary_response(summary_text).model_dump_json()
+    result = benchmark(ai_service._parse_summary_response, text)
+    assert result.characters
+
+
+def bench_parse_summary_response_unstructured(benchmark, ai_service):
+    benchmark(ai_service._parse_summary_response, synthetic_text(400))
@@ -0,0 +1,26 @@
+"""Micro-benchmarks da montagem de prompts."""
+
+import pytest
+
+from workloads import chapter_payload, creative_payload, summarize_payload
+
+from src.models import CreativeSuggestionsRequest, GenerateChapterRequest, SummarizeRequest
+
+
+@pytest.mark.parametrize("length_in_pages", [1, 10])
+@pytest.mark.parametrize("previous_chapters", [0, 1, 5, 20])
+def bench_build_chapter_prompt(benchmark, ai_service, previous_chapters, length_in_pages):
+    request = GenerateChapterRequest(**chapter_payload(previous_chapters, length_in_pages))
+    prompt = benchmark(ai_service._build_chapter_prompt, request)
+    assert request.chapterTitle in prompt
+
+
+def bench_build_creative_prompt(benchmark, ai_service):
+    request = CreativeSuggestionsRequest(**creative_payload(10))
+    benchmark(ai_service._build_creative_prompt, request)
+
+
+@pytest.mark.parametrize("length_in_pages", [1, 10, 50])
+def bench_build_summarize_prompt(benchmark, ai_service, length_in_pages):
+    request = SummarizeRequest(**summarize_payload(length_in_pages))
+    benchmark(ai_service._build_summarize_prompt, request)
@@ -0,0 +1,24 @@
+"""Fixtures dos micro-benchmarks."""
+
+import pytest
+
+from workloads import creative_response, structured_summary  # noqa: F401 (ajusta sys.path)
+
+from src.services.ai_service import AIService
+from src.services.model_backend import FakeBackend
+
+
+@pytest.fixture(scope="session")
+def ai_service() -> AIService:
+    """AIService com backend fake, sem cache nem armazenamento de projetos."""
+    return AIService(backend=FakeBackend())
+
+
+@pytest.fixture(scope="session")
+def summary_text() -> str:
+    return structured_summary(1)
+
+
+@pytest.fixture(scope="session")
+def suggestions_text() -> str:
+    return creative_response(10)
@@ -0,0 +1,246 @@
+"""
+Gerador de carga assíncrono para a API (modelo local fake).
+
+Sobe a aplicação em processo (lifespan completo, `AI_BACKEND=fake`) e
+dispara requisições concorrentes contra `/generate-chapter`,
+`/creative-suggestions` e `/summarize`, variando a quantidade de
+`previousChapters` e `lengthInPages`. Para cada cenário reporta latência
+p50/p95/p99, requisições por segundo e memória alocada por requisição, e
+grava tudo em JSON para comparação entre versões.
+
+Uso:
+    python benchmarks/load.py --requests 200 --concurrency 32 --output bench.json
+    python benchmarks/load.py --compare bench_anterior.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from workloads import ROOT, chapter_payload, creative_payload, summarize_payload
+
+Payload = Callable[[int], Dict[str, Any]]
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    """Percentil por interpolação linear (valores em ms)."""
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    position = (len(ordered) - 1) * pct / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def build_scenarios(
+    previous_counts: List[int],
+    page_counts: List[int]
+) -> List[Dict[str, Any]]:
+    """Cenários: capítulos (matriz previousChapters × lengthInPages), sugestões e resumos."""
+    scenarios: List[Dict[str, Any]] = []
+    for previous in previous_counts:
+        for pages in page_counts:
+            scenarios.append({
+                "name": f"generate-chapter prev={previous} pages={pages}",
+                "path": "/generate-chapter",
+                "params": {"previousChapters": previous, "lengthInPages": pages},
+                "payload": lambda idx, p=previous, n=pages: chapter_payload(p, n, idx)
+            })
+    scenarios.append({
+        "name": "creative-suggestions count=5",
+        "path": "/creative-suggestions",
+        "params": {"count": 5},
+        "payload": lambda idx: creative_payload(5, idx)
+    })
+    for pages in page_counts:
+        scenarios.append({
+            "name": f"summarize pages={pages}",
+            "path": "/summarize",
+            "params": {"lengthInPages": pages},
+            "payload": lambda idx, n=pages: summarize_payload(n, idx)
+        })
+    return scenarios
+
+
+async def _measure_memory(client, path: str, payload: Payload, samples: int) -> float:
+    """Pico médio de memória alocada (KiB) por requisição, medido sequencialmente."""
+    peaks: List[int] = []
+    tracemalloc.start()
+    try:
+        for idx in range(samples):
+            body = payload(10_000 + idx)
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+            await client.post(path, json=body)
+            peaks.append(tracemalloc.get_traced_memory()[1] - baseline)
+    finally:
+        tracemalloc.stop()
+    return statistics.mean(peaks) / 1024 if peaks else 0.0
+
+
+async def run_scenario(
+    client,
+    scenario: Dict[str, Any],
+    requests: int,
+    concurrency: int,
+    memory_samples: int
+) -> Dict[str, Any]:
+    """Executa um cenário e devolve as métricas."""
+    path = scenario["path"]
+    payload: Payload = scenario["payload"]
+    # Corpos montados antes para não medir a geração dos dados sintéticos
+    bodies = [payload(idx) for idx in range(requests)]
+    latencies: List[float] = []
+    errors = 0
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(body: Dict[str, Any]) -> None:
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.post(path, json=body)
+            latencies.append((time.perf_counter() - start) * 1000)
+            if response.status_code != 200:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(body) for body in bodies))
+    elapsed = time.perf_counter() - started
+
+    memory = await _measure_memory(client, path, payload, memory_samples) if memory_samples else None
+
+    return {
+        "name": scenario["name"],
+        "path": path,
+        "params": scenario["params"],
+        "requests": requests,
+        "concurrency": concurrency,
+        "errors": errors,
+        "latencyMs": {
+            "p50": round(_percentile(latencies, 50), 3),
+            "p95": round(_percentile(latencies, 95), 3),
+            "p99": round(_percentile(latencies, 99), 3),
+            "mean": round(statistics.mean(latencies), 3) if latencies else 0.0,
+            "max": round(max(latencies), 3) if latencies else 0.0
+        },
+        "requestsPerSecond": round(requests / elapsed, 2) if elapsed else 0.0,
+        "memoryPerRequestKiB": round(memory, 1) if memory is not None else None
+    }
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except Exception:
+        return None
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    """Sobe a aplicação em processo e executa todos os cenários."""
+    import httpx
+    import main
+
+    scenarios = build_scenarios(args.previous_chapters, args.pages)
+    results = []
+    async with main.app.router.lifespan_context(main.app):
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            for scenario in scenarios:
+                result = await run_scenario(
+                    client, scenario, args.requests, args.concurrency, args.memory_samples
+                )
+                results.append(result)
+                print(
+                    f"{result['name']:<45} "
+                    f"p50={result['latencyMs']['p50']:>8.2f}ms "
+                    f"p95={result['latencyMs']['p95']:>8.2f}ms "
+                    f"p99={result['latencyMs']['p99']:>8.2f}ms "
+                    f"rps={result['requestsPerSecond']:>8.1f} "
+                    f"mem={result['memoryPerRequestKiB']}KiB "
+                    f"erros={result['errors']}"
+                )
+
+    return {
+        "createdAt": datetime.utcnow().isoformat(),
+        "revision": _git_revision(),
+        "python": platform.python_version(),
+        "config": {
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "fakeLatencySeconds": float(os.environ["FAKE_LATENCY_SECONDS"]),
+            "fakeTokensPerSecond": os.environ.get("FAKE_TOKENS_PER_SECOND") or None,
+            "cache": os.environ["CACHE_BACKEND"]
+        },
+        "scenarios": results
+    }
+
+
+def compare(current: Dict[str, Any], baseline_path: str) -> None:
+    """Mostra a variação de p95 e requests/s em relação a um resultado anterior."""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = {s["name"]: s for s in json.load(f)["scenarios"]}
+
+    print(f"\nComparação com {baseline_path}:")
+    for scenario in current["scenarios"]:
+        before = baseline.get(scenario["name"])
+        if before is None:
+            continue
+        p95_before = before["latencyMs"]["p95"] or 1e-9
+        rps_before = before["requestsPerSecond"] or 1e-9
+        p95_delta = (scenario["latencyMs"]["p95"] / p95_before - 1) * 100
+        rps_delta = (scenario["requestsPerSecond"] / rps_before - 1) * 100
+        print(f"{scenario['name']:<45} p95 {p95_delta:+7.1f}%  rps {rps_delta:+7.1f}%")
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Teste de carga da TaleSeed API com modelo fake")
+    parser.add_argument("--requests", type=int, default=100, help="Requisições por cenário")
+    parser.add_argument("--concurrency", type=int, default=16, help="Requisições simultâneas")
+    parser.add_argument("--previous-chapters", type=int, nargs="+", default=[0, 1, 5, 20])
+    parser.add_argument("--pages", type=int, nargs="+", default=[1, 10])
+    parser.add_argument("--latency", type=float, default=0.05, help="Latência do modelo fake (s)")
+    parser.add_argument("--tokens-per-second", type=float, default=None, help="Ritmo do modelo fake")
+    parser.add_argument("--memory-samples", type=int, default=10, help="Requisições medidas com tracemalloc (0 = desliga)")
+    parser.add_argument("--cache", action="store_true", help="Mantém o cache de respostas ligado")
+    parser.add_argument("--output", default="bench_results.json", help="Arquivo JSON de saída")
+    parser.add_argument("--compare", default=None, help="JSON anterior para comparação")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+
+    # Configuração da aplicação antes de importar main.py
+    os.environ["AI_BACKEND"] = "fake"
+    os.environ["FAKE_LATENCY_SECONDS"] = str(args.latency)
+    if args.tokens_per_second:
+        os.environ["FAKE_TOKENS_PER_SECOND"] = str(args.tokens_per_second)
+    os.environ["CACHE_BACKEND"] = "memory" if args.cache else "none"
+    os.environ["PROJECT_STORE_BACKEND"] = "memory"
+    os.environ["JOB_STORE_BACKEND"] = "memory"
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+    result = asyncio.run(run(args))
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+    print(f"\nResultados salvos em {args.output}")
+
+    if args.compare:
+        compare(result, args.compare)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
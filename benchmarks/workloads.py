@@ -0,0 +1,108 @@
+"""
+Cargas de trabalho compartilhadas pelos micro-benchmarks e pelo gerador de carga.
+
+Os textos são sintéticos e determinísticos, de forma que execuções diferentes
+medem exatamente o mesmo trabalho.
+"""
+
+import sys
+from pathlib import Path
+from typing import Any, Dict, List
+
+# Permite rodar os benchmarks a partir da raiz do repositório
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+_WORDS = (
+    "a chuva batia nas janelas da velha estalagem enquanto Ana contava as moedas "
+    "Bruno observava a estrada escura esperando o mensageiro que nunca chegava "
+    "no porão o mapa antigo revelava uma passagem esquecida sob o rio"
+).split()
+
+WORDS_PER_PAGE = 250
+
+
+def synthetic_text(words: int, seed: int = 0) -> str:
+    """Texto determinístico com `words` palavras, em parágrafos."""
+    size = len(_WORDS)
+    out: List[str] = []
+    for idx in range(words):
+        out.append(_WORDS[(seed + idx * 5) % size])
+        if idx % 80 == 79:
+            out.append("\n\n")
+        elif idx % 12 == 11:
+            out[-1] += "."
+    return " ".join(out)
+
+
+def structured_summary(seed: int = 0) -> str:
+    """Resumo no formato devolvido por /summarize."""
+    return (
+        f"[RESUMO]\n{synthetic_text(150, seed)}\n\n"
+        "[PERSONAGENS]\n- Ana (estalajadeira)\n- Bruno (guarda da estrada)\n"
+        f"- Mensageiro {seed} (desaparecido)\n\n"
+        "[AMBIENTAÇÕES]\n- Velha estalagem à beira da estrada\n- Porão com o mapa antigo\n\n"
+        "[EVENTOS-CHAVE]\n1. Ana encontra o mapa\n2. Bruno desconfia do mensageiro\n"
+        "3. A passagem sob o rio é revelada\n\n"
+        f"[ESTADO FINAL]\n{synthetic_text(60, seed + 1)}"
+    )
+
+
+def creative_response(count: int) -> str:
+    """Resposta de sugestões no formato [SUGESTÃO N]."""
+    return "\n\n".join(
+        f"[SUGESTÃO {idx}]\n"
+        f"Texto: {synthetic_text(4, idx).capitalize()}\n"
+        f"Descrição: {synthetic_text(25, idx * 3)}"
+        for idx in range(1, count + 1)
+    )
+
+
+def chapter_payload(
+    previous_chapters: int = 0,
+    length_in_pages: int = 5,
+    index: int = 0
+) -> Dict[str, Any]:
+    """Request de /generate-chapter com `previous_chapters` capítulos inline."""
+    return {
+        "projectId": f"bench-{index}",
+        "chapterId": f"ch-{previous_chapters + 1}",
+        "projectTitle": "A Estalagem do Rio",
+        "chapterTitle": f"Capítulo {previous_chapters + 1}",
+        "chapterSummary": f"Ana segue a passagem sob o rio (variação {index}).",
+        "tone": "misterioso",
+        "writingStyle": "descritivo",
+        "setting": "Vila medieval à beira do rio",
+        "language": "pt-BR",
+        "lengthInPages": length_in_pages,
+        "keyPoints": ["O mapa", "A passagem"],
+        "previousChapters": [
+            {
+                "title": f"Capítulo {number}",
+                "summary": structured_summary(number),
+                "generatedText": synthetic_text(length_in_pages * WORDS_PER_PAGE, number)
+            }
+            for number in range(1, previous_chapters + 1)
+        ]
+    }
+
+
+def creative_payload(count: int = 5, index: int = 0) -> Dict[str, Any]:
+    """Request de /creative-suggestions."""
+    return {
+        "type": "title",
+        "context": f"Uma estalagem guarda um mapa antigo (variação {index}).",
+        "genre": "fantasia",
+        "tone": "misterioso",
+        "count": count
+    }
+
+
+def summarize_payload(length_in_pages: int = 5, index: int = 0) -> Dict[str, Any]:
+    """Request de /summarize com um capítulo de `length_in_pages` páginas."""
+    return {
+        "chapterText": synthetic_text(length_in_pages * WORDS_PER_PAGE, index),
+        "chapterTitle": f"Capítulo {index}",
+        "language": "pt-BR"
+    }
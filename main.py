@@ -2,24 +2,51 @@
 TaleSeed API - API para geração de conteúdo literário usando IA.
 """
 
+import asyncio
+import json
 import logging
+import math
 from pathlib import Path
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI, HTTPException, status
+from fastapi import FastAPI, HTTPException, Request, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from dotenv import load_dotenv
 import os
 
+from typing import List, Optional
+
 from src.models import (
     GenerateChapterRequest,
     GenerateChapterResponse,
+    GenerateChapterStreamEnd,
     CreativeSuggestionsRequest,
     CreativeSuggestionsResponse,
     SummarizeRequest,
-    SummarizeResponse
+    SummarizeResponse,
+    SummarizeBatchRequest,
+    StoredChapter,
+    StoryState,
+    Job
 )
 from src.services.ai_service import AIService
+from src.services.cache import create_cache
+from src.services.project_store import create_project_store
+from src.services.jobs import create_job_store
+from src.services import metrics
+from src.services.model_backend import create_backend
+from src.services.book_pipeline import BookPipeline
+from src.services.prompts import PromptLibrary
+from src.services.job_queue import JobQueue
+from src.services.rate_limit import (
+    RateLimitExceeded,
+    create_rate_limiter,
+    estimate_request_tokens,
+    tenant_key
+)
+from src.services.resilience import CircuitBreaker, ModelUnavailableError, RetryPolicy
+from src.services.routing import load_routing_table
 
 
 # Configuração de logging
@@ -40,8 +67,9 @@ async def lifespan(app: FastAPI):
     project_dir = Path(__file__).parent
     load_dotenv(project_dir / ".env")
     
+    ai_backend = os.getenv("AI_BACKEND", "gemini").lower()
     api_key = os.getenv("GEMINI_API_KEY")
-    if not api_key:
+    if ai_backend == "gemini" and not api_key:
         logger.error("GEMINI_API_KEY não configurada!")
         raise ValueError("GEMINI_API_KEY não encontrada no arquivo .env")
     
@@ -49,23 +77,143 @@ async def lifespan(app: FastAPI):
     model_name = os.getenv("GEMINI_MODEL", "gemini-1.5-flash")
     temperature = float(os.getenv("TEMPERATURE", "0.7"))
     max_tokens = int(os.getenv("MAX_OUTPUT_TOKENS", "8192"))
+    max_concurrent = int(os.getenv("MAX_CONCURRENT_GENERATIONS", "16"))
     log_level = os.getenv("LOG_LEVEL", "INFO")
+    cache_backend = os.getenv("CACHE_BACKEND", "memory")
+    cache_max_entries = int(os.getenv("CACHE_MAX_ENTRIES", "1024"))
+    cache_ttl = float(os.getenv("CACHE_TTL_SECONDS", "3600"))
+    cache_path = os.getenv("CACHE_PATH", "taleseed_cache.db")
+    project_store_backend = os.getenv("PROJECT_STORE_BACKEND", "sqlite")
+    project_store_path = os.getenv("PROJECT_STORE_PATH", "taleseed_projects.db")
+    max_input_tokens = int(os.getenv("MAX_INPUT_TOKENS", "32000"))
+    story_recent_chapters = int(os.getenv("STORY_RECENT_CHAPTERS", "2"))
+    context_window_tokens = int(os.getenv("MODEL_CONTEXT_TOKENS", "1000000"))
+    app.state.summarize_batch_concurrency = int(os.getenv("SUMMARIZE_BATCH_CONCURRENCY", "8"))
+    summarize_chunk_tokens = int(os.getenv("SUMMARIZE_CHUNK_TOKENS", "12000"))
+    json_mode = os.getenv("JSON_MODE", "true").lower() == "true"
+    chapter_segment_tokens = int(os.getenv("CHAPTER_SEGMENT_TOKENS", "6000"))
+    suggestion_history_size = int(os.getenv("SUGGESTION_HISTORY_SIZE", "200"))
+    job_store_backend = os.getenv("JOB_STORE_BACKEND", "sqlite")
+    job_store_path = os.getenv("JOB_STORE_PATH", "taleseed_jobs.db")
+    job_heartbeat_timeout = float(os.getenv("JOB_HEARTBEAT_TIMEOUT_SECONDS", "120"))
+    job_workers = int(os.getenv("JOB_WORKERS", "4"))
+    retry_max_attempts = int(os.getenv("RETRY_MAX_ATTEMPTS", "3"))
+    retry_base_delay = float(os.getenv("RETRY_BASE_DELAY_SECONDS", "0.5"))
+    retry_max_delay = float(os.getenv("RETRY_MAX_DELAY_SECONDS", "8"))
+    circuit_failure_threshold = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5"))
+    circuit_reset_seconds = float(os.getenv("CIRCUIT_RESET_SECONDS", "30"))
+    call_timeout = float(os.getenv("MODEL_TIMEOUT_SECONDS", "60"))
+    call_timeout_per_page = float(os.getenv("MODEL_TIMEOUT_PER_PAGE_SECONDS", "10"))
+    rate_limit_backend = os.getenv("RATE_LIMIT_BACKEND", "memory")
+    rate_limit_path = os.getenv("RATE_LIMIT_PATH", "taleseed_ratelimit.db")
+    rate_limit_rpm = int(os.getenv("RATE_LIMIT_REQUESTS_PER_MINUTE", "0"))
+    rate_limit_tpm = int(os.getenv("RATE_LIMIT_TOKENS_PER_MINUTE", "0"))
+    rate_limit_max_wait = float(os.getenv("RATE_LIMIT_MAX_WAIT_SECONDS", "0"))
+    fake_output_words = os.getenv("FAKE_OUTPUT_WORDS")
+    fake_tokens_per_second = os.getenv("FAKE_TOKENS_PER_SECOND")
+    prompt_version = os.getenv("PROMPT_VERSION", "v1")
+    prompt_templates_dir = os.getenv("PROMPT_TEMPLATES_DIR") or None
+    context_cache_ttl = float(os.getenv("CONTEXT_CACHE_TTL_SECONDS", "0"))
+    context_cache_min_tokens = int(os.getenv("CONTEXT_CACHE_MIN_TOKENS", "4096"))
+    context_cache_max_entries = int(os.getenv("CONTEXT_CACHE_MAX_ENTRIES", "128"))
+    model_routing_file = os.getenv("MODEL_ROUTING_FILE")
     
     # Configura nível de log conforme .env
     logging.getLogger().setLevel(getattr(logging, log_level.upper()))
     
     logger.info(f"Configurações carregadas do .env:")
+    logger.info(f"  - Backend: {ai_backend}")
     logger.info(f"  - Modelo: {model_name}")
     logger.info(f"  - Temperatura: {temperature}")
     logger.info(f"  - Max Tokens: {max_tokens}")
+    logger.info(f"  - Gerações simultâneas: {max_concurrent}")
     logger.info(f"  - Log Level: {log_level}")
+    logger.info(f"  - Cache: {cache_backend}")
+    logger.info(f"  - Armazenamento de projetos: {project_store_backend}")
+    logger.info(f"  - Max Tokens de entrada: {max_input_tokens}")
+    logger.info(f"  - Tentativas por chamada: {retry_max_attempts}")
+    logger.info(f"  - Versão dos prompts: {prompt_version}")
+    logger.info(f"  - Cache de contexto (TTL): {context_cache_ttl or 'desabilitado'}")
+    logger.info(f"  - Roteamento de modelos: {model_routing_file or 'desabilitado'}")
+    logger.info(
+        f"  - Rate limit por cliente: {rate_limit_rpm or '∞'} req/min, "
+        f"{rate_limit_tpm or '∞'} tokens/min ({rate_limit_backend})"
+    )
+    
+    backend = None
+    if ai_backend != "gemini":
+        backend = create_backend(
+            ai_backend,
+            latency=float(os.getenv("FAKE_LATENCY_SECONDS", "0")),
+            output_words=int(fake_output_words) if fake_output_words else None,
+            tokens_per_second=float(fake_tokens_per_second) if fake_tokens_per_second else None,
+            failure_rate=float(os.getenv("FAKE_FAILURE_RATE", "0"))
+        )
     
     app.state.ai_service = AIService(
         api_key=api_key,
         model_name=model_name,
         temperature=temperature,
-        max_output_tokens=max_tokens
+        max_output_tokens=max_tokens,
+        max_concurrent_requests=max_concurrent,
+        cache=create_cache(
+            cache_backend,
+            max_entries=cache_max_entries,
+            default_ttl=cache_ttl,
+            path=cache_path
+        ),
+        project_store=create_project_store(
+            project_store_backend,
+            path=project_store_path
+        ),
+        max_input_tokens=max_input_tokens,
+        story_recent_chapters=story_recent_chapters,
+        context_window_tokens=context_window_tokens,
+        retry_policy=RetryPolicy(
+            max_attempts=retry_max_attempts,
+            base_delay=retry_base_delay,
+            max_delay=retry_max_delay
+        ),
+        circuit_breaker=CircuitBreaker(
+            failure_threshold=circuit_failure_threshold,
+            reset_timeout=circuit_reset_seconds
+        ),
+        call_timeout=call_timeout,
+        call_timeout_per_page=call_timeout_per_page,
+        backend=backend,
+        prompts=PromptLibrary(version=prompt_version, directory=prompt_templates_dir),
+        context_cache_ttl=context_cache_ttl,
+        context_cache_min_tokens=context_cache_min_tokens,
+        context_cache_max_entries=context_cache_max_entries,
+        summarize_chunk_tokens=summarize_chunk_tokens,
+        json_mode=json_mode,
+        chapter_segment_tokens=chapter_segment_tokens,
+        suggestion_history_size=suggestion_history_size,
+        routing=load_routing_table(model_routing_file) if model_routing_file else None
+    )
+    
+    app.state.rate_limiter = create_rate_limiter(
+        rate_limit_backend,
+        requests_per_minute=rate_limit_rpm,
+        tokens_per_minute=rate_limit_tpm,
+        max_wait=rate_limit_max_wait,
+        path=rate_limit_path
+    )
+    # O contexto de previousChapterIds é montado no servidor, até MAX_INPUT_TOKENS
+    app.state.previous_context_tokens = max_input_tokens
+    
+    job_store = create_job_store(
+        job_store_backend,
+        path=job_store_path,
+        heartbeat_timeout=job_heartbeat_timeout
     )
+    # Só tarefas sem heartbeat recente: as de outros workers vivos continuam com eles
+    interrupted = job_store.mark_interrupted()
+    if interrupted:
+        logger.warning(f"{interrupted} tarefa(s) abandonada(s) marcada(s) como interrompida(s)")
+    app.state.book_pipeline = BookPipeline(app.state.ai_service, job_store)
+    app.state.job_queue = JobQueue(app.state.ai_service, job_store, workers=job_workers)
+    await app.state.job_queue.start()
     
     logger.info("TaleSeed API inicializada com sucesso!")
     
@@ -73,6 +221,9 @@ async def lifespan(app: FastAPI):
     
     # Shutdown
     logger.info("Encerrando TaleSeed API...")
+    await app.state.book_pipeline.stop()
+    await app.state.job_queue.stop()
+    await app.state.ai_service.close()
 
 
 # Cria aplicação FastAPI
@@ -118,23 +269,114 @@ async def ping():
     return {"status": "pong"}
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Métricas no formato do Prometheus (latência por etapa, tokens, cache, retries, erros)."""
+    return PlainTextResponse(
+        metrics.REGISTRY.render(),
+        media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
+def _serialize(response, endpoint: str) -> JSONResponse:
+    """Serializa a resposta Pydantic medindo o tempo gasto."""
+    with metrics.SERIALIZATION_SECONDS.time(endpoint=endpoint):
+        content = response.model_dump(mode="json")
+    return JSONResponse(content=content)
+
+
+@app.get("/cache/stats")
+async def cache_stats():
+    """Estatísticas do cache de respostas (acertos, erros, entradas)."""
+    ai_service: AIService = app.state.ai_service
+    if ai_service.cache is None:
+        return {"backend": "none"}
+    # Backends persistentes contam as entradas no banco
+    return await asyncio.to_thread(ai_service.cache.stats)
+
+
+def _unavailable(e: ModelUnavailableError) -> HTTPException:
+    """503 com Retry-After para quando o modelo está indisponível (circuito aberto ou retries esgotados)."""
+    logger.warning(f"Modelo indisponível: {e}")
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail=str(e),
+        headers={"Retry-After": e.retry_after_header}
+    )
+
+
+def _estimate_chapter_tokens(request: GenerateChapterRequest) -> int:
+    """Tokens estimados de um capítulo, com o contexto montado a partir de previousChapterIds."""
+    return estimate_request_tokens(request, previous_context_tokens=app.state.previous_context_tokens)
+
+
+async def _admit(
+    http_request: Request,
+    endpoint: str,
+    estimated_tokens: int,
+    requests: int = 1
+) -> None:
+    """
+    Controle de admissão por cliente (X-API-Key, senão IP).
+    
+    Aguarda saldo até RATE_LIMIT_MAX_WAIT_SECONDS; depois responde 429 com Retry-After.
+    """
+    limiter = app.state.rate_limiter
+    if not limiter.enabled:
+        return
+    tenant = tenant_key(
+        http_request.headers.get("x-api-key"),
+        http_request.client.host if http_request.client else None
+    )
+    try:
+        await limiter.admit(tenant, estimated_tokens, requests=requests)
+    except RateLimitExceeded as e:
+        metrics.RATE_LIMITED_TOTAL.inc(endpoint=endpoint)
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=str(e),
+            headers={"Retry-After": str(max(1, math.ceil(e.retry_after)))}
+        )
+
+
+def _bypass_cache(http_request: Request) -> bool:
+    """Indica se o cliente pediu para ignorar o cache (X-Cache-Bypass ou Cache-Control: no-cache)."""
+    if http_request.headers.get("x-cache-bypass", "").lower() in ("1", "true", "yes"):
+        return True
+    return "no-cache" in http_request.headers.get("cache-control", "").lower()
+
+
 @app.post(
     "/generate-chapter",
     response_model=GenerateChapterResponse,
     status_code=status.HTTP_200_OK,
+    responses={202: {"model": Job, "description": "Tarefa criada (mode='full')"}},
     tags=["Generation"]
 )
-async def generate_chapter(request: GenerateChapterRequest):
+async def generate_chapter(request: GenerateChapterRequest, http_request: Request):
     """
     Gera o texto completo de um capítulo baseado em resumo e contexto.
     
     Este endpoint recebe informações sobre um capítulo (título, resumo, pontos-chave, etc.)
     e gera o texto completo usando IA, respeitando o tom, estilo e configurações fornecidas.
+    
+    Com `mode="full"`, este capítulo e os de `nextChapters` são gerados em sequência
+    em segundo plano: a resposta é `202` com a tarefa, acompanhada em `GET /jobs/{jobId}`.
     """
+    await _admit(http_request, "generate_chapter", _estimate_chapter_tokens(request))
+    
     try:
+        if request.mode == "full":
+            pipeline: BookPipeline = app.state.book_pipeline
+            job = pipeline.start(request)
+            return JSONResponse(
+                status_code=status.HTTP_202_ACCEPTED,
+                content=job.model_dump(mode="json")
+            )
+        
         ai_service: AIService = app.state.ai_service
         response = await ai_service.generate_chapter(request)
-        return response
+        return _serialize(response, "generate_chapter")
     
     except ValueError as e:
         logger.error(f"Erro de validação: {e}")
@@ -143,6 +385,9 @@ async def generate_chapter(request: GenerateChapterRequest):
             detail=str(e)
         )
     
+    except ModelUnavailableError as e:
+        raise _unavailable(e)
+    
     except Exception as e:
         logger.error(f"Erro ao gerar capítulo: {e}")
         raise HTTPException(
@@ -151,23 +396,99 @@ async def generate_chapter(request: GenerateChapterRequest):
         )
 
 
+def _sse_event(event: str, data: str) -> str:
+    """Formata um evento Server-Sent Events."""
+    return f"event: {event}\ndata: {data}\n\n"
+
+
+@app.post(
+    "/generate-chapter/stream",
+    status_code=status.HTTP_200_OK,
+    tags=["Generation"]
+)
+async def generate_chapter_stream(request: GenerateChapterRequest, http_request: Request):
+    """
+    Gera o texto de um capítulo em streaming (Server-Sent Events).
+    
+    Emite eventos `chunk` com `{"text": ...}` à medida que o modelo produz o texto
+    e um evento final `done` com `tokensUsed` e `metadata`. Em caso de falha
+    durante a geração, emite um evento `error` com `{"detail": ...}`.
+    """
+    if request.mode == "full":
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="mode='full' não é suportado em streaming; use /generate-chapter."
+        )
+    if request.candidates > 1:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="candidates > 1 não é suportado em streaming; use /generate-chapter."
+        )
+    
+    await _admit(http_request, "stream_chapter", _estimate_chapter_tokens(request))
+    
+    ai_service: AIService = app.state.ai_service
+    
+    async def event_stream():
+        try:
+            async for item in ai_service.stream_chapter(request):
+                if isinstance(item, GenerateChapterStreamEnd):
+                    with metrics.SERIALIZATION_SECONDS.time(endpoint="stream_chapter"):
+                        data = item.model_dump_json()
+                    yield _sse_event("done", data)
+                else:
+                    yield _sse_event("chunk", json.dumps({"text": item}, ensure_ascii=False))
+        
+        except ValueError as e:
+            logger.error(f"Erro de validação: {e}")
+            yield _sse_event("error", json.dumps({"detail": str(e)}, ensure_ascii=False))
+        
+        except ModelUnavailableError as e:
+            logger.warning(f"Modelo indisponível: {e}")
+            yield _sse_event("error", json.dumps({
+                "detail": str(e),
+                "retryAfter": int(e.retry_after_header)
+            }, ensure_ascii=False))
+        
+        except Exception as e:
+            logger.error(f"Erro ao gerar capítulo em streaming: {e}")
+            yield _sse_event("error", json.dumps({
+                "detail": "Erro ao gerar capítulo. Por favor, tente novamente."
+            }, ensure_ascii=False))
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            # Evita que proxies (nginx/Render) segurem os eventos em buffer
+            "X-Accel-Buffering": "no"
+        }
+    )
+
+
 @app.post(
     "/creative-suggestions",
     response_model=CreativeSuggestionsResponse,
     status_code=status.HTTP_200_OK,
     tags=["Generation"]
 )
-async def creative_suggestions(request: CreativeSuggestionsRequest):
+async def creative_suggestions(request: CreativeSuggestionsRequest, http_request: Request):
     """
     Gera sugestões criativas (títulos, nomes de personagens, enredos, ambientações).
     
     Este endpoint recebe o tipo de sugestão desejada e o contexto, e retorna
     uma lista de sugestões criativas geradas pela IA.
     """
+    await _admit(http_request, "creative_suggestions", estimate_request_tokens(request))
+    
     try:
         ai_service: AIService = app.state.ai_service
-        response = await ai_service.generate_creative_suggestions(request)
-        return response
+        response = await ai_service.generate_creative_suggestions(
+            request,
+            bypass_cache=_bypass_cache(http_request)
+        )
+        return _serialize(response, "creative_suggestions")
     
     except ValueError as e:
         logger.error(f"Erro de validação: {e}")
@@ -176,6 +497,9 @@ async def creative_suggestions(request: CreativeSuggestionsRequest):
             detail=str(e)
         )
     
+    except ModelUnavailableError as e:
+        raise _unavailable(e)
+    
     except Exception as e:
         logger.error(f"Erro ao gerar sugestões criativas: {e}")
         raise HTTPException(
@@ -190,7 +514,7 @@ async def creative_suggestions(request: CreativeSuggestionsRequest):
     status_code=status.HTTP_200_OK,
     tags=["Generation"]
 )
-async def summarize_chapter(request: SummarizeRequest):
+async def summarize_chapter(request: SummarizeRequest, http_request: Request):
     """
     Gera resumo estruturado de capítulo focado em continuidade narrativa.
     
@@ -203,11 +527,18 @@ async def summarize_chapter(request: SummarizeRequest):
     
     Use este endpoint para processar capítulos gerados e criar contexto
     rico para geração de capítulos subsequentes.
+    
+    Resumos ficam em cache; envie `X-Cache-Bypass: true` para forçar nova geração.
     """
+    await _admit(http_request, "summarize", estimate_request_tokens(request))
+    
     try:
         ai_service: AIService = app.state.ai_service
-        response = await ai_service.summarize_chapter(request)
-        return response
+        response = await ai_service.summarize_chapter(
+            request,
+            bypass_cache=_bypass_cache(http_request)
+        )
+        return _serialize(response, "summarize")
     
     except ValueError as e:
         logger.error(f"Erro de validação: {e}")
@@ -216,6 +547,9 @@ async def summarize_chapter(request: SummarizeRequest):
             detail=str(e)
         )
     
+    except ModelUnavailableError as e:
+        raise _unavailable(e)
+    
     except Exception as e:
         logger.error(f"Erro ao gerar resumo: {e}")
         raise HTTPException(
@@ -224,16 +558,231 @@ async def summarize_chapter(request: SummarizeRequest):
         )
 
 
-if __name__ == "__main__":
-    import uvicorn
+@app.post(
+    "/summarize/batch",
+    status_code=status.HTTP_200_OK,
+    tags=["Generation"]
+)
+async def summarize_batch(request: SummarizeBatchRequest, http_request: Request):
+    """
+    Resume vários capítulos em uma única requisição.
+    
+    Os itens são processados em paralelo (até `SUMMARIZE_BATCH_CONCURRENCY`) e
+    cada resultado é transmitido como uma linha NDJSON assim que fica pronto:
+    `{"index": 3, "status": "ok", "result": {...}}` ou
+    `{"index": 5, "status": "error", "error": "..."}`.
+    """
+    await _admit(
+        http_request,
+        "summarize_batch",
+        sum(estimate_request_tokens(item) for item in request.items),
+        requests=len(request.items)
+    )
+    
+    ai_service: AIService = app.state.ai_service
     
-    # Carrega porta do .env ou usa 8000 como padrão
-    port = int(os.getenv("PORT", "8000"))
+    async def result_stream():
+        async for item in ai_service.summarize_batch(
+            request.items,
+            concurrency=app.state.summarize_batch_concurrency,
+            bypass_cache=_bypass_cache(http_request)
+        ):
+            with metrics.SERIALIZATION_SECONDS.time(endpoint="summarize_batch"):
+                line = item.model_dump_json(exclude_none=True)
+            yield line + "\n"
     
-    uvicorn.run(
-        "main:app",
-        host="0.0.0.0",
-        port=port,
-        reload=True,
-        log_level="info"
+    return StreamingResponse(
+        result_stream(),
+        media_type="application/x-ndjson",
+        headers={"X-Accel-Buffering": "no"}
     )
+
+
+def _get_project_store():
+    """Retorna o armazenamento de projetos ou 503 se estiver desabilitado."""
+    ai_service: AIService = app.state.ai_service
+    if ai_service.project_store is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Armazenamento de projetos desabilitado."
+        )
+    return ai_service.project_store
+
+
+@app.get(
+    "/projects/{project_id}/chapters",
+    response_model=List[StoredChapter],
+    tags=["Projects"]
+)
+async def list_project_chapters(project_id: str):
+    """Lista os capítulos salvos de um projeto, em ordem."""
+    store = _get_project_store()
+    return await store.run(store.list_chapters, project_id)
+
+
+@app.get(
+    "/projects/{project_id}/chapters/{chapter_id}",
+    response_model=StoredChapter,
+    tags=["Projects"]
+)
+async def get_project_chapter(project_id: str, chapter_id: str):
+    """Retorna um capítulo salvo (texto e resumo)."""
+    store = _get_project_store()
+    chapter = await store.run(store.get_chapter, project_id, chapter_id)
+    if chapter is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Capítulo não encontrado."
+        )
+    return chapter
+
+
+@app.get(
+    "/projects/{project_id}/state",
+    response_model=StoryState,
+    tags=["Projects"]
+)
+async def get_project_state(project_id: str):
+    """Estado incremental da história (digest, capítulos recentes, personagens e locais)."""
+    store = _get_project_store()
+    state = await store.run(store.get_story_state, project_id)
+    if state is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Estado da história ainda não foi gerado para este projeto."
+        )
+    return state
+
+
+@app.delete(
+    "/projects/{project_id}/chapters/{chapter_id}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    tags=["Projects"]
+)
+async def delete_project_chapter(project_id: str, chapter_id: str):
+    """Remove um capítulo salvo."""
+    store = _get_project_store()
+    if not await store.run(store.delete_chapter, project_id, chapter_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Capítulo não encontrado."
+        )
+
+
+@app.post(
+    "/jobs/generate-chapter",
+    response_model=Job,
+    status_code=status.HTTP_202_ACCEPTED,
+    tags=["Jobs"]
+)
+async def submit_chapter_job(request: GenerateChapterRequest, http_request: Request):
+    """
+    Enfileira a geração de um capítulo e retorna a tarefa imediatamente.
+    
+    A geração continua mesmo que o cliente desconecte. Acompanhe em
+    `GET /jobs/{jobId}` e busque o texto em `GET /jobs/{jobId}/result`.
+    Requests idênticos reaproveitam a tarefa existente; envie
+    `X-Cache-Bypass: true` para forçar uma nova.
+    """
+    if request.mode == "full":
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="mode='full' já roda em segundo plano; use /generate-chapter."
+        )
+    
+    await _admit(http_request, "jobs_generate_chapter", _estimate_chapter_tokens(request))
+    
+    job_queue: JobQueue = app.state.job_queue
+    job, _ = job_queue.submit(request, force=_bypass_cache(http_request))
+    return job
+
+
+def _get_job_or_404(job_id: str) -> Job:
+    """Retorna a tarefa ou 404."""
+    job = app.state.job_queue.job_store.get_job(job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Tarefa não encontrada."
+        )
+    return job
+
+
+@app.get(
+    "/jobs/{job_id}",
+    response_model=Job,
+    tags=["Jobs"]
+)
+async def get_job(job_id: str):
+    """Status e progresso de uma tarefa em segundo plano."""
+    return _get_job_or_404(job_id)
+
+
+@app.get(
+    "/jobs/{job_id}/result",
+    response_model=GenerateChapterResponse,
+    tags=["Jobs"]
+)
+async def get_job_result(job_id: str):
+    """Resultado de uma tarefa de capítulo concluída (409 enquanto não terminar)."""
+    job = _get_job_or_404(job_id)
+    result = app.state.job_queue.get_result(job_id) if job.kind == "chapter" else None
+    if result is None:
+        detail = f"Tarefa com status '{job.status}' não possui resultado."
+        if job.kind != "chapter":
+            detail = "Tarefas de livro salvam os capítulos no projeto; use /projects/{projectId}/chapters."
+        elif job.error:
+            detail = f"Tarefa falhou: {job.error}"
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=detail
+        )
+    return result
+
+
+def _job_runner(job_id: str):
+    """Pipeline de livro ou fila de capítulos, conforme o tipo da tarefa."""
+    job = _get_job_or_404(job_id)
+    if job.kind == "book":
+        return app.state.book_pipeline
+    return app.state.job_queue
+
+
+@app.post(
+    "/jobs/{job_id}/resume",
+    response_model=Job,
+    status_code=status.HTTP_202_ACCEPTED,
+    tags=["Jobs"]
+)
+async def resume_job(job_id: str):
+    """Retoma uma tarefa interrompida, falha ou cancelada a partir do último capítulo concluído."""
+    runner = _job_runner(job_id)
+    try:
+        return runner.resume(job_id)
+    except KeyError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Tarefa não encontrada."
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
+
+
+@app.post(
+    "/jobs/{job_id}/cancel",
+    response_model=Job,
+    tags=["Jobs"]
+)
+async def cancel_job(job_id: str):
+    """Cancela uma tarefa em andamento (capítulos já gerados continuam salvos)."""
+    runner = _job_runner(job_id)
+    try:
+        return runner.cancel(job_id)
+    except KeyError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Tarefa não encontrada."
+        )
@@ -5,22 +5,36 @@ Módulo src - TaleSeed API.
 from .models import (
     GenerateChapterRequest,
     GenerateChapterResponse,
+    GenerateChapterStreamEnd,
     CreativeSuggestionsRequest,
     CreativeSuggestionsResponse,
     PreviousChapter,
+    ChapterPlan,
+    ChapterSummary,
     GenerationMetadata,
-    CreativeSuggestion
+    TokenUsage,
+    CreativeSuggestion,
+    StoredChapter,
+    StoryState,
+    Job
 )
 from .services.ai_service import AIService
 
 __all__ = [
     'GenerateChapterRequest',
     'GenerateChapterResponse',
+    'GenerateChapterStreamEnd',
     'CreativeSuggestionsRequest',
     'CreativeSuggestionsResponse',
     'PreviousChapter',
+    'ChapterPlan',
+    'ChapterSummary',
     'GenerationMetadata',
+    'TokenUsage',
     'CreativeSuggestion',
+    'StoredChapter',
+    'StoryState',
+    'Job',
     'AIService',
 ]
 
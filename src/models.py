@@ -9,13 +9,35 @@ from datetime import datetime
 
 # ==================== Modelos para /generate-chapter ====================
 
+class ChapterSummary(BaseModel):
+    """Resumo de capítulo separado em campos."""
+    summary: str = Field(default="", description="Narrativa do capítulo")
+    characters: List[str] = Field(default_factory=list, description="Personagens e seu estado ao fim do capítulo")
+    settings: List[str] = Field(default_factory=list, description="Locais e ambientações")
+    keyEvents: List[str] = Field(default_factory=list, description="Eventos-chave em ordem")
+    endingState: str = Field(default="", description="Situação ao fim do capítulo")
+
+
 class PreviousChapter(BaseModel):
     """Informações sobre capítulos anteriores."""
     title: str
-    summary: str
+    summary: str = ""
+    structured: Optional[ChapterSummary] = Field(
+        default=None,
+        description="Resumo estruturado (de /summarize com structured=true); usado no lugar de `summary`"
+    )
     generatedText: Optional[str] = None
 
 
+class ChapterPlan(BaseModel):
+    """Capítulo planejado para geração em sequência (mode="full")."""
+    chapterId: str
+    chapterTitle: str
+    chapterSummary: str
+    keyPoints: Optional[List[str]] = Field(default_factory=list)
+    lengthInPages: Optional[int] = Field(default=None, ge=1, le=50)
+
+
 class GenerateChapterRequest(BaseModel):
     """Request para geração de capítulo."""
     projectId: str
@@ -29,7 +51,25 @@ class GenerateChapterRequest(BaseModel):
     setting: str
     lengthInPages: int = Field(default=8, ge=1, le=50)
     previousChapters: List[PreviousChapter] = Field(default_factory=list)
+    previousChapterIds: List[str] = Field(
+        default_factory=list,
+        description="Ids de capítulos já salvos no projeto, usados como contexto antes de previousChapters"
+    )
     mode: Literal["single", "full"] = "single"
+    candidates: int = Field(
+        default=1,
+        ge=1,
+        le=4,
+        description="Versões geradas em paralelo; volta a mais próxima da extensão pedida e as demais em `alternatives`"
+    )
+    prefetchSummary: bool = Field(
+        default=False,
+        description="Resume o capítulo em segundo plano logo após a geração; o /summarize seguinte do mesmo texto sai do cache"
+    )
+    nextChapters: List[ChapterPlan] = Field(
+        default_factory=list,
+        description="Com mode='full': capítulos gerados em sequência após este, em segundo plano"
+    )
     language: str = "pt-BR"
 
 
@@ -39,13 +79,49 @@ class GenerationMetadata(BaseModel):
     createdAt: datetime
     temperature: float
     maxTokens: int
+    promptVersion: Optional[str] = None
+
+
+class TokenUsage(BaseModel):
+    """Tokens consumidos em uma chamada ao modelo."""
+    promptTokens: int
+    completionTokens: int
+    totalTokens: int
+    cachedTokens: int = Field(
+        default=0,
+        description="Tokens do prompt lidos do cache de contexto do provedor (incluídos em promptTokens)"
+    )
+    estimated: bool = Field(
+        default=False,
+        description="True quando o provedor não informou a contagem e foi usada a estimativa local"
+    )
 
 
 class GenerateChapterResponse(BaseModel):
     """Response da geração de capítulo."""
     text: str
-    tokensUsed: int
+    tokensUsed: int = Field(..., description="Total de tokens (prompt + resposta)")
+    usage: TokenUsage
+    metadata: GenerationMetadata
+    segments: List[TokenUsage] = Field(
+        default_factory=list,
+        description="Tokens de cada parte, quando o capítulo longo é gerado em partes"
+    )
+    alternatives: List[str] = Field(
+        default_factory=list,
+        description="Com candidates > 1: as demais versões, da melhor para a pior"
+    )
+
+
+class GenerateChapterStreamEnd(BaseModel):
+    """Evento final do streaming de capítulo (após o último pedaço de texto)."""
+    tokensUsed: int = Field(..., description="Total de tokens (prompt + resposta)")
+    usage: TokenUsage
     metadata: GenerationMetadata
+    segments: List[TokenUsage] = Field(
+        default_factory=list,
+        description="Tokens de cada parte, quando o capítulo longo é gerado em partes"
+    )
 
 
 # ==================== Modelos para /creative-suggestions ====================
@@ -63,11 +139,29 @@ class CreativeSuggestionsRequest(BaseModel):
     genre: str
     tone: str
     count: int = Field(default=5, ge=1, le=20)
+    projectId: Optional[str] = Field(
+        default=None,
+        description=(
+            "Projeto das sugestões; as já servidas no projeto (mesmo tipo) não se repetem. "
+            "O histórico fica em memória em cada worker: com vários workers, ou após "
+            "um reinício, sugestões servidas por outro processo podem voltar"
+        )
+    )
+    candidates: int = Field(
+        default=1,
+        ge=1,
+        le=4,
+        description="Listas geradas em paralelo e unidas sem repetições; o que passa de `count` vem em `alternatives`"
+    )
 
 
 class CreativeSuggestionsResponse(BaseModel):
     """Response com sugestões criativas."""
     suggestions: List[CreativeSuggestion]
+    alternatives: List[CreativeSuggestion] = Field(
+        default_factory=list,
+        description="Com candidates > 1: sugestões extras, sem repetir as de `suggestions`"
+    )
 
 
 # ==================== Modelos para /summarize ====================
@@ -77,9 +171,91 @@ class SummarizeRequest(BaseModel):
     chapterText: str = Field(..., min_length=100, description="Texto completo do capítulo a ser resumido")
     chapterTitle: Optional[str] = Field(None, description="Título do capítulo (opcional)")
     language: str = Field(default="pt-BR", description="Idioma do resumo")
+    projectId: Optional[str] = Field(None, description="Projeto do capítulo (para salvar o resumo no servidor)")
+    chapterId: Optional[str] = Field(None, description="Capítulo salvo ao qual o resumo pertence")
+    structured: bool = Field(default=False, description="Também devolve o resumo separado em campos")
 
 
 class SummarizeResponse(BaseModel):
     """Response com resumo completo e estruturado em um único campo."""
     summary: str = Field(..., description="Resumo completo incluindo: narrativa, personagens, locais, eventos-chave e estado final")
-    tokensUsed: int
+    structured: Optional[ChapterSummary] = Field(
+        default=None,
+        description="Com structured=true: o mesmo resumo separado em campos"
+    )
+    tokensUsed: int = Field(..., description="Total de tokens (prompt + resposta)")
+    usage: TokenUsage
+
+
+class SummarizeBatchRequest(BaseModel):
+    """Request para resumo de vários capítulos em uma chamada."""
+    items: List[SummarizeRequest] = Field(..., min_length=1, max_length=200)
+
+
+class SummarizeBatchItemResult(BaseModel):
+    """Resultado de um item do lote (emitido assim que o item termina)."""
+    index: int = Field(..., description="Posição do item em `items`")
+    status: Literal["ok", "error"]
+    result: Optional[SummarizeResponse] = None
+    error: Optional[str] = None
+
+
+# ==================== Modelos para /projects ====================
+
+class StoredChapter(BaseModel):
+    """Capítulo salvo no servidor."""
+    projectId: str
+    chapterId: str
+    position: int
+    title: str
+    summary: Optional[str] = None
+    generatedText: str
+    updatedAt: datetime
+
+
+class ChapterDigest(BaseModel):
+    """Capítulo recente mantido com detalhe completo no estado da história."""
+    number: int
+    title: str
+    summary: str = ""
+    brief: str = ""
+    opening: Optional[str] = None
+    ending: Optional[str] = None
+    complete: bool = False
+    # Personagens e locais citados no capítulo (None em estados antigos)
+    characters: Optional[List[str]] = None
+    locations: Optional[List[str]] = None
+
+
+class StoryState(BaseModel):
+    """Estado incremental da história de um projeto (contexto para continuação)."""
+    projectId: str
+    chapterCount: int = 0
+    chapterKeys: List[str] = Field(default_factory=list)
+    digest: List[str] = Field(default_factory=list)
+    recentChapters: List[ChapterDigest] = Field(default_factory=list)
+    characters: List[str] = Field(default_factory=list)
+    locations: List[str] = Field(default_factory=list)
+    # Registro só dos capítulos já condensados no digest, base para desfazer
+    # os recentes (None em estados antigos)
+    digestCharacters: Optional[List[str]] = None
+    digestLocations: Optional[List[str]] = None
+    updatedAt: datetime
+
+
+# ==================== Modelos para /jobs ====================
+
+class Job(BaseModel):
+    """Tarefa executada em segundo plano."""
+    jobId: str
+    kind: Literal["book", "chapter"]
+    status: Literal["pending", "running", "completed", "failed", "interrupted", "cancelled"]
+    projectId: Optional[str] = None
+    requestHash: Optional[str] = None
+    totalSteps: int = 0
+    completedSteps: int = 0
+    completedChapterIds: List[str] = Field(default_factory=list)
+    currentChapterId: Optional[str] = None
+    error: Optional[str] = None
+    createdAt: datetime
+    updatedAt: datetime
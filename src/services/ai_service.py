@@ -2,47 +2,208 @@
 Serviço de IA para geração de conteúdo usando Gemini.
 """
 
+import asyncio
 import logging
-from typing import List, Optional
+from itertools import chain
+from typing import Any, AsyncIterator, Awaitable, Dict, Iterable, List, Optional, Tuple, TypeVar, Union
 from datetime import datetime
-import google.generativeai as genai
 
 from src.models import (
     GenerateChapterRequest,
     GenerateChapterResponse,
+    GenerateChapterStreamEnd,
     GenerationMetadata,
+    TokenUsage,
     CreativeSuggestionsRequest,
     CreativeSuggestionsResponse,
-    CreativeSuggestion
+    CreativeSuggestion,
+    ChapterSummary,
+    StoryState,
+    SummarizeRequest,
+    SummarizeResponse,
+    SummarizeBatchItemResult
+)
+from google.api_core import exceptions as google_exceptions
+
+from src.services.candidates import rank_chapters
+from src.services.cache import ResponseCache, make_cache_key, make_summary_key
+from src.services.context_cache import ContextCache, ContextPrefix
+from src.services import metrics
+from src.services.model_backend import ModelBackend, ModelChunk, create_backend
+from src.services.project_store import ProjectStore
+from src.services.prompts import PromptLibrary
+from src.services.single_flight import SingleFlight
+from src.services.routing import ModelRoute, ModelRouter, parse_routing_table
+from src.services.resilience import (
+    CircuitBreaker,
+    ModelUnavailableError,
+    RetryPolicy,
+    call_with_retry
+)
+from src.services.segments import PLAN_SCHEMA, distribute, parse_plan_json, segment_count, tail
+from src.services.story_state import StoryStateBuilder, split_previous_context
+from src.services.suggestions import (
+    SUGGESTIONS_SCHEMA,
+    SuggestionHistory,
+    merge_suggestions,
+    parse_suggestions_json
+)
+from src.services.summary import (
+    SUMMARY_SCHEMA,
+    compact_summary,
+    parse_summary_json,
+    parse_summary_text,
+    render_summary_text
+)
+from src.services.tokens import (
+    WORDS_PER_PAGE,
+    expected_output_tokens,
+    pack_by_tokens,
+    split_by_tokens,
+    sum_usage,
+    usage_from_metadata
 )
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
+# Máximo de chamadas extras para completar sugestões que faltaram (param antes
+# se uma chamada não trouxer nenhuma sugestão nova)
+SUGGESTION_TOPUP_ATTEMPTS = 3
+
+# Sugestões do histórico do projeto (as mais recentes) listadas nos prompts
+SUGGESTION_HISTORY_PROMPT_ITEMS = 50
+
+# Slots de capítulo iguais em todo o projeto: só com eles antes do contexto
+# dos capítulos anteriores o início do prompt serve ao cache de contexto
+_PROJECT_SLOTS = frozenset({"projectTitle", "language"})
+
+
+async def _gather_or_cancel(coros: Iterable[Awaitable[T]]) -> List[T]:
+    """Como `asyncio.gather`, mas cancela as demais chamadas se uma falhar."""
+    tasks = [asyncio.ensure_future(coro) for coro in coros]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
+
+
+async def _gather_candidates(coros: Iterable[Awaitable[T]]) -> List[T]:
+    """
+    Executa as versões em paralelo e devolve as que deram certo.
+    
+    Raises:
+        Exception: O erro da primeira versão, se todas falharem
+    """
+    results = await asyncio.gather(*coros, return_exceptions=True)
+    done = [result for result in results if not isinstance(result, BaseException)]
+    if not done:
+        raise results[0]
+    if len(done) < len(results):
+        logger.warning(f"{len(results) - len(done)} de {len(results)} versões falharam; usando as demais")
+    return done
+
 
 class AIService:
     """Serviço para geração de conteúdo com IA."""
     
     def __init__(
         self, 
-        api_key: str, 
+        api_key: Optional[str] = None, 
         model_name: str = "gemini-2.5-flash",
         temperature: float = 0.7,
-        max_output_tokens: int = 8192
+        max_output_tokens: int = 8192,
+        max_concurrent_requests: int = 16,
+        cache: Optional[ResponseCache] = None,
+        project_store: Optional[ProjectStore] = None,
+        max_input_tokens: int = 32000,
+        story_recent_chapters: int = 2,
+        context_window_tokens: int = 1000000,
+        retry_policy: Optional[RetryPolicy] = None,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+        call_timeout: float = 60.0,
+        call_timeout_per_page: float = 10.0,
+        backend: Optional[ModelBackend] = None,
+        prompts: Optional[PromptLibrary] = None,
+        context_cache_ttl: float = 0.0,
+        context_cache_min_tokens: int = 4096,
+        context_cache_max_entries: int = 128,
+        summarize_chunk_tokens: int = 12000,
+        json_mode: bool = True,
+        chapter_segment_tokens: int = 6000,
+        routing: Optional[Dict[str, Any]] = None,
+        suggestion_history_size: int = 200
     ):
         """
         Inicializa o serviço de IA.
         
         Args:
-            api_key: Chave da API do Google Gemini
+            api_key: Chave da API do Google Gemini (não usada com `backend`)
             model_name: Nome do modelo a ser usado
             temperature: Temperatura para geração (0.0-1.0)
             max_output_tokens: Máximo de tokens na saída
+            max_concurrent_requests: Máximo de chamadas simultâneas ao modelo
+                neste processo (as demais aguardam na fila)
+            cache: Cache de respostas para sugestões e resumos (None = desabilitado)
+            project_store: Armazenamento de capítulos/resumos por projeto (None = desabilitado)
+            max_input_tokens: Teto (estimado) de tokens do prompt de continuação
+            story_recent_chapters: Capítulos finais mantidos com detalhe completo no contexto
+            context_window_tokens: Janela de contexto do modelo (entrada + saída)
+            retry_policy: Retry de erros transitórios (None = padrão, 3 tentativas)
+            circuit_breaker: Circuit breaker das chamadas ao modelo (None = desabilitado)
+            call_timeout: Deadline de cada chamada ao modelo em segundos
+            call_timeout_per_page: Segundos extras de deadline por página de capítulo
+            backend: Backend de modelo (None = Gemini com `api_key`)
+            prompts: Templates de prompt (None = versão padrão em src/prompts)
+            context_cache_ttl: Validade dos contextos em cache no provedor (0 = desabilitado)
+            context_cache_min_tokens: Tamanho mínimo do prefixo para cachear
+            context_cache_max_entries: Contextos em cache ativos ao mesmo tempo
+            summarize_chunk_tokens: Textos maiores são resumidos em trechos deste
+                tamanho, em paralelo, e depois combinados (0 = sempre em uma chamada)
+            json_mode: Usa o modo JSON do modelo para respostas estruturadas
+                (False = texto com marcadores lido pelo parser)
+            chapter_segment_tokens: Capítulos com saída esperada maior são gerados
+                em partes deste tamanho (0 = sempre em uma chamada); limitado ao
+                `max_output_tokens` da rota escolhida
+            routing: Tabela de roteamento entre modelos (ver `routing.py`);
+                None = todas as chamadas no modelo `model_name`
+            suggestion_history_size: Sugestões servidas guardadas por projeto e
+                tipo, que não são repetidas (0 = sem histórico)
         """
+        if max_concurrent_requests < 1:
+            raise ValueError("max_concurrent_requests deve ser >= 1")
+        
         self.model_name = model_name
         self.temperature = temperature
         self.max_output_tokens = max_output_tokens
+        self.max_concurrent_requests = max_concurrent_requests
+        self.cache = cache
+        self.project_store = project_store
+        self.max_input_tokens = max_input_tokens
+        self.context_window_tokens = context_window_tokens
+        self.story_builder = StoryStateBuilder(recent_chapters=story_recent_chapters)
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.circuit_breaker = circuit_breaker
+        self.call_timeout = call_timeout
+        self.call_timeout_per_page = call_timeout_per_page
+        self.prompts = prompts or PromptLibrary()
+        self.summarize_chunk_tokens = summarize_chunk_tokens
+        self.chapter_segment_tokens = chapter_segment_tokens
+        
+        # Limita chamadas simultâneas ao modelo por worker
+        self._semaphore = asyncio.Semaphore(max_concurrent_requests)
+        
+        # Requisições idênticas em andamento compartilham a mesma chamada
+        self._single_flight = SingleFlight()
         
-        genai.configure(api_key=api_key)
+        # Sugestões já servidas por projeto, excluídas das próximas respostas
+        self.suggestion_history = SuggestionHistory(max_items=suggestion_history_size)
+        
+        # Resumos pré-calculados em andamento (prefetchSummary), pelo hash do texto e do título
+        self._summary_prefetches: Dict[str, asyncio.Task] = {}
         
         self.generation_config = {
             "temperature": temperature,
@@ -58,319 +219,703 @@ class AIService:
             {"category": "HARM_CATEGORY_DANGEROUS_CONTENT", "threshold": "BLOCK_NONE"},
         ]
         
-        self.model = genai.GenerativeModel(
-            model_name=model_name,
-            generation_config=self.generation_config,
-            safety_settings=self.safety_settings
+        # Backend injetado (ex.: fake) é compartilhado por todas as rotas
+        shared_backend = backend
+        
+        def build_route(
+            name: str,
+            route_model: str,
+            generation_config: Dict[str, Any],
+            route_context_window: Optional[int] = None
+        ) -> ModelRoute:
+            route_backend = shared_backend or create_backend(
+                "gemini",
+                api_key=api_key,
+                model_name=route_model,
+                generation_config=generation_config,
+                safety_settings=self.safety_settings
+            )
+            # Prefixos estáveis (instruções fixas, contexto do projeto) em cache no provedor;
+            # contextos em cache são ligados ao modelo, então cada rota tem os seus
+            context_cache = None
+            if context_cache_ttl > 0 and route_backend.supports_context_cache:
+                context_cache = ContextCache(
+                    route_backend,
+                    ttl=context_cache_ttl,
+                    min_tokens=context_cache_min_tokens,
+                    max_entries=context_cache_max_entries
+                )
+            return ModelRoute(
+                name,
+                route_model,
+                generation_config,
+                route_backend,
+                context_cache,
+                context_window_tokens=route_context_window or context_window_tokens
+            )
+        
+        default_route = build_route("default", model_name, self.generation_config)
+        routes, rules = parse_routing_table(routing or {})
+        self.router = ModelRouter(
+            default_route,
+            {
+                name: build_route(name, route_model, {**self.generation_config, **overrides}, context_window)
+                for name, (route_model, overrides, context_window) in routes.items()
+            },
+            rules
+        )
+        
+        self.backend = default_route.backend
+        self.context_cache = default_route.context_cache
+        self.json_mode = json_mode and self.backend.supports_json_mode
+        
+        if routes:
+            logger.info(
+                "Rotas de modelo: " + ", ".join(f"{r.name}={r.model_name}" for r in self.router.routes())
+                + f" ({len(rules)} regras)"
+            )
+        
+        logger.info(
+            f"AIService inicializado com modelo: {model_name} "
+            f"(backend: {self.backend.backend_name}, concorrência máxima: {max_concurrent_requests})"
+        )
+    
+    def _labels(self, endpoint: str, route: Optional[ModelRoute] = None) -> dict:
+        """Labels padrão das métricas (modelo da rota, ou o padrão)."""
+        return {"endpoint": endpoint, "model": route.model_name if route else self.model_name}
+    
+    def _record_usage(self, endpoint: str, usage: TokenUsage, route: Optional[ModelRoute] = None) -> None:
+        """Contabiliza tokens de entrada e saída de uma chamada ao modelo."""
+        labels = self._labels(endpoint, route)
+        metrics.TOKENS_TOTAL.inc(usage.promptTokens, direction="in", **labels)
+        metrics.TOKENS_TOTAL.inc(usage.completionTokens, direction="out", **labels)
+        if usage.cachedTokens:
+            metrics.TOKENS_TOTAL.inc(usage.cachedTokens, direction="cached", **labels)
+    
+    def _record_error(self, endpoint: str, error: Exception) -> None:
+        metrics.ERRORS_TOTAL.inc(type=type(error).__name__, **self._labels(endpoint))
+    
+    async def close(self) -> None:
+        """Libera recursos no provedor (contextos em cache) e cancela resumos pré-calculados."""
+        for task in list(self._summary_prefetches.values()):
+            task.cancel()
+        for route in self.router.routes():
+            if route.context_cache is not None:
+                await route.context_cache.close()
+    
+    def _route(self, endpoint: str, prompt: str, expected_output: int = 0) -> ModelRoute:
+        """Rota da chamada pelo endpoint e tamanho (tokens do prompt + saída esperada)."""
+        if not self.router.rules:
+            return self.router.default
+        return self.router.select(endpoint, self.backend.count_tokens(prompt) + expected_output)
+    
+    async def _cached_context(
+        self,
+        prompt: str,
+        context: Optional[ContextPrefix],
+        route: ModelRoute
+    ) -> Tuple[Optional[str], str]:
+        """
+        Contexto em cache (no modelo da rota) para o prefixo do prompt, se houver.
+        
+        Returns:
+            Nome do contexto (ou None) e o texto a enviar ao modelo
+        """
+        if context is None or route.context_cache is None:
+            return None, prompt
+        if not context.text or not prompt.startswith(context.text):
+            return None, prompt
+        cached = await route.context_cache.get(context)
+        if cached is None:
+            return None, prompt
+        name, length = cached
+        return name, prompt[length:]
+    
+    def _invalidate_project_context(self, project_id: Optional[str], chapter_id: Optional[str]) -> None:
+        """Descarta o contexto em cache do projeto se ele inclui o capítulo alterado."""
+        if not project_id or not chapter_id:
+            return
+        for route in self.router.routes():
+            if route.context_cache is not None:
+                route.context_cache.invalidate(f"project:{project_id}", chapter_id)
+    
+    async def _generate_content(
+        self,
+        prompt: str,
+        deadline: Optional[float] = None,
+        endpoint: str = "",
+        context: Optional[ContextPrefix] = None,
+        response_schema: Optional[Dict[str, Any]] = None,
+        route: Optional[ModelRoute] = None
+    ):
+        """
+        Executa a chamada ao modelo sem bloquear o event loop.
+        
+        Usa a API assíncrona nativa do Gemini e respeita o limite de
+        concorrência do serviço, de forma que rotas leves (/health, /ping)
+        continuam respondendo durante gerações longas.
+        
+        Erros transitórios são repetidos com backoff (fora do limite de
+        concorrência) e passam pelo circuit breaker. A busca (ou criação) do
+        contexto em cache faz parte da tentativa: ocupa a mesma vaga e conta
+        no mesmo deadline que a chamada ao modelo.
+        
+        Args:
+            prompt: Prompt já montado
+            deadline: Tempo máximo de cada tentativa (None = `call_timeout`)
+            endpoint: Label das métricas
+            context: Escopo e prefixo do prompt que podem vir do cache de contexto
+            response_schema: Schema da resposta no modo JSON (None = texto livre)
+            route: Rota do modelo (None = escolhida pelo endpoint e tamanho do prompt)
+        
+        Raises:
+            ModelUnavailableError: Circuito aberto ou tentativas esgotadas
+        """
+        timeout = deadline or self.call_timeout
+        route = route or self._route(endpoint, prompt)
+        labels = self._labels(endpoint, route)
+        
+        async def call():
+            cached_name, text = await self._cached_context(prompt, context, route)
+            try:
+                return await route.backend.generate(
+                    text,
+                    cached_context=cached_name,
+                    response_schema=response_schema
+                )
+            except google_exceptions.NotFound:
+                if cached_name is None:
+                    raise
+            # Contexto expirou no provedor: segue com o prompt completo
+            route.context_cache.discard(context.scope, cached_name)
+            return await route.backend.generate(prompt, response_schema=response_schema)
+        
+        async def attempt():
+            async with self._semaphore:
+                with metrics.MODEL_CALL_SECONDS.time(**labels):
+                    return await asyncio.wait_for(call(), timeout=timeout)
+        
+        return await call_with_retry(
+            attempt,
+            self.retry_policy,
+            self.circuit_breaker,
+            on_retry=lambda _: metrics.RETRIES_TOTAL.inc(**labels)
+        )
+    
+    async def _stream_content(
+        self,
+        prompt: str,
+        deadline: Optional[float] = None,
+        endpoint: str = "",
+        context: Optional[ContextPrefix] = None,
+        route: Optional[ModelRoute] = None
+    ) -> AsyncIterator[ModelChunk]:
+        """
+        Versão em streaming de `_generate_content`.
+        
+        Repassa os chunks com texto à medida que o modelo os envia (cada um
+        pode trazer o `usage_metadata` acumulado). A vaga no limite de
+        concorrência é tomada a cada tentativa de abertura e, depois que o
+        stream abre, fica ocupada até o fim dele.
+        
+        Apenas a abertura do stream (até o primeiro chunk) é repetida em caso
+        de erro transitório; depois que o texto começou a ser enviado ao
+        cliente, uma falha encerra o stream. O deadline vale para o stream
+        inteiro; a busca do contexto em cache entra no deadline da abertura.
+        """
+        timeout = deadline or self.call_timeout
+        route = route or self._route(endpoint, prompt)
+        labels = self._labels(endpoint, route)
+        loop = asyncio.get_running_loop()
+        
+        started: Optional[float] = None
+        held = False
+        
+        async def first_chunk(iterator):
+            try:
+                return await iterator.__anext__()
+            except StopAsyncIteration:
+                return None
+        
+        async def start():
+            cached_name, text = await self._cached_context(prompt, context, route)
+            iterator = route.backend.stream(text, cached_context=cached_name).__aiter__()
+            try:
+                return iterator, await first_chunk(iterator)
+            except google_exceptions.NotFound:
+                if cached_name is None:
+                    raise
+            # Contexto expirou no provedor: segue com o prompt completo
+            route.context_cache.discard(context.scope, cached_name)
+            iterator = route.backend.stream(prompt).__aiter__()
+            return iterator, await first_chunk(iterator)
+        
+        async def open_stream():
+            # A vaga é tomada por tentativa: a espera do backoff não ocupa o limite
+            nonlocal started, held
+            await self._semaphore.acquire()
+            try:
+                opened = loop.time()
+                if started is None:
+                    started = opened
+                iterator, first = await asyncio.wait_for(start(), timeout=timeout)
+            except BaseException:
+                self._semaphore.release()
+                raise
+            held = True
+            metrics.TIME_TO_FIRST_TOKEN_SECONDS.observe(loop.time() - opened, **labels)
+            return iterator, first
+        
+        try:
+            iterator, chunk = await call_with_retry(
+                open_stream,
+                self.retry_policy,
+                self.circuit_breaker,
+                on_retry=lambda _: metrics.RETRIES_TOTAL.inc(**labels)
+            )
+            
+            while chunk is not None:
+                yield chunk
+                remaining = timeout - (loop.time() - started)
+                if remaining <= 0:
+                    raise asyncio.TimeoutError(f"Stream excedeu o deadline de {timeout}s")
+                try:
+                    chunk = await asyncio.wait_for(iterator.__anext__(), timeout=remaining)
+                except StopAsyncIteration:
+                    break
+            
+            metrics.MODEL_CALL_SECONDS.observe(loop.time() - started, **labels)
+        finally:
+            if held:
+                self._semaphore.release()
+    
+    def _preflight(
+        self,
+        prompt: str,
+        route: ModelRoute,
+        expected_output_tokens: Optional[int] = None
+    ) -> int:
+        """
+        Checagem local do prompt antes de pagar pela chamada.
+        
+        Args:
+            prompt: Prompt já montado
+            route: Rota da chamada (seus limites de saída e janela de contexto)
+            expected_output_tokens: Tokens de saída esperados (para avisar truncamento)
+        
+        Returns:
+            Estimativa de tokens do prompt
+        
+        Raises:
+            ValueError: Se prompt + max_output_tokens não cabem na janela do modelo
+        """
+        prompt_tokens = route.backend.count_tokens(prompt)
+        max_output_tokens = route.max_output_tokens
+        
+        if prompt_tokens + max_output_tokens > route.context_window_tokens:
+            raise ValueError(
+                f"Prompt estimado em {prompt_tokens} tokens excede a janela de contexto "
+                f"do modelo {route.model_name} ({route.context_window_tokens} tokens, com "
+                f"{max_output_tokens} reservados para a resposta)"
+            )
+        
+        if expected_output_tokens and expected_output_tokens > max_output_tokens:
+            logger.warning(
+                f"Saída esperada (~{expected_output_tokens} tokens) excede "
+                f"max_output_tokens ({max_output_tokens}) de {route.model_name}; "
+                f"o texto pode ser truncado"
+            )
+        
+        return prompt_tokens
+    
+    async def _generate_cached(
+        self,
+        prompt: str,
+        bypass_cache: bool = False,
+        cache_ttl: Optional[float] = -1,
+        endpoint: str = "",
+        context: Optional[ContextPrefix] = None,
+        response_schema: Optional[Dict[str, Any]] = None,
+        variant: int = 0
+    ) -> Tuple[str, TokenUsage]:
+        """
+        Gera texto consultando antes o cache de respostas.
+        
+        Chamadas concorrentes com o mesmo prompt aguardam a mesma chamada ao
+        modelo (single-flight), com ou sem cache habilitado.
+        
+        Args:
+            prompt: Prompt já montado
+            bypass_cache: Ignora a leitura do cache (o resultado novo é gravado)
+            cache_ttl: Validade da entrada; None = sem expiração; -1 = padrão do cache
+            endpoint: Label das métricas
+            context: Escopo e prefixo do prompt que podem vir do cache de contexto
+            response_schema: Schema da resposta no modo JSON (None = texto livre)
+            variant: Versão da geração (candidates); versões diferentes do mesmo
+                prompt têm entradas de cache próprias
+            
+        Returns:
+            Texto gerado (ou armazenado) para o prompt e os tokens da geração original
+        """
+        route = self._route(endpoint, prompt)
+        generation_config = route.generation_config
+        if response_schema is not None:
+            generation_config = {**generation_config, "response_schema": response_schema}
+        if variant:
+            generation_config = {**generation_config, "variant": variant}
+        key = make_cache_key(prompt, route.model_name, generation_config)
+        if self.cache is not None:
+            if not bypass_cache:
+                cached = await self.cache.get(key)
+                metrics.CACHE_REQUESTS_TOTAL.inc(
+                    result="hit" if cached is not None else "miss",
+                    **self._labels(endpoint, route)
+                )
+                if cached is not None:
+                    logger.info("Resposta servida do cache")
+                    usage = cached.get("usage")
+                    if usage is None:
+                        usage = usage_from_metadata(None, prompt, cached["text"])
+                    else:
+                        usage = TokenUsage(**usage)
+                    return cached["text"], usage
+        
+        async def call() -> Tuple[str, TokenUsage]:
+            self._preflight(prompt, route)
+            response = await self._generate_content(
+                prompt,
+                endpoint=endpoint,
+                context=context,
+                response_schema=response_schema,
+                route=route
+            )
+            
+            if not response.text:
+                raise ValueError("Resposta vazia da API")
+            
+            usage = usage_from_metadata(
+                response.usage_metadata,
+                prompt,
+                response.text
+            )
+            self._record_usage(endpoint, usage, route)
+            
+            if self.cache is not None:
+                await self.cache.set(
+                    key,
+                    {"text": response.text, "usage": usage.model_dump()},
+                    ttl=cache_ttl
+                )
+            
+            return response.text, usage
+        
+        result, shared = await self._single_flight.do(key, call)
+        if shared:
+            logger.info("Requisição idêntica em andamento; resultado compartilhado")
+            metrics.COALESCED_TOTAL.inc(**self._labels(endpoint, route))
+        return result
+    
+    @staticmethod
+    def _expected_chapter_tokens(request: GenerateChapterRequest) -> int:
+        """Tokens de saída esperados para a extensão pedida (~250 palavras/página)."""
+        return expected_output_tokens(request.lengthInPages)
+    
+    def _chapter_deadline(self, request: GenerateChapterRequest) -> float:
+        """Deadline da chamada de capítulo, proporcional à extensão pedida."""
+        return self.call_timeout + request.lengthInPages * self.call_timeout_per_page
+    
+    def _build_metadata(self, route: Optional[ModelRoute] = None) -> GenerationMetadata:
+        """Metadados da geração com a configuração da rota usada (ou a padrão)."""
+        route = route or self.router.default
+        return GenerationMetadata(
+            model=route.model_name,
+            createdAt=datetime.utcnow(),
+            temperature=route.temperature,
+            maxTokens=route.max_output_tokens,
+            promptVersion=self.prompts.version
+        )
+    
+    def _apply_chapter_to_state(
+        self,
+        state: StoryState,
+        title: str,
+        summary: str,
+        text: Optional[str],
+        key: Optional[str] = None,
+        structured: Optional[ChapterSummary] = None
+    ) -> None:
+        """
+        Aplica um capítulo ao estado, extraindo personagens e locais do resumo.
+        
+        Com o resumo estruturado, o capítulo guarda apenas a forma compacta
+        (narrativa, eventos-chave e estado final): personagens e locais já
+        ficam no registro do estado.
+        """
+        if structured is None and summary and "[RESUMO]" in summary.upper():
+            structured = self._parse_summary_response(summary)
+        
+        brief = summary
+        characters: List[str] = []
+        locations: List[str] = []
+        if structured is not None:
+            brief = structured.summary
+            characters = structured.characters
+            locations = structured.settings
+            summary = compact_summary(structured)
+        
+        self.story_builder.add_chapter(
+            state,
+            title=title,
+            summary=summary,
+            text=text,
+            brief=brief,
+            characters=characters,
+            locations=locations,
+            key=key
         )
+    
+    def _sync_story_state(self, project_id: str, chapter_ids: List[str]) -> StoryState:
+        """
+        Atualiza o estado salvo do projeto para os capítulos pedidos.
+        
+        Só capítulos novos (ou alterados desde a última atualização) são lidos
+        do armazenamento e aplicados; o restante vem pronto do estado salvo.
+        """
+        keys = self.project_store.chapter_keys(project_id, chapter_ids)
+        state = self.project_store.get_story_state(project_id)
+        if state is None:
+            state = self.story_builder.new_state(project_id)
+        
+        # Prefixo de capítulos já aplicados e inalterados
+        common = 0
+        for applied, current in zip(state.chapterKeys, keys):
+            if applied != current:
+                break
+            common += 1
+        
+        changed = False
+        if common < len(state.chapterKeys):
+            if self.story_builder.can_rewind(state, common):
+                state = self.story_builder.rewind(state, common)
+            else:
+                logger.info(f"Reconstruindo estado da história do projeto {project_id}")
+                state = self.story_builder.new_state(project_id)
+                common = 0
+            changed = True
+        
+        if common < len(chapter_ids):
+            for chapter, key in zip(
+                self.project_store.get_chapters(project_id, chapter_ids[common:]),
+                keys[common:]
+            ):
+                self._apply_chapter_to_state(
+                    state,
+                    title=chapter.title,
+                    summary=chapter.summary or "",
+                    text=chapter.generatedText,
+                    key=key
+                )
+            changed = True
+        
+        if changed:
+            self.project_store.save_story_state(state)
+        
+        return state
+    
+    def _load_story_state(self, request: GenerateChapterRequest) -> Optional[StoryState]:
+        """
+        Monta o estado da história usado no prompt de continuação.
+        
+        Capítulos referenciados por `previousChapterIds` vêm do estado salvo do
+        projeto; os enviados em `previousChapters` são aplicados em seguida,
+        apenas nesta requisição.
+        
+        Returns:
+            Estado da história ou None se não há capítulos anteriores
+        
+        Raises:
+            ValueError: Se ids forem enviados sem armazenamento habilitado ou não existirem
+        """
+        if not request.previousChapterIds and not request.previousChapters:
+            return None
         
-        logger.info(f"AIService inicializado com modelo: {model_name}")
+        if request.previousChapterIds:
+            if self.project_store is None:
+                raise ValueError("previousChapterIds requer armazenamento de projetos habilitado")
+            state = self._sync_story_state(request.projectId, request.previousChapterIds)
+        else:
+            state = self.story_builder.new_state(request.projectId)
+        
+        for chapter in request.previousChapters:
+            self._apply_chapter_to_state(
+                state,
+                title=chapter.title,
+                summary=chapter.summary,
+                text=chapter.generatedText,
+                structured=chapter.structured
+            )
+        
+        return state
+    
+    async def _store_io(self, func, *args):
+        """
+        Executa `func`, que lê ou grava no armazenamento de projetos, fora do
+        event loop quando o armazenamento bloqueia em disco (SQLite).
+        """
+        if self.project_store is None:
+            return func(*args)
+        return await self.project_store.run(func, *args)
+    
+    async def _persist_chapter(self, request: GenerateChapterRequest, text: str) -> None:
+        """Salva o capítulo gerado no armazenamento de projetos (se habilitado)."""
+        if self.project_store is None:
+            return
+        try:
+            await self.project_store.run(
+                self.project_store.save_chapter,
+                project_id=request.projectId,
+                chapter_id=request.chapterId,
+                title=request.chapterTitle,
+                generated_text=text
+            )
+            self._invalidate_project_context(request.projectId, request.chapterId)
+        except Exception as e:
+            # Falha ao salvar não deve perder o capítulo já gerado
+            logger.error(f"Erro ao salvar capítulo {request.chapterId}: {e}")
     
     def _build_chapter_prompt(self, request: GenerateChapterRequest) -> str:
         """Constrói o prompt para geração de capítulo."""
+        return self._build_chapter_prompt_parts(request)[0]
+    
+    def _build_chapter_prompt_parts(
+        self,
+        request: GenerateChapterRequest
+    ) -> Tuple[str, Optional[ContextPrefix]]:
+        """
+        Prompt do capítulo e o prefixo reaproveitável no cache de contexto.
+        
+        Só a continuação de um projeto tem prefixo: o início do prompt até o
+        fim do digest dos capítulos anteriores (escopo `project:<projectId>`),
+        e apenas quando o template não tem dados do capítulo pedido antes dele.
+        """
+        story_state = self._load_story_state(request)
         
         # Se não há capítulos anteriores: é o PRIMEIRO capítulo (início do livro)
-        if not request.previousChapters:
-            return self._build_first_chapter_prompt(request)
+        if story_state is None:
+            return self._build_first_chapter_prompt(request), None
         
         # Se há capítulos anteriores: continuação da história
-        return self._build_continuation_chapter_prompt(request)
+        prompt, stable_prefix = self._build_continuation_chapter_prompt(request, story_state)
+        if request.projectId and stable_prefix is not None:
+            return prompt, ContextPrefix(
+                f"project:{request.projectId}",
+                stable_prefix,
+                frozenset(request.previousChapterIds)
+            )
+        return prompt, None
+    
+    def _chapter_slots(
+        self,
+        request: GenerateChapterRequest,
+        key_points_template: str = "key_points"
+    ) -> dict:
+        """Slots comuns aos templates de capítulo."""
+        key_points = ""
+        if request.keyPoints:
+            key_points = self.prompts.get(key_points_template, request.language).render(
+                items="\n".join(f"- {point}" for point in request.keyPoints)
+            )
+        return {
+            "projectTitle": request.projectTitle,
+            "language": request.language,
+            "chapterTitle": request.chapterTitle,
+            "chapterSummary": request.chapterSummary,
+            "tone": request.tone,
+            "writingStyle": request.writingStyle,
+            "setting": request.setting,
+            "pages": request.lengthInPages,
+            "words": request.lengthInPages * WORDS_PER_PAGE,
+            "key_points": key_points,
+        }
     
     def _build_first_chapter_prompt(self, request: GenerateChapterRequest) -> str:
         """Prompt especializado para o PRIMEIRO capítulo do livro."""
+        template = self.prompts.get("first_chapter", request.language)
+        return template.render(**self._chapter_slots(request, "first_chapter_key_points"))
+    
+    def _build_continuation_chapter_prompt(
+        self,
+        request: GenerateChapterRequest,
+        story_state: Optional[StoryState] = None
+    ) -> Tuple[str, str]:
+        """
+        Prompt especializado para capítulos de CONTINUAÇÃO.
         
-        # Pontos-chave (opcional)
-        key_points_section = ""
-        if request.keyPoints:
-            key_points_text = "\n".join([f"- {point}" for point in request.keyPoints])
-            key_points_section = f"\n## PONTOS-CHAVE A INCLUIR:\n{key_points_text}\n"
+        O contexto dos capítulos anteriores vem do estado incremental da
+        história e é limitado para que o prompt inteiro fique abaixo de
+        `max_input_tokens`.
         
-        prompt = f"""Você é um escritor profissional de ficção com décadas de experiência em criar aberturas memoráveis e envolventes.
-
-## 📚 CONTEXTO DO PROJETO:
-- **Título do Livro**: {request.projectTitle}
-- **Idioma**: {request.language}
-
-## 📖 CAPÍTULO A SER ESCRITO:
-- **Título**: {request.chapterTitle}
-- **Resumo**: {request.chapterSummary}
-
-## 🎨 PARÂMETROS CRIATIVOS:
-- **Tom**: {request.tone}
-- **Estilo de Escrita**: {request.writingStyle}
-- **Ambientação Principal**: {request.setting}
-- **Extensão**: Aproximadamente {request.lengthInPages} páginas (cerca de {request.lengthInPages * 250} palavras)
-{key_points_section}
-
-## ⚠️ INSTRUÇÕES CRÍTICAS - PRIMEIRO CAPÍTULO:
-
-### 🎯 Abertura Impactante
-Este é o **PRIMEIRO CAPÍTULO** do livro. Você deve:
-
-1. **GANCHAR O LEITOR nos primeiros parágrafos**
-   - Comece com ação, diálogo intrigante, ou imagem vívida
-   - Evite exposições longas ou descrições excessivas no início
-   - Crie curiosidade imediata
-
-2. **ESTABELEÇA a voz narrativa e o tom desde a primeira linha**
-   - O tom deve ser {request.tone} desde o início
-   - Mantenha consistência no estilo {request.writingStyle}
-
-3. **APRESENTE personagens de forma orgânica**
-   - Mostre, não conte (show, don't tell)
-   - Revele características através de ações e diálogos
-   - Use nomes completos na primeira menção
-
-4. **CONSTRUA o mundo gradualmente**
-   - Ambientação: {request.setting}
-   - Integre detalhes sensoriais (sons, cheiros, texturas)
-   - Não sobrecarregue com informação
-
-5. **CRIE tensão ou conflito cedo**
-   - Estabeleça stakes (o que está em jogo)
-   - Plante questões que o leitor quer ver respondidas
-   - Construa momentum narrativo
-
-6. **ESTRUTURA recomendada**:
-   - Primeiro terço: Gancho + apresentação do protagonista/cenário
-   - Meio: Desenvolvimento da situação inicial
-   - Final: Gancho para o próximo capítulo (cliffhanger leve ou promessa)
-
-7. **QUALIDADE da prosa**:
-   - Frases variadas (curtas e longas)
-   - Diálogos naturais e reveladores de personalidade
-   - Descrições vívidas mas econômicas
-   - Ritmo adequado ao tom {request.tone}
-
-8. **EXTENSÃO**: Escreva aproximadamente {request.lengthInPages * 250} palavras
-   - Não seja nem muito breve nem prolixo demais
-   - Cada parágrafo deve avançar a narrativa
-
-## 📝 FORMATO DE SAÍDA:
-
-Escreva APENAS o texto do capítulo, sem:
-- ❌ Título do capítulo
-- ❌ "Capítulo 1" ou numeração
-- ❌ Prefácio ou introdução meta-textual
-- ❌ Comentários sobre o texto
-- ❌ Notas de autor
-
-Apenas a narrativa pura em {request.language}.
-
----
-
-**Comece agora a escrever o primeiro capítulo de "{request.projectTitle}":**"""
-
-        return prompt
-    
-    def _build_continuation_chapter_prompt(self, request: GenerateChapterRequest) -> str:
-        """Prompt especializado para capítulos de CONTINUAÇÃO."""
+        Returns:
+            Prompt e seu início estável entre capítulos do projeto (até o fim
+            do digest), ou None se o template põe dados do capítulo antes dele
+        """
+        if story_state is None:
+            story_state = self._load_story_state(request)
         
-        # Contexto dos capítulos anteriores (otimizado)
-        previous_context = "\n\n## 📚 CAPÍTULOS ANTERIORES (CONTEXTO ESSENCIAL):\n\n"
-        previous_context += "⚠️ **ATENÇÃO**: Este capítulo deve continuar DIRETAMENTE da narrativa abaixo. Não ignore nada do que já foi estabelecido.\n\n"
+        template = self.prompts.get("continuation_chapter", request.language)
+        slots = self._chapter_slots(request)
         
-        for idx, chapter in enumerate(request.previousChapters, 1):
-            previous_context += f"### Capítulo {idx}: {chapter.title}\n\n"
-            previous_context += f"**Resumo estruturado:**\n{chapter.summary}\n\n"
-            
-            if chapter.generatedText:
-                # Extrai início e FIM (mais importante para continuidade)
-                text = chapter.generatedText
-                text_length = len(text)
-                
-                if text_length <= 2000:
-                    # Capítulo curto: inclui tudo
-                    previous_context += f"**Texto completo do capítulo:**\n{text}\n\n"
-                else:
-                    # Capítulo longo: primeiros 800 + últimos 1500 caracteres
-                    beginning = text[:800]
-                    ending = text[-1500:]
-                    previous_context += f"**Início do capítulo:**\n{beginning}...\n\n"
-                    previous_context += f"**🎯 FINAL DO CAPÍTULO (PONTO DE PARTIDA PARA CONTINUAÇÃO):**\n...{ending}\n\n"
-            
-            previous_context += "---\n\n"
-        
-        # Pontos-chave (opcional)
-        key_points_section = ""
-        if request.keyPoints:
-            key_points_text = "\n".join([f"- {point}" for point in request.keyPoints])
-            key_points_section = f"\n## 🎯 PONTOS-CHAVE A INCLUIR NESTE CAPÍTULO:\n{key_points_text}\n"
+        # Orçamento restante para o contexto dos capítulos anteriores
+        context_budget = self.max_input_tokens - self.backend.count_tokens(
+            template.render(previous_context="", **slots)
+        )
+        if context_budget <= 0:
+            raise ValueError(
+                f"Prompt excede o limite de {self.max_input_tokens} tokens de entrada"
+            )
         
-        prompt = f"""Você é um escritor profissional especializado em criar narrativas coesas com continuidade perfeita entre capítulos.
-
-## 📚 CONTEXTO DO PROJETO:
-- **Título do Livro**: {request.projectTitle}
-- **Idioma**: {request.language}
-
-## 📖 CAPÍTULO A SER ESCRITO (CONTINUAÇÃO):
-- **Título**: {request.chapterTitle}
-- **Resumo**: {request.chapterSummary}
-
-## 🎨 PARÂMETROS CRIATIVOS:
-- **Tom**: {request.tone}
-- **Estilo de Escrita**: {request.writingStyle}
-- **Ambientação Principal**: {request.setting}
-- **Extensão**: Aproximadamente {request.lengthInPages} páginas (cerca de {request.lengthInPages * 250} palavras)
-{key_points_section}{previous_context}
-
-## ⚠️ INSTRUÇÕES CRÍTICAS - CAPÍTULO DE CONTINUAÇÃO:
-
-### 🔗 CONTINUIDADE PERFEITA (PRIORIDADE MÁXIMA)
-
-1. **COMECE exatamente onde o capítulo anterior terminou**
-   - Analise cuidadosamente o FINAL do último capítulo (destacado acima)
-   - O primeiro parágrafo DEVE conectar-se diretamente à última cena
-   - Mantenha mesma linha temporal (sem saltos não explicados)
-   - Preserve estado emocional e físico dos personagens
-
-2. **CONSISTÊNCIA ABSOLUTA**
-   - **Personagens**: Use sempre os mesmos nomes e características
-   - **Locais**: Mantenha geografia e ambientações consistentes
-   - **Eventos**: Não contradiga o que já aconteceu
-   - **Tom e estilo**: Continue com tom {request.tone} e estilo {request.writingStyle}
-
-3. **TRANSIÇÃO SUAVE**
-   - Primeira frase deve ser ponte natural do capítulo anterior
-   - Evite recapitulações longas ou repetitivas
-   - Se mudar de cena/tempo, faça transição clara e justificada
-
-4. **DESENVOLVIMENTO NARRATIVO**
-   - Avance a trama de forma orgânica
-   - Aprofunde personagens já estabelecidos
-   - Introduza novos elementos com naturalidade
-   - Mantenha ou aumente tensão/stakes
-
-5. **DIÁLOGOS E AÇÕES**
-   - Diálogos naturais e coerentes com personalidades estabelecidas
-   - Ações que fazem sentido no contexto
-   - Descrições sensoriais ricas mas econômicas
-
-6. **RITMO E ESTRUTURA**
-   - Início: Transição do capítulo anterior
-   - Meio: Desenvolvimento de {request.chapterSummary}
-   - Final: Gancho interessante para próximo capítulo
-
-7. **QUALIDADE DA PROSA**
-   - Variedade de estrutura de frases
-   - Equilíbrio entre ação, diálogo e descrição
-   - Prose vívida e envolvente
-   - Ritmo adequado ao tom {request.tone}
-
-8. **EXTENSÃO**: Aproximadamente {request.lengthInPages * 250} palavras
-   - Desenvolva completamente as cenas
-   - Não apresse nem prolongue desnecessariamente
-
-### 🎯 CHECKLIST MENTAL ANTES DE ESCREVER:
-- [ ] Li e entendi como o capítulo anterior terminou?
-- [ ] Meu primeiro parágrafo conecta-se naturalmente ao final anterior?
-- [ ] Estou mantendo nomes, locais e detalhes consistentes?
-- [ ] O tom e estilo estão alinhados com o resto do livro?
-
-## 📝 FORMATO DE SAÍDA:
-
-Escreva APENAS o texto do capítulo, sem:
-- ❌ Título ou numeração
-- ❌ Recapitulação explícita ("No capítulo anterior...")
-- ❌ Comentários meta-textuais
-- ❌ Notas de rodapé
-
-Apenas a narrativa pura e contínua em {request.language}.
-
----
-
-**Continue a história de "{request.projectTitle}" agora:**"""
-
-        return prompt
-    
-    def _build_creative_prompt(self, request: CreativeSuggestionsRequest) -> str:
-        """Constrói o prompt aprimorado para sugestões criativas."""
-        
-        type_details = {
-            "title": {
-                "instruction": "títulos criativos e cativantes",
-                "guidelines": """- Seja memorável e intrigante
-- Evite clichês óbvios
-- Capture a essência do gênero e tom
-- Use linguagem evocativa
-- Considere metáforas e simbolismo quando apropriado"""
-            },
-            "character": {
-                "instruction": "nomes de personagens únicos e memoráveis",
-                "guidelines": """- Considere origem cultural/étnica apropriada ao contexto
-- Nome deve soar natural mas distintivo
-- Reflita personalidade ou papel do personagem
-- Evite nomes genéricos ou muito comuns
-- Inclua possíveis apelidos quando relevante"""
-            },
-            "plot": {
-                "instruction": "ideias de enredo originais e envolventes",
-                "guidelines": """- Apresente conflito claro e interessante
-- Inclua gancho emocional ou intelectual
-- Considere arcos narrativos completos
-- Pense em stakes (o que está em jogo)
-- Sugira potencial para desenvolvimento"""
-            },
-            "setting": {
-                "instruction": "ambientações ricas e imersivas",
-                "guidelines": """- Descreva elementos sensoriais (visual, som, cheiro)
-- Considere aspectos culturais e sociais
-- Pense em como o local afeta a história
-- Inclua detalhes únicos e memoráveis
-- Sugira atmosfera e mood"""
-            }
-        }
+        stable, rest = "", ""
+        if story_state is not None:
+            stable, rest = split_previous_context(story_state, context_budget)
         
-        details = type_details.get(request.type, {
-            "instruction": "sugestões criativas",
-            "guidelines": "- Seja criativo e original"
-        })
+        prompt = template.render(previous_context=stable + rest, **slots)
+        # Na v1 os dados do capítulo vêm antes do contexto: o início muda a cada capítulo
+        if not template.slots_before("previous_context") <= _PROJECT_SLOTS:
+            return prompt, None
+        return prompt, template.render_until("previous_context", previous_context=stable, **slots)
+    
+    def _creative_template(self) -> str:
+        return "creative_json" if self.json_mode else "creative"
+    
+    def _build_creative_prompt(
+        self,
+        request: CreativeSuggestionsRequest,
+        count: Optional[int] = None,
+        exclude: Iterable[CreativeSuggestion] = ()
+    ) -> str:
+        """
+        Constrói o prompt aprimorado para sugestões criativas.
         
-        prompt = f"""Você é um consultor criativo de elite especializado em desenvolvimento de histórias e narrativas.
-
-## 📖 CONTEXTO DO PROJETO:
-{request.context}
-
-## 🎨 PARÂMETROS CRIATIVOS:
-- **Gênero**: {request.genre}
-- **Tom desejado**: {request.tone}
-- **Tipo de sugestão**: {request.type}
-
-## 🎯 SUA TAREFA:
-Gere {request.count} {details["instruction"]} que sejam:
-- **Originais** e não-clichês
-- **Apropriados** para o gênero {request.genre}
-- **Alinhados** com o tom {request.tone}
-- **Bem desenvolvidos** com contexto suficiente
-
-## 📋 DIRETRIZES ESPECÍFICAS:
-{details["guidelines"]}
-
-## 📝 FORMATO DE RESPOSTA (OBRIGATÓRIO):
-
-Para cada sugestão, use este formato exato:
-
-[SUGESTÃO 1]
-Texto: [Sua sugestão principal aqui]
-Descrição: [Explicação breve de 1-2 frases sobre por que esta sugestão funciona ou detalhes adicionais relevantes]
-
-[SUGESTÃO 2]
-Texto: [Sua sugestão principal aqui]
-Descrição: [Explicação breve]
-
-... (continue até {request.count} sugestões)
-
-## ⚠️ IMPORTANTE:
-- Seja CRIATIVO e ORIGINAL - evite o óbvio
-- Mantenha coerência com gênero {request.genre} e tom {request.tone}
-- Cada sugestão deve ser única e distinta das outras
-- Descrições devem agregar valor real
-
----
-
-**Gere {request.count} sugestões agora:**"""
-
-        return prompt
+        Args:
+            request: Dados da requisição
+            count: Sugestões a gerar (None = `request.count`)
+            exclude: Sugestões já obtidas, que o modelo não deve repetir
+        """
+        details = self.prompts.creative_type(request.type)
+        exclude_section = ""
+        items = "\n".join(f"- {suggestion.text}" for suggestion in exclude)
+        if items:
+            exclude_section = self.prompts.get("creative_exclude").render(items=items)
+        return self.prompts.get(self._creative_template()).render(
+            context=request.context,
+            genre=request.genre,
+            tone=request.tone,
+            type=request.type,
+            count=count or request.count,
+            instruction=details["instruction"],
+            guidelines=details["guidelines"],
+            exclude=exclude_section
+        )
     
     def _parse_creative_suggestions(self, text: str, count: int) -> List[CreativeSuggestion]:
         """Parseia o texto gerado em sugestões estruturadas."""
@@ -426,61 +971,458 @@ Descrição: [Explicação breve]
             Response com o texto gerado e metadados
         """
         logger.info(f"Gerando capítulo: {request.chapterTitle}")
+        endpoint = "generate_chapter"
         
-        prompt = self._build_chapter_prompt(request)
+        with metrics.PROMPT_BUILD_SECONDS.time(**self._labels(endpoint)):
+            prompt, context = await self._store_io(self._build_chapter_prompt_parts, request)
+        expected_tokens = self._expected_chapter_tokens(request)
+        route = self._route(endpoint, prompt, expected_tokens)
         
-        try:
-            response = self.model.generate_content(prompt)
+        segment_parts = self._segment_count(request, route)
+        if segment_parts > 1:
+            if request.candidates > 1:
+                logger.info("Capítulo em partes: gerando uma única versão (candidates ignorado)")
+            return await self._generate_chapter_segmented(request, segment_parts, endpoint, route)
+        
+        self._preflight(prompt, route, expected_tokens)
+        deadline = self._chapter_deadline(request)
+        
+        async def generate_version() -> Tuple[str, TokenUsage]:
+            response = await self._generate_content(
+                prompt,
+                deadline,
+                endpoint=endpoint,
+                context=context,
+                route=route
+            )
             
             if not response.text:
                 raise ValueError("Resposta vazia da API")
             
-            # Calcula tokens usados (aproximado)
-            tokens_used = len(response.text.split())
+            usage = usage_from_metadata(
+                response.usage_metadata,
+                prompt,
+                response.text
+            )
+            self._record_usage(endpoint, usage, route)
+            return response.text, usage
+        
+        try:
+            versions = await _gather_candidates(generate_version() for _ in range(request.candidates))
+            texts = [text for text, _ in versions]
+            usage = sum_usage(version_usage for _, version_usage in versions)
+            
+            # Melhor versão primeiro; as demais vão em alternatives
+            order = rank_chapters(texts, request.lengthInPages)
+            text = texts[order[0]]
+            
+            metadata = self._build_metadata(route)
             
-            metadata = GenerationMetadata(
-                model=self.model_name,
-                createdAt=datetime.utcnow(),
-                temperature=self.temperature,
-                maxTokens=self.max_output_tokens
+            versions_note = f" ({len(texts)} versões)" if len(texts) > 1 else ""
+            logger.info(
+                f"Capítulo gerado com sucesso{versions_note}. Tokens: {usage.totalTokens} "
+                f"(prompt: {usage.promptTokens}, resposta: {usage.completionTokens})"
             )
             
-            logger.info(f"Capítulo gerado com sucesso. Tokens: {tokens_used}")
+            await self._persist_chapter(request, text)
+            self._prefetch_summary(request, text)
             
             return GenerateChapterResponse(
-                text=response.text,
-                tokensUsed=tokens_used,
-                metadata=metadata
+                text=text,
+                tokensUsed=usage.totalTokens,
+                usage=usage,
+                metadata=metadata,
+                alternatives=[texts[idx] for idx in order[1:]]
             )
             
         except Exception as e:
             logger.error(f"Erro ao gerar capítulo: {e}")
+            self._record_error(endpoint, e)
+            raise
+    
+    async def stream_chapter(
+        self,
+        request: GenerateChapterRequest
+    ) -> AsyncIterator[Union[str, GenerateChapterStreamEnd]]:
+        """
+        Gera um capítulo em streaming.
+        
+        Args:
+            request: Dados da requisição
+            
+        Yields:
+            Pedaços de texto (str) à medida que chegam do modelo e, ao final,
+            um GenerateChapterStreamEnd com tokens e metadados
+        """
+        logger.info(f"Gerando capítulo (streaming): {request.chapterTitle}")
+        endpoint = "stream_chapter"
+        
+        with metrics.PROMPT_BUILD_SECONDS.time(**self._labels(endpoint)):
+            prompt, context = await self._store_io(self._build_chapter_prompt_parts, request)
+        expected_tokens = self._expected_chapter_tokens(request)
+        route = self._route(endpoint, prompt, expected_tokens)
+        
+        segment_parts = self._segment_count(request, route)
+        if segment_parts > 1:
+            async for item in self._stream_chapter_segmented(request, segment_parts, endpoint, route):
+                yield item
+            return
+        
+        self._preflight(prompt, route, expected_tokens)
+        
+        try:
+            parts: List[str] = []
+            usage_metadata = None
+            async for chunk in self._stream_content(
+                prompt,
+                self._chapter_deadline(request),
+                endpoint=endpoint,
+                context=context,
+                route=route
+            ):
+                parts.append(chunk.text)
+                usage_metadata = chunk.usage_metadata or usage_metadata
+                yield chunk.text
+            
+            full_text = "".join(parts)
+            if not full_text:
+                raise ValueError("Resposta vazia da API")
+            
+            usage = usage_from_metadata(usage_metadata, prompt, full_text)
+            self._record_usage(endpoint, usage, route)
+            
+            logger.info(
+                f"Capítulo transmitido com sucesso. Tokens: {usage.totalTokens} "
+                f"(prompt: {usage.promptTokens}, resposta: {usage.completionTokens})"
+            )
+            
+            await self._persist_chapter(request, full_text)
+            self._prefetch_summary(request, full_text)
+            
+            yield GenerateChapterStreamEnd(
+                tokensUsed=usage.totalTokens,
+                usage=usage,
+                metadata=self._build_metadata(route)
+            )
+            
+        except Exception as e:
+            logger.error(f"Erro ao gerar capítulo em streaming: {e}")
+            self._record_error(endpoint, e)
+            raise
+    
+    def _segment_tokens(self, route: ModelRoute) -> int:
+        """Saída máxima de cada parte: o limite configurado, sem passar o da rota."""
+        return min(self.chapter_segment_tokens, route.max_output_tokens)
+    
+    def _segment_count(self, request: GenerateChapterRequest, route: ModelRoute) -> int:
+        """Partes em que o capítulo é gerado na rota escolhida (1 = chamada única)."""
+        return segment_count(self._expected_chapter_tokens(request), self._segment_tokens(route))
+    
+    async def _plan_segments(
+        self,
+        request: GenerateChapterRequest,
+        parts: int,
+        endpoint: str
+    ) -> Tuple[List[str], Optional[TokenUsage]]:
+        """
+        Cenas de cada parte do capítulo (já formatadas em lista).
+        
+        O plano vem de uma chamada curta no modo JSON; sem modo JSON, ou com
+        um plano com menos cenas que partes, os pontos-chave são divididos
+        entre as partes.
+        
+        Returns:
+            Cenas de cada parte e os tokens do plano (None sem chamada ao modelo)
+        """
+        groups = None
+        usage = None
+        if self.json_mode:
+            prompt = self.prompts.get("chapter_plan", request.language).render(
+                projectTitle=request.projectTitle,
+                chapterTitle=request.chapterTitle,
+                chapterSummary=request.chapterSummary,
+                key_points=self._chapter_slots(request)["key_points"],
+                words=request.lengthInPages * WORDS_PER_PAGE,
+                parts=parts,
+                language=request.language
+            )
+            text, usage = await self._generate_cached(
+                prompt,
+                endpoint=endpoint,
+                response_schema=PLAN_SCHEMA
+            )
+            try:
+                scenes = parse_plan_json(text)
+            except ValueError as e:
+                logger.warning(f"Plano de cenas inválido: {e}")
+                scenes = []
+            if len(scenes) >= parts:
+                groups = distribute(scenes, parts)
+        
+        if groups is None:
+            groups = distribute(request.keyPoints or [], parts)
+        
+        return [
+            "\n".join(f"- {item}" for item in group) or f"- {request.chapterSummary}"
+            for group in groups
+        ], usage
+    
+    async def _prepare_segments(
+        self,
+        request: GenerateChapterRequest,
+        parts: int,
+        endpoint: str
+    ) -> Tuple[str, ContextPrefix, List[str], Optional[TokenUsage], int]:
+        """
+        Prompt base (com a extensão de uma parte), plano de cenas e palavras por parte.
+        
+        O plano é pedido ao modelo enquanto o prompt base (estado da história
+        e contexto dos capítulos anteriores) é montado em outra thread.
+        """
+        segment_request = request.model_copy(
+            update={"lengthInPages": -(-request.lengthInPages // parts)}
+        )
+        plan = asyncio.ensure_future(self._plan_segments(request, parts, endpoint))
+        try:
+            with metrics.PROMPT_BUILD_SECONDS.time(**self._labels(endpoint)):
+                base_prompt, context = await asyncio.to_thread(
+                    self._build_chapter_prompt_parts, segment_request
+                )
+            scenes, plan_usage = await plan
+        except BaseException:
+            plan.cancel()
+            raise
+        
+        logger.info(
+            f"Capítulo longo ({request.lengthInPages} páginas): gerando em {parts} partes "
+            f"de ~{segment_request.lengthInPages} páginas"
+        )
+        return base_prompt, context, scenes, plan_usage, segment_request.lengthInPages
+    
+    def _segment_prompt(
+        self,
+        request: GenerateChapterRequest,
+        base_prompt: str,
+        scenes: str,
+        part: int,
+        parts: int,
+        pages: int,
+        previous_text: str
+    ) -> str:
+        """Prompt de uma parte: prompt base + cenas da parte + final do texto já gerado."""
+        tail_section = ""
+        if previous_text:
+            tail_section = self.prompts.get("chapter_segment_tail", request.language).render(
+                text=tail(previous_text)
+            )
+        name = "chapter_segment_final" if part == parts else "chapter_segment"
+        return base_prompt + self.prompts.get(name, request.language).render(
+            part=part,
+            parts=parts,
+            words=pages * WORDS_PER_PAGE,
+            scenes=scenes,
+            previous_text=tail_section
+        )
+    
+    async def _generate_chapter_segmented(
+        self,
+        request: GenerateChapterRequest,
+        parts: int,
+        endpoint: str,
+        route: ModelRoute
+    ) -> GenerateChapterResponse:
+        """
+        Gera um capítulo longo em partes consecutivas e une os textos.
+        
+        Cada parte recebe o final do texto já gerado; `segments` traz os
+        tokens de cada parte e `usage` soma as partes e o plano. Todas as
+        partes usam `route` (escolhida pelo capítulo inteiro), para manter a
+        voz do texto.
+        """
+        try:
+            base_prompt, context, scenes, plan_usage, pages = await self._prepare_segments(
+                request, parts, endpoint
+            )
+            deadline = self.call_timeout + pages * self.call_timeout_per_page
+            
+            texts: List[str] = []
+            segments: List[TokenUsage] = []
+            for part in range(1, parts + 1):
+                prompt = self._segment_prompt(
+                    request, base_prompt, scenes[part - 1], part, parts, pages, "\n\n".join(texts)
+                )
+                self._preflight(prompt, route, self._segment_tokens(route))
+                response = await self._generate_content(
+                    prompt,
+                    deadline,
+                    endpoint=endpoint,
+                    context=context,
+                    route=route
+                )
+                
+                if not response.text:
+                    raise ValueError("Resposta vazia da API")
+                
+                usage = usage_from_metadata(response.usage_metadata, prompt, response.text)
+                self._record_usage(endpoint, usage, route)
+                segments.append(usage)
+                texts.append(response.text.strip())
+                logger.info(f"Parte {part}/{parts} gerada. Tokens: {usage.totalTokens}")
+            
+            text = "\n\n".join(texts)
+            usage = sum_usage([plan_usage, *segments] if plan_usage else segments)
+            
+            logger.info(
+                f"Capítulo gerado com sucesso em {parts} partes. Tokens: {usage.totalTokens} "
+                f"(prompt: {usage.promptTokens}, resposta: {usage.completionTokens})"
+            )
+            
+            await self._persist_chapter(request, text)
+            self._prefetch_summary(request, text)
+            
+            return GenerateChapterResponse(
+                text=text,
+                tokensUsed=usage.totalTokens,
+                usage=usage,
+                metadata=self._build_metadata(route),
+                segments=segments
+            )
+            
+        except Exception as e:
+            logger.error(f"Erro ao gerar capítulo em partes: {e}")
+            self._record_error(endpoint, e)
+            raise
+    
+    async def _stream_chapter_segmented(
+        self,
+        request: GenerateChapterRequest,
+        parts: int,
+        endpoint: str,
+        route: ModelRoute
+    ) -> AsyncIterator[Union[str, GenerateChapterStreamEnd]]:
+        """Versão em streaming de `_generate_chapter_segmented` (partes em sequência)."""
+        try:
+            base_prompt, context, scenes, plan_usage, pages = await self._prepare_segments(
+                request, parts, endpoint
+            )
+            deadline = self.call_timeout + pages * self.call_timeout_per_page
+            
+            texts: List[str] = []
+            segments: List[TokenUsage] = []
+            for part in range(1, parts + 1):
+                prompt = self._segment_prompt(
+                    request, base_prompt, scenes[part - 1], part, parts, pages, "\n\n".join(texts)
+                )
+                self._preflight(prompt, route, self._segment_tokens(route))
+                
+                chunks: List[str] = []
+                usage_metadata = None
+                async for chunk in self._stream_content(
+                    prompt,
+                    deadline,
+                    endpoint=endpoint,
+                    context=context,
+                    route=route
+                ):
+                    text = chunk.text
+                    if not chunks:
+                        # Separa as partes por um parágrafo, como no texto unido
+                        text = text.lstrip()
+                        if texts:
+                            text = "\n\n" + text
+                    chunks.append(chunk.text)
+                    usage_metadata = chunk.usage_metadata or usage_metadata
+                    yield text
+                
+                part_text = "".join(chunks)
+                if not part_text:
+                    raise ValueError("Resposta vazia da API")
+                
+                usage = usage_from_metadata(usage_metadata, prompt, part_text)
+                self._record_usage(endpoint, usage, route)
+                segments.append(usage)
+                texts.append(part_text.strip())
+                logger.info(f"Parte {part}/{parts} transmitida. Tokens: {usage.totalTokens}")
+            
+            usage = sum_usage([plan_usage, *segments] if plan_usage else segments)
+            
+            logger.info(
+                f"Capítulo transmitido com sucesso em {parts} partes. Tokens: {usage.totalTokens} "
+                f"(prompt: {usage.promptTokens}, resposta: {usage.completionTokens})"
+            )
+            
+            text = "\n\n".join(texts)
+            await self._persist_chapter(request, text)
+            self._prefetch_summary(request, text)
+            
+            yield GenerateChapterStreamEnd(
+                tokensUsed=usage.totalTokens,
+                usage=usage,
+                metadata=self._build_metadata(route),
+                segments=segments
+            )
+            
+        except Exception as e:
+            logger.error(f"Erro ao gerar capítulo em partes (streaming): {e}")
+            self._record_error(endpoint, e)
             raise
     
     async def generate_creative_suggestions(
         self, 
-        request: CreativeSuggestionsRequest
+        request: CreativeSuggestionsRequest,
+        bypass_cache: bool = False
     ) -> CreativeSuggestionsResponse:
         """
         Gera sugestões criativas.
         
         Args:
             request: Dados da requisição
+            bypass_cache: Força nova geração mesmo com resposta em cache
             
         Returns:
             Response com as sugestões
         """
         logger.info(f"Gerando sugestões criativas do tipo: {request.type}")
-        
-        prompt = self._build_creative_prompt(request)
+        endpoint = "creative_suggestions"
         
         try:
-            response = self.model.generate_content(prompt)
+            history = self.suggestion_history.get(request.projectId, request.type)
+            # As já servidas vão no prompt (e, com ele, na chave do cache de
+            # respostas): uma resposta em cache nunca é de um histórico anterior
+            recent_history = history[-SUGGESTION_HISTORY_PROMPT_ITEMS:]
             
-            if not response.text:
-                raise ValueError("Resposta vazia da API")
+            # Cada versão é uma lista completa; a união sem quase-duplicatas (nem
+            # sugestões já servidas no projeto) vai até count * candidates itens,
+            # e o que passa de count vira alternatives
+            batches = await _gather_candidates(
+                self._generate_suggestions(request, request.count, recent_history, bypass_cache, variant=idx)
+                for idx in range(request.candidates)
+            )
+            pool = merge_suggestions(
+                [],
+                chain.from_iterable(batches),
+                request.count * request.candidates,
+                exclude=history
+            )
+            suggestions, alternatives = pool[:request.count], pool[request.count:]
             
-            suggestions = self._parse_creative_suggestions(response.text, request.count)
+            # Completa apenas as sugestões que faltaram, sem refazer as já obtidas,
+            # enquanto cada chamada extra trouxer alguma sugestão nova
+            for _ in range(SUGGESTION_TOPUP_ATTEMPTS):
+                missing = request.count - len(suggestions)
+                if missing <= 0:
+                    break
+                logger.info(f"Gerado apenas {len(suggestions)} de {request.count} sugestões; pedindo mais {missing}")
+                extra = await self._generate_suggestions(
+                    request,
+                    missing,
+                    [*suggestions, *recent_history],
+                    bypass_cache
+                )
+                merged = merge_suggestions(suggestions, extra, request.count, exclude=history)
+                if len(merged) == len(suggestions):
+                    break
+                suggestions = merged
             
             # Garante que temos o número de sugestões pedido
             if len(suggestions) < request.count:
@@ -488,190 +1430,385 @@ Descrição: [Explicação breve]
             
             logger.info(f"Sugestões criativas geradas: {len(suggestions)}")
             
-            return CreativeSuggestionsResponse(suggestions=suggestions)
+            self.suggestion_history.add(request.projectId, request.type, [*suggestions, *alternatives])
+            
+            return CreativeSuggestionsResponse(suggestions=suggestions, alternatives=alternatives)
             
         except Exception as e:
             logger.error(f"Erro ao gerar sugestões criativas: {e}")
+            self._record_error(endpoint, e)
             raise
     
+    async def _generate_suggestions(
+        self,
+        request: CreativeSuggestionsRequest,
+        count: int,
+        exclude: List[CreativeSuggestion],
+        bypass_cache: bool,
+        variant: int = 0
+    ) -> List[CreativeSuggestion]:
+        """Uma chamada de sugestões (no modo JSON, quando disponível)."""
+        endpoint = "creative_suggestions"
+        labels = self._labels(endpoint)
+        
+        with metrics.PROMPT_BUILD_SECONDS.time(**labels):
+            prompt = self._build_creative_prompt(request, count, exclude)
+        
+        text, _ = await self._generate_cached(
+            prompt,
+            bypass_cache=bypass_cache,
+            endpoint=endpoint,
+            response_schema=SUGGESTIONS_SCHEMA if self.json_mode else None,
+            variant=variant
+        )
+        
+        with metrics.PARSE_SECONDS.time(**labels):
+            if not self.json_mode:
+                return self._parse_creative_suggestions(text, count)
+            try:
+                return parse_suggestions_json(text)
+            except ValueError as e:
+                logger.warning(f"Sugestões em JSON inválidas: {e}")
+                return []
+    
     async def summarize_chapter(
         self, 
-        request
+        request,
+        bypass_cache: bool = False
     ):
         """
         Gera resumo completo de capítulo focado em continuidade narrativa.
         
+        O resumo é função pura do texto, então fica em cache sem expiração.
+        
         Args:
             request: SummarizeRequest com o texto do capítulo
+            bypass_cache: Força nova geração mesmo com resumo em cache
             
         Returns:
             SummarizeResponse com resumo estruturado em campo único
         """
         logger.info(f"Gerando resumo de capítulo focado em continuidade")
-        
-        prompt = self._build_summarize_prompt(request)
+        endpoint = "summarize"
         
         try:
-            response = self.model.generate_content(prompt)
-            
-            if not response.text:
-                raise ValueError("Resposta vazia da API")
+            prefetched = None if bypass_cache else await self._prefetched_summary(request)
+            if prefetched is not None:
+                summary_text, usage = prefetched
+                structured = None
+                if request.structured:
+                    with metrics.PARSE_SECONDS.time(**self._labels(endpoint)):
+                        structured = self._parse_summary_response(summary_text)
+                logger.info("Resumo servido do pré-cálculo feito após a geração")
+            else:
+                summary_text, structured, usage = await self._summarize_text(request, bypass_cache, endpoint)
+                logger.info(f"Resumo gerado com sucesso. Tokens: {usage.totalTokens}")
             
-            # Usa o texto completo como resumo estruturado
-            summary_text = response.text.strip()
+            await self._save_summary(request, summary_text)
             
-            # Calcula tokens usados (aproximado)
-            tokens_used = len(response.text.split())
-            
-            logger.info(f"Resumo gerado com sucesso. Tokens: {tokens_used}")
-            
-            from src.models import SummarizeResponse
             return SummarizeResponse(
                 summary=summary_text,
-                tokensUsed=tokens_used
+                structured=structured,
+                tokensUsed=usage.totalTokens,
+                usage=usage
             )
             
         except Exception as e:
             logger.error(f"Erro ao gerar resumo: {e}")
+            self._record_error(endpoint, e)
             raise
     
-    def _build_summarize_prompt(self, request) -> str:
-        """Constrói prompt para resumo focado em continuidade."""
+    async def _summarize_text(
+        self,
+        request: SummarizeRequest,
+        bypass_cache: bool,
+        endpoint: str
+    ) -> Tuple[str, Optional[ChapterSummary], TokenUsage]:
+        """Chama o modelo para resumir o capítulo (em trechos, no modo JSON ou em texto)."""
+        chunked = (
+            self.summarize_chunk_tokens > 0
+            and self.backend.count_tokens(request.chapterText) > self.summarize_chunk_tokens
+        )
+        structured = None
+        if chunked:
+            text, usage = await self._summarize_chunked(request, bypass_cache, endpoint)
+        elif request.structured and self.json_mode:
+            with metrics.PROMPT_BUILD_SECONDS.time(**self._labels(endpoint)):
+                prompt = self._build_summarize_prompt(request, "summarize_json")
+            text, usage = await self._generate_cached(
+                prompt,
+                bypass_cache=bypass_cache,
+                cache_ttl=None,
+                endpoint=endpoint,
+                response_schema=SUMMARY_SCHEMA
+            )
+            with metrics.PARSE_SECONDS.time(**self._labels(endpoint)):
+                structured = self._parse_summary_response(text)
+                # Mesmo formato de texto das respostas sem modo JSON
+                text = render_summary_text(structured)
+        else:
+            with metrics.PROMPT_BUILD_SECONDS.time(**self._labels(endpoint)):
+                prompt = self._build_summarize_prompt(request)
+            text, usage = await self._generate_cached(
+                prompt,
+                bypass_cache=bypass_cache,
+                cache_ttl=None,
+                endpoint=endpoint
+            )
         
-        title_context = f"\n**Título do Capítulo:** {request.chapterTitle}\n" if request.chapterTitle else ""
+        # Usa o texto completo como resumo estruturado
+        summary_text = text.strip()
+        if request.structured and structured is None:
+            with metrics.PARSE_SECONDS.time(**self._labels(endpoint)):
+                structured = self._parse_summary_response(summary_text)
+        return summary_text, structured, usage
+    
+    async def _save_summary(self, request: SummarizeRequest, summary_text: str) -> None:
+        """Salva o resumo no capítulo do projeto, se o pedido indicar um."""
+        if self.project_store is None or not request.projectId or not request.chapterId:
+            return
+        saved = await self.project_store.run(
+            self.project_store.save_summary, request.projectId, request.chapterId, summary_text
+        )
+        if saved is None:
+            logger.warning(
+                f"Resumo não salvo: capítulo {request.chapterId} não existe no projeto {request.projectId}"
+            )
+        else:
+            self._invalidate_project_context(request.projectId, request.chapterId)
+    
+    def _summary_key(self, chapter_text: str, chapter_title: Optional[str], language: str) -> str:
+        # Espaços normalizados: o texto remontado dos chunks do streaming pode
+        # diferir do unido no servidor apenas nas quebras entre partes
+        return make_summary_key(
+            " ".join(chapter_text.split()), chapter_title, language, self.prompts.version
+        )
+    
+    def _prefetch_summary(self, request: GenerateChapterRequest, text: str) -> None:
+        """
+        Inicia em segundo plano o resumo do capítulo recém-gerado (prefetchSummary).
         
-        prompt = f"""Você é um assistente especializado em análise literária e continuidade narrativa.
-
-Sua tarefa é criar um resumo ESTRUTURADO do capítulo abaixo, focando em informações essenciais para manter CONTINUIDADE narrativa em capítulos futuros.
-{title_context}
-## TEXTO DO CAPÍTULO:
-{request.chapterText}
-
----
-
-## INSTRUÇÕES:
-
-Analise o texto e extraia:
-
-1. **RESUMO NARRATIVO** (3-5 parágrafos):
-   - Resuma os eventos principais de forma cronológica
-   - Foque em AÇÕES e MUDANÇAS de estado
-   - Destaque o INÍCIO e o FINAL do capítulo (crucial para continuidade)
-   - Mantenha tom objetivo mas capte a essência da narrativa
-
-2. **PERSONAGENS** (lista):
-   - Liste TODOS os personagens mencionados
-   - Inclua nome completo e breve descrição/papel
-   - Exemplo: "João Silva (protagonista, detetive)", "Maria (testemunha)"
-
-3. **AMBIENTAÇÕES** (lista):
-   - Liste TODOS os locais/cenários mencionados
-   - Seja específico: "Café Central da cidade", não apenas "café"
-   - Inclua detalhes relevantes: "Floresta escura ao norte da vila"
-
-4. **EVENTOS-CHAVE** (lista ordenada):
-   - Liste os 3-7 eventos mais importantes do capítulo
-   - Em ordem cronológica
-   - Foque em eventos que afetam a trama
-
-5. **ESTADO FINAL** (1-2 parágrafos):
-   - Como o capítulo TERMINA? (CRUCIAL para próximo capítulo)
-   - Onde estão os personagens principais?
-   - Qual o estado emocional/físico deles?
-   - Qual a situação/tensão narrativa ao final?
-   - O que está prestes a acontecer?
-
----
-
-## FORMATO DE RESPOSTA (use exatamente este formato):
-
-[RESUMO]
-(Seu resumo narrativo aqui em 3-5 parágrafos)
-
-[PERSONAGENS]
-- Nome 1 (descrição/papel)
-- Nome 2 (descrição/papel)
-- Nome 3 (descrição/papel)
-
-[AMBIENTAÇÕES]
-- Local 1 (detalhes)
-- Local 2 (detalhes)
-
-[EVENTOS-CHAVE]
-1. Primeiro evento importante
-2. Segundo evento importante
-3. Terceiro evento importante
-
-[ESTADO FINAL]
-(Descrição detalhada de como o capítulo termina - 1-2 parágrafos)
-
----
-
-Responda em {request.language}. Seja PRECISO e DETALHADO - essas informações serão usadas para manter continuidade perfeita no próximo capítulo."""
-
-        return prompt
+        O resultado fica no cache pelo hash do texto e do título; o /summarize
+        seguinte do mesmo texto e título o recebe sem chamar o modelo (ou
+        aguarda o pré-cálculo em andamento).
+        """
+        if not request.prefetchSummary:
+            return
+        if self.cache is None:
+            logger.warning("prefetchSummary ignorado: cache de respostas desabilitado")
+            return
+        
+        key = self._summary_key(text, request.chapterTitle, request.language)
+        if key in self._summary_prefetches:
+            return
+        try:
+            summary_request = SummarizeRequest(
+                chapterText=text,
+                chapterTitle=request.chapterTitle,
+                language=request.language,
+                projectId=request.projectId,
+                chapterId=request.chapterId,
+                structured=True
+            )
+        except ValueError as e:
+            logger.warning(f"prefetchSummary ignorado: {e}")
+            return
+        
+        task = asyncio.create_task(self._run_summary_prefetch(summary_request, key))
+        self._summary_prefetches[key] = task
+        task.add_done_callback(lambda done: self._finish_summary_prefetch(key, done))
+        metrics.SUMMARY_PREFETCH_TOTAL.inc(result="started")
+    
+    async def _run_summary_prefetch(self, request: SummarizeRequest, key: str) -> Tuple[str, TokenUsage]:
+        summary_text, _, usage = await self._summarize_text(request, False, "summarize")
+        await self.cache.set(key, {"summary": summary_text, "usage": usage.model_dump()}, ttl=None)
+        await self._save_summary(request, summary_text)
+        logger.info(f"Resumo pré-calculado. Tokens: {usage.totalTokens}")
+        return summary_text, usage
     
-    def _parse_summary_response(self, response_text: str) -> dict:
-        """Parse da resposta estruturada do resumo."""
+    def _finish_summary_prefetch(self, key: str, task: asyncio.Task) -> None:
+        self._summary_prefetches.pop(key, None)
+        if task.cancelled():
+            return
+        error = task.exception()
+        if error is not None:
+            logger.warning(f"Falha no resumo pré-calculado: {error}")
+            metrics.SUMMARY_PREFETCH_TOTAL.inc(result="error")
+    
+    async def _prefetched_summary(self, request: SummarizeRequest) -> Optional[Tuple[str, TokenUsage]]:
+        """Resumo pré-calculado do mesmo texto (aguarda o que estiver em andamento)."""
+        if self.cache is None:
+            return None
+        key = self._summary_key(request.chapterText, request.chapterTitle, request.language)
         
-        result = {
-            "summary": "",
-            "characters": [],
-            "settings": [],
-            "keyEvents": [],
-            "endingState": ""
-        }
+        task = self._summary_prefetches.get(key)
+        if task is not None:
+            try:
+                result = await asyncio.shield(task)
+            except Exception:
+                # A falha já foi registrada; o resumo é gerado normalmente
+                return None
+            metrics.SUMMARY_PREFETCH_TOTAL.inc(result="joined")
+            return result
+        
+        cached = await self.cache.get(key)
+        if cached is None:
+            return None
+        metrics.SUMMARY_PREFETCH_TOTAL.inc(result="hit")
+        return cached["summary"], TokenUsage(**cached["usage"])
+    
+    async def summarize_batch(
+        self,
+        requests: List[SummarizeRequest],
+        concurrency: int = 8,
+        bypass_cache: bool = False
+    ) -> AsyncIterator[SummarizeBatchItemResult]:
+        """
+        Resume vários capítulos em paralelo.
+        
+        Args:
+            requests: Itens a resumir
+            concurrency: Máximo de itens deste lote em andamento ao mesmo tempo
+            bypass_cache: Força nova geração mesmo com resumos em cache
+            
+        Yields:
+            Resultado de cada item na ordem em que terminam (falhas viram
+            itens com status "error" sem interromper o lote)
+        """
+        logger.info(f"Resumindo lote de {len(requests)} capítulos (concorrência: {concurrency})")
         
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+        
+        async def run(index: int, request: SummarizeRequest) -> SummarizeBatchItemResult:
+            async with semaphore:
+                try:
+                    response = await self.summarize_chapter(request, bypass_cache=bypass_cache)
+                    return SummarizeBatchItemResult(index=index, status="ok", result=response)
+                except ValueError as e:
+                    return SummarizeBatchItemResult(index=index, status="error", error=str(e))
+                except ModelUnavailableError as e:
+                    return SummarizeBatchItemResult(index=index, status="error", error=str(e))
+                except Exception:
+                    return SummarizeBatchItemResult(
+                        index=index,
+                        status="error",
+                        error="Erro ao gerar resumo. Por favor, tente novamente."
+                    )
+        
+        tasks = [asyncio.create_task(run(idx, req)) for idx, req in enumerate(requests)]
         try:
-            # Remove espaços extras
-            text = response_text.strip()
-            
-            # Extrai seções usando marcadores
-            import re
-            
-            # RESUMO
-            resumo_match = re.search(r'\[RESUMO\](.*?)\[PERSONAGENS\]', text, re.DOTALL | re.IGNORECASE)
-            if resumo_match:
-                result["summary"] = resumo_match.group(1).strip()
-            
-            # PERSONAGENS
-            personagens_match = re.search(r'\[PERSONAGENS\](.*?)\[AMBIENTAÇÕES\]', text, re.DOTALL | re.IGNORECASE)
-            if personagens_match:
-                chars_text = personagens_match.group(1).strip()
-                # Extrai linhas que começam com - ou número
-                chars = re.findall(r'^[-•*]\s*(.+?)$', chars_text, re.MULTILINE)
-                result["characters"] = [c.strip() for c in chars if c.strip()]
-            
-            # AMBIENTAÇÕES
-            ambientacoes_match = re.search(r'\[AMBIENTAÇÕES\](.*?)\[EVENTOS-CHAVE\]', text, re.DOTALL | re.IGNORECASE)
-            if ambientacoes_match:
-                settings_text = ambientacoes_match.group(1).strip()
-                settings = re.findall(r'^[-•*]\s*(.+?)$', settings_text, re.MULTILINE)
-                result["settings"] = [s.strip() for s in settings if s.strip()]
-            
-            # EVENTOS-CHAVE
-            eventos_match = re.search(r'\[EVENTOS-CHAVE\](.*?)\[ESTADO FINAL\]', text, re.DOTALL | re.IGNORECASE)
-            if eventos_match:
-                events_text = eventos_match.group(1).strip()
-                # Extrai linhas numeradas ou com marcadores
-                events = re.findall(r'^(?:\d+\.|-|•|\*)\s*(.+?)$', events_text, re.MULTILINE)
-                result["keyEvents"] = [e.strip() for e in events if e.strip()]
-            
-            # ESTADO FINAL
-            estado_match = re.search(r'\[ESTADO FINAL\](.*?)$', text, re.DOTALL | re.IGNORECASE)
-            if estado_match:
-                result["endingState"] = estado_match.group(1).strip()
-            
-            # Validações básicas
-            if not result["summary"]:
-                result["summary"] = "Resumo não disponível"
-            if not result["endingState"]:
-                result["endingState"] = "Estado final não especificado"
-                
-        except Exception as e:
-            logger.error(f"Erro ao fazer parse do resumo: {e}")
-            # Fallback: usa texto completo como resumo
-            result["summary"] = response_text
-            result["endingState"] = "Erro ao processar estado final"
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            # Cliente desconectou: não continua gastando chamadas
+            for task in tasks:
+                task.cancel()
+    
+    async def _summarize_chunked(
+        self,
+        request: SummarizeRequest,
+        bypass_cache: bool,
+        endpoint: str
+    ) -> Tuple[str, TokenUsage]:
+        """
+        Resumo map-reduce de textos longos.
         
-        return result
+        O texto é dividido em trechos (por parágrafos) de até
+        `summarize_chunk_tokens`, resumidos em paralelo no mesmo formato
+        estruturado e combinados em um resumo final. A latência fica limitada
+        pelo trecho mais lento mais a combinação, e cada chamada vai para o
+        cache de respostas (um retry só refaz o que falhou).
+        """
+        language = request.language
+        with metrics.PROMPT_BUILD_SECONDS.time(**self._labels(endpoint)):
+            chunks = split_by_tokens(
+                request.chapterText,
+                self.summarize_chunk_tokens,
+                self.backend.count_tokens
+            )
+            chapter_title = self._chapter_title_section(request)
+            chunk_template = self.prompts.get("summarize_chunk", language)
+            prompts = [
+                chunk_template.render(
+                    chapter_title=chapter_title,
+                    part=idx,
+                    parts=len(chunks),
+                    chapterText=chunk,
+                    language=language
+                )
+                for idx, chunk in enumerate(chunks, start=1)
+            ]
+        logger.info(f"Texto longo: resumindo em {len(chunks)} trechos em paralelo")
+        
+        async def generate(prompt: str) -> Tuple[str, TokenUsage]:
+            return await self._generate_cached(
+                prompt,
+                bypass_cache=bypass_cache,
+                cache_ttl=None,
+                endpoint=endpoint
+            )
+        
+        results = await _gather_or_cancel(generate(prompt) for prompt in prompts)
+        partials = [text.strip() for text, _ in results]
+        usages = [usage for _, usage in results]
+        
+        reduce_template = self.prompts.get("summarize_reduce", language)
+        part_template = self.prompts.get("summarize_part", language)
+        
+        def reduce_prompt(group: List[str]) -> str:
+            return reduce_template.render(
+                chapter_title=chapter_title,
+                partials="\n\n".join(
+                    part_template.render(part=idx, parts=len(group), summary=summary)
+                    for idx, summary in enumerate(group, start=1)
+                ),
+                language=language
+            )
+        
+        # Resumos parciais que não cabem juntos são combinados em grupos antes do final
+        while len(partials) > 1:
+            groups = pack_by_tokens(partials, self.summarize_chunk_tokens, self.backend.count_tokens)
+            if len(groups) == 1 or len(groups) == len(partials):
+                break
+            logger.info(f"Combinando {len(partials)} resumos parciais em {len(groups)} grupos")
+            results = await _gather_or_cancel(
+                generate(reduce_prompt(group)) for group in groups
+            )
+            partials = [text.strip() for text, _ in results]
+            usages.extend(usage for _, usage in results)
+        
+        if len(partials) > 1:
+            text, usage = await generate(reduce_prompt(partials))
+            partials = [text]
+            usages.append(usage)
+        
+        return partials[0], sum_usage(usages)
+    
+    def _chapter_title_section(self, request) -> str:
+        if not request.chapterTitle:
+            return ""
+        return self.prompts.get("chapter_title", request.language).render(title=request.chapterTitle)
+    
+    def _build_summarize_prompt(self, request, template: str = "summarize") -> str:
+        """Constrói prompt para resumo focado em continuidade."""
+        return self.prompts.get(template, request.language).render(
+            chapter_title=self._chapter_title_section(request),
+            chapterText=request.chapterText,
+            language=request.language
+        )
+    
+    def _parse_summary_response(self, response_text: str) -> ChapterSummary:
+        """
+        Parse da resposta estruturada do resumo.
+        
+        Respostas do modo JSON são validadas contra os campos do resumo; se o
+        JSON vier inválido (ou a resposta estiver no formato de marcadores),
+        usa o parser de regex.
+        """
+        text = response_text.strip()
+        if text.startswith(("{", "```")):
+            try:
+                return parse_summary_json(text)
+            except ValueError as e:
+                logger.warning(f"Resumo em JSON inválido, usando parser de texto: {e}")
+        return parse_summary_text(text)
@@ -0,0 +1,223 @@
+"""
+Geração de livro completo em segundo plano (mode="full").
+
+Gera os capítulos em sequência, resume cada um automaticamente e usa o
+capítulo salvo como contexto do próximo. O resumo do capítulo N roda em
+paralelo à geração do capítulo N+1 (que já tem o final do capítulo N no
+contexto); o capítulo N+2 só começa depois que o resumo de N foi salvo.
+
+Cada capítulo concluído é um checkpoint: ao retomar uma tarefa, capítulos já
+gerados são pulados. Tarefas em andamento no encerramento do servidor ficam
+como interrompidas ("interrupted"); "cancelled" é só para `cancel()`.
+"""
+
+import asyncio
+import logging
+from typing import Dict, List, Optional
+
+from src.models import (
+    ChapterPlan,
+    GenerateChapterRequest,
+    Job,
+    SummarizeRequest
+)
+from src.services.ai_service import AIService
+from src.services.jobs import RESUMABLE_STATUSES, JobStore
+
+logger = logging.getLogger(__name__)
+
+
+class BookPipeline:
+    """Executa tarefas de geração de livro completo."""
+
+    def __init__(self, ai_service: AIService, job_store: JobStore):
+        self.ai_service = ai_service
+        self.job_store = job_store
+        self._tasks: Dict[str, asyncio.Task] = {}
+        # Encerramento do servidor: cancelamentos marcam a tarefa como interrompida
+        self._stopping = False
+
+    @staticmethod
+    def _plan(request: GenerateChapterRequest) -> List[ChapterPlan]:
+        """Sequência de capítulos: o do próprio request seguido de `nextChapters`."""
+        first = ChapterPlan(
+            chapterId=request.chapterId,
+            chapterTitle=request.chapterTitle,
+            chapterSummary=request.chapterSummary,
+            keyPoints=request.keyPoints,
+            lengthInPages=request.lengthInPages
+        )
+        return [first] + list(request.nextChapters)
+
+    def start(self, request: GenerateChapterRequest) -> Job:
+        """
+        Cria a tarefa e inicia a geração em segundo plano.
+
+        Raises:
+            ValueError: Se o armazenamento de projetos estiver desabilitado
+                ou houver ids de capítulo repetidos no plano
+        """
+        if self.ai_service.project_store is None:
+            raise ValueError("mode='full' requer armazenamento de projetos habilitado")
+
+        plan = self._plan(request)
+        chapter_ids = [item.chapterId for item in plan]
+        if len(set(chapter_ids)) != len(chapter_ids):
+            raise ValueError("chapterId repetido no plano de capítulos")
+
+        job = self.job_store.create_job(
+            kind="book",
+            request=request.model_dump(mode="json"),
+            project_id=request.projectId,
+            total_steps=len(plan)
+        )
+        logger.info(f"Tarefa {job.jobId}: livro com {len(plan)} capítulos")
+        self._spawn(job.jobId)
+        return job
+
+    def resume(self, job_id: str) -> Job:
+        """
+        Retoma uma tarefa interrompida, falha ou cancelada a partir do último checkpoint.
+
+        Raises:
+            KeyError: Se a tarefa não existir
+            ValueError: Se a tarefa não puder ser retomada
+        """
+        job = self.job_store.get_job(job_id)
+        if job is None or job.kind != "book":
+            raise KeyError(job_id)
+        if job.status not in RESUMABLE_STATUSES:
+            raise ValueError(f"Tarefa com status '{job.status}' não pode ser retomada")
+
+        job = self.job_store.update_job(job, status="pending", error=None)
+        self._spawn(job_id)
+        return job
+
+    def cancel(self, job_id: str) -> Job:
+        """
+        Cancela uma tarefa em andamento (capítulos concluídos continuam salvos).
+
+        Raises:
+            KeyError: Se a tarefa não existir
+        """
+        job = self.job_store.get_job(job_id)
+        if job is None or job.kind != "book":
+            raise KeyError(job_id)
+        task = self._tasks.get(job_id)
+        if task is not None and not task.done():
+            task.cancel()
+        elif job.status in ("pending", "running"):
+            job = self.job_store.update_job(job, status="cancelled", currentChapterId=None)
+        return job
+
+    async def stop(self) -> None:
+        """Interrompe as tarefas em andamento (ficam como interrompidas, retomáveis)."""
+        self._stopping = True
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _spawn(self, job_id: str) -> None:
+        task = asyncio.create_task(self._run(job_id))
+        self._tasks[job_id] = task
+        task.add_done_callback(lambda done: self._finished(job_id, done))
+
+    def _finished(self, job_id: str, task: asyncio.Task) -> None:
+        self._tasks.pop(job_id, None)
+        if not task.cancelled():
+            return
+        # Cancelada antes de `_run` começar: o tratamento de cancelamento dele
+        # não rodou e a tarefa ainda está pendente
+        job = self.job_store.get_job(job_id)
+        if job is not None and job.status == "pending":
+            status = "interrupted" if self._stopping else "cancelled"
+            self.job_store.update_job(job, status=status, currentChapterId=None)
+
+    async def _summarize(self, request: GenerateChapterRequest, text: str) -> None:
+        """Resume o capítulo e salva o resumo (falhas não interrompem o livro)."""
+        try:
+            await self.ai_service.summarize_chapter(SummarizeRequest(
+                chapterText=text,
+                chapterTitle=request.chapterTitle,
+                language=request.language,
+                projectId=request.projectId,
+                chapterId=request.chapterId
+            ))
+        except Exception as e:
+            logger.error(f"Erro ao resumir capítulo {request.chapterId}: {e}")
+
+    async def _run(self, job_id: str) -> None:
+        """Loop principal da tarefa."""
+        job = self.job_store.get_job(job_id)
+        request = GenerateChapterRequest.model_validate(self.job_store.get_request(job_id))
+        store = self.ai_service.project_store
+
+        job = self.job_store.update_job(job, status="running")
+        previous_ids = list(request.previousChapterIds)
+        pending_summary: Optional[asyncio.Task] = None
+
+        try:
+            for item in self._plan(request):
+                chapter_request = request.model_copy(update={
+                    "chapterId": item.chapterId,
+                    "chapterTitle": item.chapterTitle,
+                    "chapterSummary": item.chapterSummary,
+                    "keyPoints": item.keyPoints,
+                    "lengthInPages": item.lengthInPages or request.lengthInPages,
+                    "previousChapterIds": list(previous_ids),
+                    "mode": "single",
+                    "nextChapters": []
+                })
+
+                checkpointed = item.chapterId in job.completedChapterIds
+                if checkpointed:
+                    # Capítulo já gerado em execução anterior; só garante o resumo
+                    stored = await store.run(store.get_chapter, request.projectId, item.chapterId)
+                    if stored is not None:
+                        if stored.summary is None:
+                            await self._summarize(chapter_request, stored.generatedText)
+                        previous_ids.append(item.chapterId)
+                        continue
+
+                job = self.job_store.update_job(job, currentChapterId=item.chapterId)
+
+                # Gera o capítulo N+1 enquanto o resumo do capítulo N termina
+                response = await self.ai_service.generate_chapter(chapter_request)
+
+                if pending_summary is not None:
+                    await pending_summary
+                pending_summary = asyncio.create_task(
+                    self._summarize(chapter_request, response.text)
+                )
+
+                previous_ids.append(item.chapterId)
+                if not checkpointed:
+                    job = self.job_store.update_job(
+                        job,
+                        completedSteps=job.completedSteps + 1,
+                        completedChapterIds=job.completedChapterIds + [item.chapterId]
+                    )
+
+            if pending_summary is not None:
+                await pending_summary
+
+            self.job_store.update_job(job, status="completed", currentChapterId=None)
+            logger.info(f"Tarefa {job_id} concluída")
+
+        except asyncio.CancelledError:
+            if pending_summary is not None:
+                pending_summary.cancel()
+            if self._stopping:
+                self.job_store.update_job(job, status="interrupted", currentChapterId=None)
+                logger.info(f"Tarefa {job_id} interrompida pelo encerramento do servidor")
+            else:
+                self.job_store.update_job(job, status="cancelled", currentChapterId=None)
+                logger.info(f"Tarefa {job_id} cancelada")
+            raise
+
+        except Exception as e:
+            if pending_summary is not None:
+                await pending_summary
+            logger.error(f"Tarefa {job_id} falhou: {e}")
+            self.job_store.update_job(job, status="failed", error=str(e), currentChapterId=None)
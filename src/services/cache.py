@@ -0,0 +1,315 @@
+"""
+Cache de respostas do modelo.
+
+As entradas são indexadas por um hash do prompt montado + configuração de
+geração, de forma que requisições idênticas (retries de /summarize, sugestões
+repetidas) não pagam uma nova chamada ao Gemini.
+
+`get`/`set` são assíncronos: backends com IO bloqueante (SQLite) executam a
+leitura e a escrita em uma thread, fora do event loop.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def make_cache_key(prompt: str, model_name: str, generation_config: Dict[str, Any]) -> str:
+    """Gera a chave de cache (sha256) para um prompt e sua configuração de geração."""
+    config = json.dumps(generation_config, sort_keys=True, default=str)
+    digest = hashlib.sha256()
+    digest.update(model_name.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(config.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(prompt.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def make_summary_key(
+    chapter_text: str,
+    chapter_title: Optional[str],
+    language: str,
+    prompt_version: str
+) -> str:
+    """
+    Chave do resumo pré-calculado de um texto (independe do modelo).
+
+    O título entra na chave porque faz parte do prompt de resumo.
+    """
+    digest = hashlib.sha256()
+    digest.update(b"summary\0")
+    digest.update(f"{prompt_version}\0{language}\0{chapter_title or ''}\0".encode("utf-8"))
+    digest.update(chapter_text.encode("utf-8"))
+    return digest.hexdigest()
+
+
+class ResponseCache(ABC):
+    """Interface dos backends de cache. Valores são dicts serializáveis em JSON."""
+
+    # _get/_set fazem IO bloqueante e rodam em uma thread
+    blocking_io = False
+
+    def __init__(self, default_ttl: Optional[float] = 3600.0):
+        """
+        Args:
+            default_ttl: Validade padrão das entradas em segundos (None = sem expiração)
+        """
+        self.default_ttl = default_ttl
+        self.hits = 0
+        self.misses = 0
+
+    async def _run(self, func, *args):
+        if self.blocking_io:
+            return await asyncio.to_thread(func, *args)
+        return func(*args)
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Retorna o valor em cache ou None, atualizando os contadores."""
+        value = await self._run(self._get, key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    async def set(self, key: str, value: Dict[str, Any], ttl: Optional[float] = -1) -> None:
+        """
+        Armazena um valor.
+
+        Args:
+            key: Chave gerada por make_cache_key
+            value: Dict serializável em JSON
+            ttl: Validade em segundos; None = sem expiração; omitido = default_ttl
+        """
+        if ttl == -1:
+            ttl = self.default_ttl
+        expires_at = time.time() + ttl if ttl is not None else None
+        await self._run(self._set, key, value, expires_at)
+
+    def stats(self) -> Dict[str, Any]:
+        """Contadores de acerto/erro do cache."""
+        total = self.hits + self.misses
+        return {
+            "backend": self.backend_name,
+            "entries": self.size(),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hitRate": round(self.hits / total, 4) if total else 0.0,
+        }
+
+    @property
+    @abstractmethod
+    def backend_name(self) -> str:
+        """Nome do backend (exibido nas estatísticas)."""
+
+    @abstractmethod
+    def _get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Leitura crua, sem contadores."""
+
+    @abstractmethod
+    def _set(self, key: str, value: Dict[str, Any], expires_at: Optional[float]) -> None:
+        """Escrita crua com instante absoluto de expiração."""
+
+    @abstractmethod
+    def size(self) -> int:
+        """Número de entradas armazenadas."""
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Remove todas as entradas."""
+
+
+class MemoryCache(ResponseCache):
+    """Cache em memória com despejo LRU e expiração por TTL."""
+
+    backend_name = "memory"
+
+    def __init__(self, max_entries: int = 1024, default_ttl: Optional[float] = 3600.0):
+        super().__init__(default_ttl=default_ttl)
+        if max_entries < 1:
+            raise ValueError("max_entries deve ser >= 1")
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[Dict[str, Any], Optional[float]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def _set(self, key: str, value: Dict[str, Any], expires_at: Optional[float]) -> None:
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def size(self) -> int:
+        return len(self._entries)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class SQLiteCache(ResponseCache):
+    """
+    Cache persistente em SQLite (sobrevive a reinícios do processo).
+
+    O horário de acesso (ordem do LRU) é gravado em lote: os acertos ficam
+    pendentes e vão ao banco na próxima escrita ou a cada `ACCESS_FLUSH_SIZE`
+    acertos. O despejo só roda quando a contagem de entradas passa de
+    `max_entries` e remove apenas o excedente, pelo índice de acesso.
+    """
+
+    backend_name = "sqlite"
+    blocking_io = True
+
+    # Acertos acumulados antes de gravar os horários de acesso
+    ACCESS_FLUSH_SIZE = 64
+
+    def __init__(
+        self,
+        path: str = "taleseed_cache.db",
+        max_entries: int = 10000,
+        default_ttl: Optional[float] = 3600.0
+    ):
+        super().__init__(default_ttl=default_ttl)
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS response_cache (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                expires_at REAL,
+                accessed_at REAL NOT NULL
+            )"""
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_response_cache_accessed "
+            "ON response_cache(accessed_at)"
+        )
+        self._conn.commit()
+        # Contagem mantida em memória (recontada a cada despejo)
+        self._count = self._conn.execute("SELECT COUNT(*) FROM response_cache").fetchone()[0]
+        # Chave -> último acesso ainda não gravado
+        self._touched: Dict[str, float] = {}
+
+    def _flush_access(self) -> None:
+        if self._touched:
+            self._conn.executemany(
+                "UPDATE response_cache SET accessed_at = ? WHERE key = ?",
+                [(accessed_at, key) for key, accessed_at in self._touched.items()]
+            )
+            self._touched.clear()
+
+    def _get(self, key: str) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM response_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            value, expires_at = row
+            if expires_at is not None and expires_at <= now:
+                self._conn.execute("DELETE FROM response_cache WHERE key = ?", (key,))
+                self._conn.commit()
+                self._touched.pop(key, None)
+                self._count = max(0, self._count - 1)
+                return None
+            self._touched[key] = now
+            if len(self._touched) >= self.ACCESS_FLUSH_SIZE:
+                self._flush_access()
+                self._conn.commit()
+        return json.loads(value)
+
+    def _set(self, key: str, value: Dict[str, Any], expires_at: Optional[float]) -> None:
+        with self._lock:
+            exists = self._conn.execute(
+                "SELECT 1 FROM response_cache WHERE key = ?", (key,)
+            ).fetchone() is not None
+            self._conn.execute(
+                "INSERT OR REPLACE INTO response_cache (key, value, expires_at, accessed_at) "
+                "VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False), expires_at, time.time())
+            )
+            self._touched.pop(key, None)
+            self._flush_access()
+            if not exists:
+                self._count += 1
+            if self._count > self.max_entries:
+                self._evict()
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        """Despejo LRU: remove só as entradas excedentes, das menos acessadas."""
+        # Outros processos podem usar o mesmo arquivo: reconta antes de apagar
+        self._count = self._conn.execute("SELECT COUNT(*) FROM response_cache").fetchone()[0]
+        excess = self._count - self.max_entries
+        if excess > 0:
+            deleted = self._conn.execute(
+                "DELETE FROM response_cache WHERE key IN ("
+                "SELECT key FROM response_cache ORDER BY accessed_at LIMIT ?)",
+                (excess,)
+            ).rowcount
+            self._count -= deleted
+
+    def size(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM response_cache").fetchone()[0]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM response_cache")
+            self._conn.commit()
+            self._touched.clear()
+            self._count = 0
+
+
+def create_cache(
+    backend: str,
+    max_entries: int = 1024,
+    default_ttl: Optional[float] = 3600.0,
+    path: str = "taleseed_cache.db"
+) -> Optional[ResponseCache]:
+    """
+    Cria o backend de cache configurado.
+
+    Args:
+        backend: "memory", "sqlite" ou "none"
+        max_entries: Máximo de entradas antes do despejo LRU
+        default_ttl: Validade padrão em segundos (None = sem expiração)
+        path: Arquivo do banco (apenas para "sqlite")
+
+    Returns:
+        Instância do cache ou None se desabilitado
+    """
+    backend = backend.lower()
+    if backend == "none":
+        return None
+    if backend == "memory":
+        return MemoryCache(max_entries=max_entries, default_ttl=default_ttl)
+    if backend == "sqlite":
+        return SQLiteCache(path=path, max_entries=max_entries, default_ttl=default_ttl)
+    raise ValueError(f"Backend de cache desconhecido: {backend}")
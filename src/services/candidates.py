@@ -0,0 +1,35 @@
+"""
+Seleção entre várias gerações do mesmo pedido (best-of-N).
+
+Com `candidates > 1`, o mesmo prompt é enviado várias vezes em paralelo e a
+melhor versão é escolhida por heurísticas locais baratas, sem nova chamada ao
+modelo: nos capítulos, a proximidade da extensão pedida
+(`lengthInPages * 250` palavras) e a ausência de corte no fim do texto.
+"""
+
+import re
+from typing import List, Sequence
+
+from src.services.tokens import WORDS_PER_PAGE
+
+# Texto completo termina em pontuação final (seguida ou não de aspas e parênteses)
+_COMPLETE_END_RE = re.compile(r"[.!?…][\"'”»)\]]*\s*$")
+
+
+def chapter_score(text: str, length_in_pages: int) -> float:
+    """
+    Distância do capítulo ao ideal (menor é melhor).
+
+    Erro relativo da contagem de palavras em relação à extensão pedida, mais
+    uma penalidade quando o texto parece cortado no meio de uma frase.
+    """
+    target = length_in_pages * WORDS_PER_PAGE
+    score = abs(len(text.split()) - target) / target
+    if not _COMPLETE_END_RE.search(text):
+        score += 1.0
+    return score
+
+
+def rank_chapters(texts: Sequence[str], length_in_pages: int) -> List[int]:
+    """Índices das versões da melhor para a pior (empates mantêm a ordem)."""
+    return sorted(range(len(texts)), key=lambda idx: chapter_score(texts[idx], length_in_pages))
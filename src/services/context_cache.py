@@ -0,0 +1,216 @@
+"""
+Cache de contexto no provedor (cached content do Gemini).
+
+Prefixos longos e repetidos — o contexto dos capítulos anteriores de um
+projeto — são enviados uma vez ao provedor e referenciados nas chamadas
+seguintes, que mandam apenas o restante do prompt. Tokens lidos do cache são
+cobrados com desconto e não precisam ser reprocessados.
+
+Cada escopo (`project:<projectId>`) tem no máximo um contexto ativo. Um
+contexto cujo texto é início do prefixo pedido continua servindo (o digest do
+projeto só cresce no fim); ele é recriado quando o prefixo novo se repete, muda
+ou está perto de expirar, e apagado quando um capítulo incluído nele muda
+(`invalidate`).
+Falhas de criação nunca interrompem a geração: a chamada segue com o prompt
+completo.
+"""
+
+import asyncio
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, Optional, Set, Tuple
+
+from src.services import metrics
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class ContextPrefix:
+    """Início do prompt que pode ser servido do cache de contexto."""
+    scope: str
+    text: str
+    # Identificadores (ex.: capítulos) cujo conteúdo está no prefixo
+    tags: FrozenSet[str] = frozenset()
+
+
+# Espera antes de tentar criar de novo um contexto que falhou
+FAILURE_BACKOFF_SECONDS = 300.0
+
+
+@dataclass
+class _Entry:
+    name: str
+    digest: str
+    # Caracteres do prefixo guardados no contexto
+    length: int
+    expires_at: float
+    tags: FrozenSet[str] = frozenset()
+
+
+def _digest(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class ContextCache:
+    """Contextos em cache no provedor, um por escopo, com TTL e invalidação."""
+
+    def __init__(
+        self,
+        backend,
+        ttl: float = 3600.0,
+        min_tokens: int = 4096,
+        max_entries: int = 128,
+        create_after: int = 2
+    ):
+        """
+        Args:
+            backend: ModelBackend com suporte a cache de contexto
+            ttl: Validade de cada contexto no provedor em segundos
+            min_tokens: Prefixos menores não são cacheados (o provedor exige um mínimo)
+            max_entries: Contextos ativos ao mesmo tempo (os mais antigos são apagados)
+            create_after: Usos do mesmo prefixo antes de criar o contexto (1 = na primeira chamada)
+        """
+        self.backend = backend
+        self.ttl = ttl
+        self.min_tokens = min_tokens
+        self.max_entries = max_entries
+        self.create_after = max(1, create_after)
+        # Renova contextos perto de expirar em vez de arriscar um 404 no meio da chamada
+        self._margin = min(60.0, ttl * 0.1)
+
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._seen: "OrderedDict[Tuple[str, str], int]" = OrderedDict()
+        self._failures: Dict[Tuple[str, str], float] = {}
+        self._creating: Set[str] = set()
+        self._pending: Set[asyncio.Task] = set()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def get(self, context: ContextPrefix) -> Optional[Tuple[str, int]]:
+        """
+        Contexto em cache para o prefixo, criando-o se valer a pena.
+
+        Um contexto ativo com parte do prefixo (o início dele) é usado enquanto
+        o prefixo completo não se repete o bastante para ser criado.
+
+        Returns:
+            Nome do contexto no provedor e quantos caracteres do prefixo ele
+            cobre, ou None para enviar o prompt completo
+        """
+        scope, prefix = context.scope, context.text
+        digest = _digest(prefix)
+        now = time.monotonic()
+
+        partial = None
+        entry = self._entries.get(scope)
+        if entry is not None and entry.expires_at - self._margin > now:
+            if entry.digest == digest:
+                self._entries.move_to_end(scope)
+                metrics.CONTEXT_CACHE_TOTAL.inc(result="hit")
+                return entry.name, entry.length
+            if entry.length < len(prefix) and _digest(prefix[:entry.length]) == entry.digest:
+                partial = (entry.name, entry.length)
+
+        hit = await self._create(context, digest, now)
+        if hit is None and partial is not None:
+            self._entries.move_to_end(scope)
+            metrics.CONTEXT_CACHE_TOTAL.inc(result="hit")
+            return partial
+        return hit
+
+    async def _create(self, context: ContextPrefix, digest: str, now: float) -> Optional[Tuple[str, int]]:
+        """Cria o contexto do prefixo a partir de `create_after` usos."""
+        scope, prefix = context.scope, context.text
+        key = (scope, digest)
+        if self._failures.get(key, 0.0) > now or scope in self._creating:
+            return None
+
+        uses = self._seen.get(key, 0) + 1
+        self._seen[key] = uses
+        self._seen.move_to_end(key)
+        while len(self._seen) > self.max_entries * 4:
+            self._seen.popitem(last=False)
+        if uses < self.create_after:
+            return None
+
+        if self.backend.count_tokens(prefix) < self.min_tokens:
+            return None
+
+        self._creating.add(scope)
+        try:
+            name = await self.backend.create_context_cache(prefix, self.ttl)
+        except Exception as e:
+            logger.warning(f"Falha ao criar contexto em cache ({scope}): {e}")
+            metrics.CONTEXT_CACHE_TOTAL.inc(result="error")
+            self._failures[key] = now + FAILURE_BACKOFF_SECONDS
+            return None
+        finally:
+            self._creating.discard(scope)
+
+        self._seen.pop(key, None)
+        self._replace(scope, _Entry(name, digest, len(prefix), time.monotonic() + self.ttl, context.tags))
+        metrics.CONTEXT_CACHE_TOTAL.inc(result="created")
+        logger.info(f"Contexto em cache criado para {scope}: {name}")
+        return name, len(prefix)
+
+    def _replace(self, scope: str, entry: _Entry) -> None:
+        old = self._entries.pop(scope, None)
+        if old is not None:
+            self._delete_later(old.name)
+        self._entries[scope] = entry
+        while len(self._entries) > self.max_entries:
+            _, evicted = self._entries.popitem(last=False)
+            self._delete_later(evicted.name)
+
+    def discard(self, scope: str, name: str) -> None:
+        """Esquece um contexto que o provedor não encontrou (expirado ou apagado)."""
+        entry = self._entries.get(scope)
+        if entry is not None and entry.name == name:
+            del self._entries[scope]
+            # O prefixo já se mostrou reutilizado: recria no próximo uso
+            self._seen[(scope, entry.digest)] = self.create_after - 1
+
+    def invalidate(self, scope: str, tag: Optional[str] = None) -> None:
+        """
+        Apaga o contexto do escopo.
+
+        Args:
+            scope: Escopo do contexto
+            tag: Só apaga se o contexto incluir este identificador (None = sempre)
+        """
+        entry = self._entries.get(scope)
+        if entry is None or (tag is not None and tag not in entry.tags):
+            return
+        del self._entries[scope]
+        logger.info(f"Contexto em cache invalidado: {scope}")
+        self._delete_later(entry.name)
+
+    def _delete_later(self, name: str) -> None:
+        """Apaga o contexto no provedor em segundo plano."""
+        try:
+            task = asyncio.get_running_loop().create_task(self._delete(name))
+        except RuntimeError:
+            # Sem event loop: o contexto expira sozinho pelo TTL
+            return
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    async def _delete(self, name: str) -> None:
+        try:
+            await self.backend.delete_context_cache(name)
+        except Exception as e:
+            logger.warning(f"Falha ao apagar contexto em cache {name}: {e}")
+
+    async def close(self) -> None:
+        """Apaga todos os contextos ativos (encerramento do servidor)."""
+        names = [entry.name for entry in self._entries.values()]
+        self._entries.clear()
+        await asyncio.gather(*(self._delete(name) for name in names), *self._pending)
+
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len(self._entries), "ttlSeconds": int(self.ttl), "minTokens": self.min_tokens}
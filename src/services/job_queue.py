@@ -0,0 +1,201 @@
+"""
+Fila de tarefas para geração de capítulos em segundo plano.
+
+`POST /jobs/generate-chapter` apenas enfileira a tarefa e devolve o id; um
+pool de workers executa `AIService.generate_chapter` e grava o resultado no
+armazenamento de tarefas. A geração continua mesmo que o cliente desconecte,
+e requests idênticos reaproveitam a mesma tarefa.
+"""
+
+import asyncio
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from src.models import GenerateChapterRequest, Job
+from src.services.ai_service import AIService
+from src.services.jobs import RESUMABLE_STATUSES, JobStore, request_hash
+
+logger = logging.getLogger(__name__)
+
+
+class JobQueue:
+    """Pool de workers que executa tarefas de geração de capítulo."""
+
+    def __init__(self, ai_service: AIService, job_store: JobStore, workers: int = 4):
+        """
+        Args:
+            ai_service: Serviço usado para gerar os capítulos
+            job_store: Onde tarefas e resultados são persistidos
+            workers: Número de tarefas executadas ao mesmo tempo
+        """
+        if workers < 1:
+            raise ValueError("workers deve ser >= 1")
+        self.ai_service = ai_service
+        self.job_store = job_store
+        self.workers = workers
+        self._queue: "asyncio.Queue[str]" = asyncio.Queue()
+        self._worker_tasks: List[asyncio.Task] = []
+        self._running: Dict[str, asyncio.Task] = {}
+        self._heartbeat_task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        """
+        Inicia os workers e reenfileira tarefas interrompidas por reinício.
+
+        Também mantém o heartbeat das tarefas deste processo (inclusive as de
+        livro completo, no mesmo armazenamento) enquanto a fila estiver ativa.
+        """
+        for job in self.job_store.claim_interrupted("chapter"):
+            self._queue.put_nowait(job.jobId)
+
+        self._worker_tasks = [
+            asyncio.create_task(self._worker(idx)) for idx in range(self.workers)
+        ]
+        self._heartbeat_task = asyncio.create_task(self._heartbeat())
+        logger.info(
+            f"Fila de tarefas iniciada com {self.workers} workers "
+            f"({self._queue.qsize()} tarefa(s) retomada(s))"
+        )
+
+    async def stop(self) -> None:
+        """Interrompe os workers (tarefas em andamento ficam como interrompidas)."""
+        for task in self._worker_tasks:
+            task.cancel()
+        await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        self._worker_tasks = []
+        if self._heartbeat_task is not None:
+            self._heartbeat_task.cancel()
+            await asyncio.gather(self._heartbeat_task, return_exceptions=True)
+            self._heartbeat_task = None
+
+    async def _heartbeat(self) -> None:
+        """Renova o heartbeat das tarefas deste processo a cada 1/4 do timeout."""
+        interval = self.job_store.heartbeat_timeout / 4
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await asyncio.to_thread(self.job_store.heartbeat)
+            except Exception as e:
+                logger.warning(f"Falha ao renovar heartbeat das tarefas: {e}")
+
+    def submit(self, request: GenerateChapterRequest, force: bool = False) -> Tuple[Job, bool]:
+        """
+        Enfileira a geração de um capítulo.
+
+        Args:
+            request: Request de geração (mode="single")
+            force: Cria nova tarefa mesmo que exista uma idêntica
+
+        Returns:
+            Tarefa e se ela foi criada agora (False = reaproveitada)
+        """
+        payload = request.model_dump(mode="json")
+        digest = request_hash(payload)
+
+        if not force:
+            existing = self.job_store.find_by_hash("chapter", digest)
+            if existing is not None:
+                logger.info(f"Request idêntico à tarefa {existing.jobId}; reaproveitando")
+                return existing, False
+
+        job = self.job_store.create_job(
+            kind="chapter",
+            request=payload,
+            project_id=request.projectId,
+            total_steps=1,
+            request_hash=digest
+        )
+        self._queue.put_nowait(job.jobId)
+        return job, True
+
+    def resume(self, job_id: str) -> Job:
+        """
+        Reenfileira uma tarefa interrompida, falha ou cancelada.
+
+        Raises:
+            KeyError: Se a tarefa não existir
+            ValueError: Se a tarefa não puder ser retomada
+        """
+        job = self.job_store.get_job(job_id)
+        if job is None or job.kind != "chapter":
+            raise KeyError(job_id)
+        if job.status not in RESUMABLE_STATUSES:
+            raise ValueError(f"Tarefa com status '{job.status}' não pode ser retomada")
+        job = self.job_store.update_job(job, status="pending", error=None)
+        self._queue.put_nowait(job_id)
+        return job
+
+    def cancel(self, job_id: str) -> Job:
+        """
+        Cancela uma tarefa pendente ou em andamento.
+
+        Raises:
+            KeyError: Se a tarefa não existir
+        """
+        job = self.job_store.get_job(job_id)
+        if job is None or job.kind != "chapter":
+            raise KeyError(job_id)
+        task = self._running.get(job_id)
+        if task is not None:
+            task.cancel()
+        elif job.status == "pending":
+            # O worker ignora tarefas canceladas ao retirá-las da fila
+            job = self.job_store.update_job(job, status="cancelled")
+        return job
+
+    async def _worker(self, idx: int) -> None:
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self._execute(job_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Worker {idx}: erro inesperado na tarefa {job_id}: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def _execute(self, job_id: str) -> None:
+        """Executa uma tarefa e persiste o resultado ou o erro."""
+        job = self.job_store.get_job(job_id)
+        if job is None or job.status != "pending":
+            return
+
+        request = GenerateChapterRequest.model_validate(self.job_store.get_request(job_id))
+        job = self.job_store.update_job(job, status="running", currentChapterId=request.chapterId)
+
+        task = asyncio.create_task(self.ai_service.generate_chapter(request))
+        self._running[job_id] = task
+        try:
+            response = await task
+        except asyncio.CancelledError:
+            current = asyncio.current_task()
+            if current is None or current.cancelling() == 0:
+                # Cancelada via cancel(); o worker segue para a próxima tarefa
+                self.job_store.update_job(job, status="cancelled", currentChapterId=None)
+                logger.info(f"Tarefa {job_id} cancelada")
+                return
+            # Encerramento do processo: a tarefa será retomada no próximo start()
+            task.cancel()
+            self.job_store.update_job(job, status="interrupted", currentChapterId=None)
+            raise
+        except Exception as e:
+            logger.error(f"Tarefa {job_id} falhou: {e}")
+            self.job_store.update_job(job, status="failed", error=str(e), currentChapterId=None)
+            return
+        finally:
+            self._running.pop(job_id, None)
+
+        self.job_store.save_result(job_id, response.model_dump(mode="json"))
+        self.job_store.update_job(
+            job,
+            status="completed",
+            completedSteps=1,
+            completedChapterIds=[request.chapterId],
+            currentChapterId=None
+        )
+        logger.info(f"Tarefa {job_id} concluída")
+
+    def get_result(self, job_id: str) -> Optional[dict]:
+        """Resultado da tarefa concluída (GenerateChapterResponse em JSON)."""
+        return self.job_store.get_result(job_id)
@@ -0,0 +1,373 @@
+"""
+Armazenamento de tarefas em segundo plano.
+
+Guarda o estado de cada tarefa (progresso, checkpoints, erro) junto com o
+request original, de forma que tarefas interrompidas possam ser retomadas.
+
+Com vários workers no mesmo banco, cada processo é dono das tarefas que criou
+ou gravou por último e renova o heartbeat delas periodicamente (`heartbeat`).
+Na inicialização, só tarefas pendentes ou em andamento com heartbeat vencido
+(o dono parou) são marcadas como interrompidas.
+"""
+
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.models import Job
+
+logger = logging.getLogger(__name__)
+
+# Estados a partir dos quais a tarefa pode ser retomada
+RESUMABLE_STATUSES = ("failed", "interrupted", "cancelled")
+
+# Tarefas nestes estados são reaproveitadas por requests idênticos
+DEDUP_STATUSES = ("pending", "running", "completed")
+
+
+def request_hash(request: Dict[str, Any]) -> str:
+    """Hash estável (sha256) do request, usado para deduplicar tarefas."""
+    payload = json.dumps(request, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class JobStore(ABC):
+    """Interface dos backends de armazenamento de tarefas."""
+
+    def __init__(self, heartbeat_timeout: float = 120.0):
+        """
+        Args:
+            heartbeat_timeout: Segundos sem heartbeat após os quais uma tarefa
+                pendente ou em andamento é considerada abandonada pelo dono
+        """
+        # Identifica este processo como dono das tarefas que ele grava
+        self.owner_id = uuid.uuid4().hex
+        self.heartbeat_timeout = heartbeat_timeout
+
+    @abstractmethod
+    def get_job(self, job_id: str) -> Optional[Job]:
+        """Retorna a tarefa ou None."""
+
+    @abstractmethod
+    def get_request(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Request original (JSON) da tarefa."""
+
+    @abstractmethod
+    def _insert(self, job: Job, request: Dict[str, Any]) -> None:
+        """Insere uma tarefa nova."""
+
+    @abstractmethod
+    def save_job(self, job: Job) -> None:
+        """Grava o estado atual da tarefa."""
+
+    @abstractmethod
+    def mark_interrupted(self) -> int:
+        """
+        Marca como interrompidas as tarefas pendentes ou em andamento cujo dono
+        parou (heartbeat vencido). Retorna quantas.
+        """
+
+    @abstractmethod
+    def heartbeat(self) -> None:
+        """Renova o heartbeat das tarefas pendentes ou em andamento deste processo."""
+
+    @abstractmethod
+    def claim_interrupted(self, kind: str) -> List[Job]:
+        """
+        Passa as tarefas interrompidas do tipo para pendentes, em nome deste
+        processo. Cada tarefa é assumida por um único processo.
+        """
+
+    @abstractmethod
+    def get_result(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Resultado (JSON) de uma tarefa concluída."""
+
+    @abstractmethod
+    def save_result(self, job_id: str, result: Dict[str, Any]) -> None:
+        """Grava o resultado da tarefa."""
+
+    @abstractmethod
+    def find_by_hash(self, kind: str, request_hash: str) -> Optional[Job]:
+        """Tarefa mais recente do tipo com o mesmo hash em um dos DEDUP_STATUSES."""
+
+    @abstractmethod
+    def list_jobs(self, kind: str, statuses: Tuple[str, ...]) -> List[Job]:
+        """Tarefas do tipo nos estados informados, das mais antigas às mais novas."""
+
+    def create_job(
+        self,
+        kind: str,
+        request: Dict[str, Any],
+        project_id: Optional[str] = None,
+        total_steps: int = 0,
+        request_hash: Optional[str] = None
+    ) -> Job:
+        """Cria e persiste uma tarefa pendente."""
+        now = datetime.utcnow()
+        job = Job(
+            jobId=uuid.uuid4().hex,
+            kind=kind,
+            status="pending",
+            projectId=project_id,
+            requestHash=request_hash,
+            totalSteps=total_steps,
+            createdAt=now,
+            updatedAt=now
+        )
+        self._insert(job, request)
+        return job
+
+    def update_job(self, job: Job, **changes: Any) -> Job:
+        """Aplica alterações, atualiza `updatedAt` e persiste."""
+        job = job.model_copy(update={**changes, "updatedAt": datetime.utcnow()})
+        self.save_job(job)
+        return job
+
+
+class MemoryJobStore(JobStore):
+    """Armazenamento de tarefas em memória."""
+
+    def __init__(self, heartbeat_timeout: float = 120.0):
+        super().__init__(heartbeat_timeout)
+        self._jobs: Dict[str, Tuple[Job, Dict[str, Any]]] = {}
+        self._results: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def get_job(self, job_id: str) -> Optional[Job]:
+        entry = self._jobs.get(job_id)
+        return entry[0] if entry else None
+
+    def get_request(self, job_id: str) -> Optional[Dict[str, Any]]:
+        entry = self._jobs.get(job_id)
+        return entry[1] if entry else None
+
+    def _insert(self, job: Job, request: Dict[str, Any]) -> None:
+        with self._lock:
+            self._jobs[job.jobId] = (job, request)
+
+    def save_job(self, job: Job) -> None:
+        with self._lock:
+            _, request = self._jobs[job.jobId]
+            self._jobs[job.jobId] = (job, request)
+
+    def mark_interrupted(self) -> int:
+        # Tarefas em memória não sobrevivem ao processo que as criou
+        return 0
+
+    def heartbeat(self) -> None:
+        pass
+
+    def claim_interrupted(self, kind: str) -> List[Job]:
+        return [
+            self.update_job(job, status="pending")
+            for job in self.list_jobs(kind, ("interrupted",))
+        ]
+
+    def get_result(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return self._results.get(job_id)
+
+    def save_result(self, job_id: str, result: Dict[str, Any]) -> None:
+        with self._lock:
+            self._results[job_id] = result
+
+    def find_by_hash(self, kind: str, request_hash: str) -> Optional[Job]:
+        matches = [
+            job for job, _ in self._jobs.values()
+            if job.kind == kind and job.requestHash == request_hash and job.status in DEDUP_STATUSES
+        ]
+        return max(matches, key=lambda job: job.createdAt) if matches else None
+
+    def list_jobs(self, kind: str, statuses: Tuple[str, ...]) -> List[Job]:
+        jobs = [job for job, _ in self._jobs.values() if job.kind == kind and job.status in statuses]
+        return sorted(jobs, key=lambda job: job.createdAt)
+
+
+class SQLiteJobStore(JobStore):
+    """Armazenamento de tarefas em SQLite (sobrevive a reinícios)."""
+
+    def __init__(self, path: str = "taleseed_jobs.db", heartbeat_timeout: float = 120.0):
+        super().__init__(heartbeat_timeout)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS jobs (
+                job_id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                status TEXT NOT NULL,
+                request_hash TEXT,
+                created_at TEXT NOT NULL,
+                job TEXT NOT NULL,
+                request TEXT NOT NULL,
+                result TEXT,
+                owner TEXT,
+                heartbeat_at REAL
+            )"""
+        )
+        # Bancos criados antes do heartbeat
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+        for column, kind in (("owner", "TEXT"), ("heartbeat_at", "REAL")):
+            if column not in columns:
+                self._conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {kind}")
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_jobs_hash ON jobs(kind, request_hash)"
+        )
+        self._conn.commit()
+
+    def get_job(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT job FROM jobs WHERE job_id = ?", (job_id,)
+            ).fetchone()
+        return Job.model_validate_json(row[0]) if row else None
+
+    def get_request(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT request FROM jobs WHERE job_id = ?", (job_id,)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _insert(self, job: Job, request: Dict[str, Any]) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (job_id, kind, status, request_hash, created_at, job, request, "
+                "owner, heartbeat_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    job.jobId,
+                    job.kind,
+                    job.status,
+                    job.requestHash,
+                    job.createdAt.isoformat(),
+                    job.model_dump_json(),
+                    json.dumps(request, ensure_ascii=False),
+                    self.owner_id,
+                    time.time()
+                )
+            )
+            self._conn.commit()
+
+    def save_job(self, job: Job) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, job = ?, owner = ?, heartbeat_at = ? WHERE job_id = ?",
+                (job.status, job.model_dump_json(), self.owner_id, time.time(), job.jobId)
+            )
+            self._conn.commit()
+
+    def _transition(self, job: Job, from_status: str, condition: str = "", params: Tuple = ()) -> bool:
+        """
+        Grava a tarefa só se ela ainda estiver em `from_status` (e `condition`).
+
+        O UPDATE condicional é atômico entre processos: só um deles muda a tarefa.
+        """
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = ?, job = ?, owner = ?, heartbeat_at = ? "
+                f"WHERE job_id = ? AND status = ?{condition}",
+                (job.status, job.model_dump_json(), self.owner_id, time.time(),
+                 job.jobId, from_status, *params)
+            )
+            self._conn.commit()
+        return cursor.rowcount == 1
+
+    def mark_interrupted(self) -> int:
+        stale = time.time() - self.heartbeat_timeout
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT job FROM jobs WHERE status IN ('pending', 'running') "
+                "AND (heartbeat_at IS NULL OR heartbeat_at < ?)",
+                (stale,)
+            ).fetchall()
+        count = 0
+        for (raw,) in rows:
+            job = Job.model_validate_json(raw)
+            interrupted = job.model_copy(update={
+                "status": "interrupted", "currentChapterId": None, "updatedAt": datetime.utcnow()
+            })
+            # Outro processo pode ter renovado o heartbeat ou assumido a tarefa
+            if self._transition(
+                interrupted, job.status, " AND (heartbeat_at IS NULL OR heartbeat_at < ?)", (stale,)
+            ):
+                count += 1
+        return count
+
+    def heartbeat(self) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET heartbeat_at = ? WHERE owner = ? AND status IN ('pending', 'running')",
+                (time.time(), self.owner_id)
+            )
+            self._conn.commit()
+
+    def claim_interrupted(self, kind: str) -> List[Job]:
+        claimed = []
+        for job in self.list_jobs(kind, ("interrupted",)):
+            pending = job.model_copy(update={"status": "pending", "updatedAt": datetime.utcnow()})
+            if self._transition(pending, "interrupted"):
+                claimed.append(pending)
+        return claimed
+
+    def get_result(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT result FROM jobs WHERE job_id = ?", (job_id,)
+            ).fetchone()
+        return json.loads(row[0]) if row and row[0] else None
+
+    def save_result(self, job_id: str, result: Dict[str, Any]) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET result = ? WHERE job_id = ?",
+                (json.dumps(result, ensure_ascii=False), job_id)
+            )
+            self._conn.commit()
+
+    def find_by_hash(self, kind: str, request_hash: str) -> Optional[Job]:
+        placeholders = ", ".join("?" for _ in DEDUP_STATUSES)
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT job FROM jobs WHERE kind = ? AND request_hash = ? "
+                f"AND status IN ({placeholders}) ORDER BY created_at DESC LIMIT 1",
+                (kind, request_hash, *DEDUP_STATUSES)
+            ).fetchone()
+        return Job.model_validate_json(row[0]) if row else None
+
+    def list_jobs(self, kind: str, statuses: Tuple[str, ...]) -> List[Job]:
+        placeholders = ", ".join("?" for _ in statuses)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT job FROM jobs WHERE kind = ? AND status IN ({placeholders}) "
+                f"ORDER BY created_at",
+                (kind, *statuses)
+            ).fetchall()
+        return [Job.model_validate_json(raw) for (raw,) in rows]
+
+
+def create_job_store(
+    backend: str,
+    path: str = "taleseed_jobs.db",
+    heartbeat_timeout: float = 120.0
+) -> JobStore:
+    """
+    Cria o backend de armazenamento de tarefas.
+
+    Args:
+        backend: "sqlite" ou "memory"
+        path: Arquivo do banco (apenas para "sqlite")
+        heartbeat_timeout: Segundos sem heartbeat para considerar uma tarefa abandonada
+    """
+    backend = backend.lower()
+    if backend == "memory":
+        return MemoryJobStore(heartbeat_timeout=heartbeat_timeout)
+    if backend == "sqlite":
+        return SQLiteJobStore(path=path, heartbeat_timeout=heartbeat_timeout)
+    raise ValueError(f"Backend de tarefas desconhecido: {backend}")
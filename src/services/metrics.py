@@ -0,0 +1,228 @@
+"""
+Métricas no formato de exposição do Prometheus.
+
+Implementação mínima (contadores e histogramas com labels) para não
+adicionar dependências; `GET /metrics` devolve `REGISTRY.render()`.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+# Latências de etapas locais (ms) até chamadas longas ao modelo (minutos)
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+    1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0
+)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: LabelValues, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str]):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(name, "")) for name in self.label_names)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return lines
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Contador monotônico com labels."""
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str] = ()):
+        super().__init__(name, help_text, label_names)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [
+            f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}"
+            for key, value in items
+        ]
+
+
+class Histogram(_Metric):
+    """Histograma cumulativo com labels (buckets em segundos)."""
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        label_names: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        super().__init__(name, help_text, label_names)
+        self.buckets = tuple(sorted(buckets))
+        # Por label: contagem por bucket, soma, total
+        self._values: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = ([0] * len(self.buckets), [0.0, 0.0])
+                self._values[key] = entry
+            counts, totals = entry
+            for idx, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[idx] += 1
+                    break
+            totals[0] += value
+            totals[1] += 1
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        """Mede a duração do bloco."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels: str) -> int:
+        entry = self._values.get(self._key(labels))
+        return int(entry[1][1]) if entry else 0
+
+    def _samples(self) -> List[str]:
+        lines: List[str] = []
+        with self._lock:
+            items = sorted((key, (list(c), list(t))) for key, (c, t) in self._values.items())
+        for key, (counts, (total_sum, total_count)) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(self.label_names, key, le)} {cumulative}"
+                )
+            inf = _format_labels(self.label_names, key, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{inf} {int(total_count)}")
+            lines.append(f"{self.name}_sum{_format_labels(self.label_names, key)} {repr(total_sum)}")
+            lines.append(f"{self.name}_count{_format_labels(self.label_names, key)} {int(total_count)}")
+        return lines
+
+
+class MetricsRegistry:
+    """Conjunto de métricas expostas em /metrics."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def counter(self, name: str, help_text: str, label_names: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, help_text, label_names))
+
+    def histogram(
+        self,
+        name: str,
+        help_text: str,
+        label_names: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self._register(Histogram(name, help_text, label_names, buckets))
+
+    def _register(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Métrica já registrada: {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        """Texto no formato de exposição do Prometheus (versão 0.0.4)."""
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+_LABELS = ("endpoint", "model")
+
+PROMPT_BUILD_SECONDS = REGISTRY.histogram(
+    "taleseed_prompt_build_seconds", "Tempo de montagem do prompt", _LABELS
+)
+MODEL_CALL_SECONDS = REGISTRY.histogram(
+    "taleseed_model_call_seconds", "Latência de cada tentativa de chamada ao modelo", _LABELS
+)
+TIME_TO_FIRST_TOKEN_SECONDS = REGISTRY.histogram(
+    "taleseed_time_to_first_token_seconds", "Tempo até o primeiro chunk em streaming", _LABELS
+)
+PARSE_SECONDS = REGISTRY.histogram(
+    "taleseed_parse_seconds", "Tempo de parse da resposta do modelo", _LABELS
+)
+SERIALIZATION_SECONDS = REGISTRY.histogram(
+    "taleseed_serialization_seconds", "Tempo de serialização Pydantic da resposta", ("endpoint",)
+)
+TOKENS_TOTAL = REGISTRY.counter(
+    "taleseed_tokens_total", "Tokens enviados (in), lidos do cache de contexto (cached) e gerados (out)", _LABELS + ("direction",)
+)
+CACHE_REQUESTS_TOTAL = REGISTRY.counter(
+    "taleseed_cache_requests_total", "Consultas ao cache de respostas", _LABELS + ("result",)
+)
+RETRIES_TOTAL = REGISTRY.counter(
+    "taleseed_model_retries_total", "Novas tentativas após erro transitório do modelo", _LABELS
+)
+CONTEXT_CACHE_TOTAL = REGISTRY.counter(
+    "taleseed_context_cache_total",
+    "Uso do cache de contexto no provedor (hit, created, error)",
+    ("result",)
+)
+COALESCED_TOTAL = REGISTRY.counter(
+    "taleseed_coalesced_requests_total",
+    "Requisições atendidas por uma chamada idêntica já em andamento",
+    _LABELS
+)
+SUMMARY_PREFETCH_TOTAL = REGISTRY.counter(
+    "taleseed_summary_prefetch_total",
+    "Resumos pré-calculados após a geração (started, hit, joined, error)",
+    ("result",)
+)
+ERRORS_TOTAL = REGISTRY.counter(
+    "taleseed_errors_total", "Erros por tipo de exceção", _LABELS + ("type",)
+)
+RATE_LIMITED_TOTAL = REGISTRY.counter(
+    "taleseed_rate_limited_total", "Requisições rejeitadas pelo rate limit (429)", ("endpoint",)
+)
@@ -0,0 +1,412 @@
+"""
+Backends de modelo usados pelo AIService.
+
+`ModelBackend` define o que o serviço precisa de um modelo (gerar, gerar em
+streaming, contar tokens e, opcionalmente, manter contexto em cache no
+provedor). O `GeminiBackend` é o adaptador real; o
+`FakeBackend` gera texto determinístico localmente, com latência e tamanho
+configuráveis, para testes de carga e benchmarks sem chave nem rede.
+"""
+
+import asyncio
+import datetime
+import hashlib
+import json
+import logging
+import random
+import re
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from google.api_core import exceptions as google_exceptions
+
+from src.services.tokens import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class UsageCounts:
+    """Contadores de tokens no mesmo formato do `usage_metadata` do Gemini."""
+    prompt_token_count: int = 0
+    candidates_token_count: int = 0
+    total_token_count: int = 0
+    cached_content_token_count: int = 0
+
+
+@dataclass
+class ModelResult:
+    """Resposta completa do modelo."""
+    text: str
+    usage_metadata: Any = None
+
+
+@dataclass
+class ModelChunk:
+    """Pedaço de texto de uma resposta em streaming (usage acumulado, se houver)."""
+    text: str
+    usage_metadata: Any = None
+
+
+class ModelBackend(ABC):
+    """Interface dos backends de modelo."""
+
+    # Backends com cache de contexto aceitam `cached_context` em generate/stream
+    supports_context_cache = False
+    # Backends com modo JSON aceitam `response_schema` em generate
+    supports_json_mode = False
+
+    @property
+    @abstractmethod
+    def backend_name(self) -> str:
+        """Nome do backend (gemini, fake)."""
+
+    @abstractmethod
+    async def generate(
+        self,
+        prompt: str,
+        cached_context: Optional[str] = None,
+        response_schema: Optional[Dict[str, Any]] = None
+    ) -> ModelResult:
+        """
+        Gera a resposta completa para o prompt.
+
+        Com `cached_context`, o prompt é apenas o que vem depois do prefixo em cache.
+        Com `response_schema`, a resposta é um JSON que segue o schema (modo JSON).
+        """
+
+    @abstractmethod
+    def stream(self, prompt: str, cached_context: Optional[str] = None) -> AsyncIterator[ModelChunk]:
+        """Gera a resposta em pedaços (apenas chunks com texto)."""
+
+    def count_tokens(self, text: str) -> int:
+        """Tokens do texto (estimativa local por padrão)."""
+        return estimate_tokens(text)
+
+    async def create_context_cache(self, text: str, ttl: float) -> str:
+        """Guarda `text` como contexto no provedor e devolve o nome do contexto."""
+        raise NotImplementedError(f"Backend {self.backend_name} não suporta cache de contexto")
+
+    async def delete_context_cache(self, name: str) -> None:
+        """Apaga um contexto criado por `create_context_cache`."""
+
+
+class GeminiBackend(ModelBackend):
+    """Adaptador para o Google Gemini (`google-generativeai`)."""
+
+    def __init__(
+        self,
+        api_key: str,
+        model_name: str,
+        generation_config: Dict[str, Any],
+        safety_settings: List[Dict[str, str]]
+    ):
+        import google.generativeai as genai
+
+        genai.configure(api_key=api_key)
+        self._genai = genai
+        self.model_name = model_name
+        self.generation_config = generation_config
+        self.safety_settings = safety_settings
+        self.model = genai.GenerativeModel(
+            model_name=model_name,
+            generation_config=generation_config,
+            safety_settings=safety_settings
+        )
+        # Nome do contexto -> (CachedContent, modelo ligado a ele)
+        self._cached: Dict[str, Any] = {}
+
+    supports_context_cache = True
+    supports_json_mode = True
+
+    @property
+    def backend_name(self) -> str:
+        return "gemini"
+
+    def _model_for(self, cached_context: Optional[str]):
+        if cached_context is None:
+            return self.model
+        entry = self._cached.get(cached_context)
+        if entry is None:
+            raise google_exceptions.NotFound(f"Contexto em cache não encontrado: {cached_context}")
+        return entry[1]
+
+    async def generate(
+        self,
+        prompt: str,
+        cached_context: Optional[str] = None,
+        response_schema: Optional[Dict[str, Any]] = None
+    ) -> ModelResult:
+        # Somado à generation_config do modelo apenas nesta chamada
+        generation_config = None
+        if response_schema is not None:
+            generation_config = {
+                "response_mime_type": "application/json",
+                "response_schema": response_schema
+            }
+        response = await self._model_for(cached_context).generate_content_async(
+            prompt,
+            generation_config=generation_config
+        )
+        return ModelResult(
+            text=response.text,
+            usage_metadata=getattr(response, "usage_metadata", None)
+        )
+
+    async def stream(self, prompt: str, cached_context: Optional[str] = None) -> AsyncIterator[ModelChunk]:
+        model = self._model_for(cached_context)
+        response = await model.generate_content_async(prompt, stream=True)
+        async for chunk in response:
+            # Chunks finais podem vir sem partes (apenas finish_reason)
+            if chunk.parts:
+                yield ModelChunk(
+                    text=chunk.text,
+                    usage_metadata=getattr(chunk, "usage_metadata", None)
+                )
+
+    def count_tokens(self, text: str) -> int:
+        # A contagem exata exige uma chamada de rede; a real vem no usage_metadata
+        return estimate_tokens(text)
+
+    async def create_context_cache(self, text: str, ttl: float) -> str:
+        from google.generativeai import caching
+
+        # O SDK de cache é síncrono
+        cached = await asyncio.to_thread(
+            caching.CachedContent.create,
+            model=self.model_name,
+            contents=[text],
+            ttl=datetime.timedelta(seconds=ttl)
+        )
+        model = self._genai.GenerativeModel.from_cached_content(
+            cached_content=cached,
+            generation_config=self.generation_config,
+            safety_settings=self.safety_settings
+        )
+        self._cached[cached.name] = (cached, model)
+        return cached.name
+
+    async def delete_context_cache(self, name: str) -> None:
+        entry = self._cached.pop(name, None)
+        if entry is not None:
+            await asyncio.to_thread(entry[0].delete)
+
+
+_FAKE_VOCABULARY = (
+    "a noite caiu sobre a cidade enquanto o vento soprava pelas ruas estreitas "
+    "ela olhou para o horizonte e lembrou da promessa feita anos antes "
+    "o silêncio da floresta escondia segredos antigos que ninguém ousava contar "
+    "passos ecoaram no corredor e a porta se abriu devagar revelando uma luz fraca"
+).split()
+
+_WORDS_RE = re.compile(r"cerca de (\d+) palavras")
+_COUNT_RE = re.compile(r"Gere (\d+) ")
+
+
+class FakeBackend(ModelBackend):
+    """
+    Backend local determinístico.
+
+    O mesmo prompt sempre gera o mesmo texto. Prompts de sugestões e de
+    resumo recebem respostas no formato esperado pelos parsers; prompts de
+    capítulo respeitam a extensão pedida ("cerca de N palavras") quando
+    `output_words` não é informado. No modo JSON, a resposta é um objeto
+    montado a partir do schema.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        output_words: Optional[int] = None,
+        tokens_per_second: Optional[float] = None,
+        chunk_words: int = 20,
+        failure_rate: float = 0.0,
+        seed: int = 0
+    ):
+        """
+        Args:
+            latency: Segundos até o primeiro token
+            output_words: Palavras por resposta (None = extensão pedida no prompt, ou 300)
+            tokens_per_second: Ritmo da geração após o primeiro token (None = instantâneo)
+            chunk_words: Palavras por chunk no streaming
+            failure_rate: Fração de chamadas que falham com 503 (injeção de falhas)
+            seed: Semente da injeção de falhas
+        """
+        self.latency = latency
+        self.output_words = output_words
+        self.tokens_per_second = tokens_per_second
+        self.chunk_words = max(1, chunk_words)
+        self.failure_rate = failure_rate
+        self._random = random.Random(seed)
+        self.calls = 0
+        # Contextos em cache simulados (nome -> prefixo)
+        self.contexts: Dict[str, str] = {}
+        self._context_seq = 0
+
+    supports_context_cache = True
+    supports_json_mode = True
+
+    @property
+    def backend_name(self) -> str:
+        return "fake"
+
+    async def create_context_cache(self, text: str, ttl: float) -> str:
+        self._context_seq += 1
+        name = f"cachedContents/fake-{self._context_seq}"
+        self.contexts[name] = text
+        return name
+
+    async def delete_context_cache(self, name: str) -> None:
+        self.contexts.pop(name, None)
+
+    def _full_prompt(self, prompt: str, cached_context: Optional[str]) -> Tuple[str, int]:
+        """Prompt completo e tokens vindos do contexto em cache."""
+        if cached_context is None:
+            return prompt, 0
+        if cached_context not in self.contexts:
+            raise google_exceptions.NotFound(f"Contexto em cache não encontrado: {cached_context}")
+        prefix = self.contexts[cached_context]
+        return prefix + prompt, estimate_tokens(prefix)
+
+    def _words(self, prompt: str, count: int) -> List[str]:
+        # Cada palavra sorteada à parte: prompts diferentes não geram textos
+        # deslocados uns dos outros (que o filtro de quase-duplicatas rejeitaria)
+        digest = hashlib.sha256(prompt.encode("utf-8")).digest()
+        rng = random.Random(digest)
+        return rng.choices(_FAKE_VOCABULARY, k=count)
+
+    def _render(self, prompt: str) -> str:
+        """Texto determinístico no formato esperado para o tipo de prompt."""
+        if "[SUGESTÃO 1]" in prompt:
+            match = _COUNT_RE.search(prompt)
+            count = int(match.group(1)) if match else 5
+            return "\n\n".join(
+                f"[SUGESTÃO {idx}]\n"
+                f"Texto: {' '.join(self._words(prompt + str(idx), 3)).capitalize()}\n"
+                f"Descrição: {' '.join(self._words(prompt + 'd' + str(idx), 15))}."
+                for idx in range(1, count + 1)
+            )
+
+        if "[RESUMO]" in prompt:
+            words = self._words(prompt, self.output_words or 120)
+            return (
+                f"[RESUMO]\n{' '.join(words)}.\n\n"
+                "[PERSONAGENS]\n- Ana (protagonista)\n- Bruno (aliado)\n\n"
+                "[AMBIENTAÇÕES]\n- Vila à beira do rio\n\n"
+                "[EVENTOS-CHAVE]\n1. Ana encontra o mapa\n2. Bruno revela o segredo\n\n"
+                f"[ESTADO FINAL]\n{' '.join(words[-30:])}."
+            )
+
+        count = self.output_words
+        if count is None:
+            match = _WORDS_RE.search(prompt)
+            count = int(match.group(1)) if match else 300
+        return " ".join(self._words(prompt, count)) + "."
+
+    def _render_json(self, prompt: str, schema: Dict[str, Any], path: str = "") -> Any:
+        """Valor determinístico que segue o schema (listas com N itens de "Gere N ", ou 3)."""
+        kind = schema.get("type")
+        if kind == "object":
+            return {
+                name: self._render_json(prompt, field, f"{path}.{name}")
+                for name, field in schema.get("properties", {}).items()
+            }
+        if kind == "array":
+            match = _COUNT_RE.search(prompt)
+            count = int(match.group(1)) if match else 3
+            return [
+                self._render_json(prompt, schema.get("items", {}), f"{path}[{idx}]")
+                for idx in range(count)
+            ]
+        if kind in ("integer", "number"):
+            return len(path)
+        if kind == "boolean":
+            return False
+        return " ".join(self._words(prompt + path, 8)).capitalize()
+
+    async def _before_first_token(self) -> None:
+        self.calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.failure_rate and self._random.random() < self.failure_rate:
+            raise google_exceptions.ServiceUnavailable("Falha injetada pelo backend fake")
+
+    def _usage(self, prompt: str, text: str, cached_tokens: int = 0) -> UsageCounts:
+        # Como no Gemini, prompt_token_count inclui os tokens do contexto em cache
+        prompt_tokens = estimate_tokens(prompt)
+        completion_tokens = estimate_tokens(text)
+        return UsageCounts(
+            prompt_token_count=prompt_tokens,
+            candidates_token_count=completion_tokens,
+            total_token_count=prompt_tokens + completion_tokens,
+            cached_content_token_count=cached_tokens
+        )
+
+    async def generate(
+        self,
+        prompt: str,
+        cached_context: Optional[str] = None,
+        response_schema: Optional[Dict[str, Any]] = None
+    ) -> ModelResult:
+        prompt, cached_tokens = self._full_prompt(prompt, cached_context)
+        await self._before_first_token()
+        if response_schema is not None:
+            text = json.dumps(self._render_json(prompt, response_schema), ensure_ascii=False)
+        else:
+            text = self._render(prompt)
+        if self.tokens_per_second:
+            await asyncio.sleep(estimate_tokens(text) / self.tokens_per_second)
+        return ModelResult(text=text, usage_metadata=self._usage(prompt, text, cached_tokens))
+
+    async def stream(self, prompt: str, cached_context: Optional[str] = None) -> AsyncIterator[ModelChunk]:
+        prompt, cached_tokens = self._full_prompt(prompt, cached_context)
+        await self._before_first_token()
+        text = self._render(prompt)
+        words = text.split(" ")
+        for start in range(0, len(words), self.chunk_words):
+            piece = " ".join(words[start:start + self.chunk_words])
+            if start:
+                piece = " " + piece
+                if self.tokens_per_second:
+                    await asyncio.sleep(estimate_tokens(piece) / self.tokens_per_second)
+            last = start + self.chunk_words >= len(words)
+            yield ModelChunk(
+                text=piece,
+                usage_metadata=self._usage(prompt, text, cached_tokens) if last else None
+            )
+
+
+def create_backend(
+    backend: str,
+    api_key: Optional[str] = None,
+    model_name: str = "gemini-2.5-flash",
+    generation_config: Optional[Dict[str, Any]] = None,
+    safety_settings: Optional[List[Dict[str, str]]] = None,
+    **fake_options: Any
+) -> ModelBackend:
+    """
+    Cria o backend de modelo.
+
+    Args:
+        backend: "gemini" ou "fake"
+        api_key: Chave do Gemini (obrigatória para "gemini")
+        model_name: Modelo do Gemini
+        generation_config: Configuração de geração do Gemini
+        safety_settings: Configurações de segurança do Gemini
+        **fake_options: Parâmetros do FakeBackend (latency, output_words, ...)
+    """
+    backend = backend.lower()
+    if backend == "fake":
+        logger.warning("Usando backend de modelo fake (texto gerado localmente)")
+        return FakeBackend(**fake_options)
+    if backend == "gemini":
+        if not api_key:
+            raise ValueError("GEMINI_API_KEY é obrigatória para o backend gemini")
+        return GeminiBackend(
+            api_key=api_key,
+            model_name=model_name,
+            generation_config=generation_config or {},
+            safety_settings=safety_settings or []
+        )
+    raise ValueError(f"Backend de modelo desconhecido: {backend}")
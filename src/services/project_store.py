@@ -0,0 +1,329 @@
+"""
+Armazenamento de projetos e capítulos no servidor.
+
+Capítulos gerados (e seus resumos) ficam salvos por `projectId`/`chapterId`,
+permitindo que requisições de continuação referenciem capítulos anteriores
+por id em vez de reenviar o texto completo do livro a cada chamada.
+"""
+
+import asyncio
+import logging
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from src.models import StoredChapter, StoryState
+
+logger = logging.getLogger(__name__)
+
+
+class ProjectStore(ABC):
+    """Interface dos backends de armazenamento de capítulos."""
+
+    # Operações que bloqueiam em IO de disco rodam fora do event loop (`run`)
+    blocking_io = False
+
+    def __init__(self):
+        # Serializa leitura e gravação em save_chapter/save_summary, que podem
+        # rodar em threads diferentes
+        self._write_lock = threading.Lock()
+
+    async def run(self, func, *args, **kwargs):
+        """Executa uma operação do armazenamento sem bloquear o event loop."""
+        if self.blocking_io:
+            return await asyncio.to_thread(func, *args, **kwargs)
+        return func(*args, **kwargs)
+
+    @abstractmethod
+    def get_chapter(self, project_id: str, chapter_id: str) -> Optional[StoredChapter]:
+        """Retorna um capítulo salvo ou None."""
+
+    @abstractmethod
+    def list_chapters(self, project_id: str) -> List[StoredChapter]:
+        """Lista os capítulos do projeto em ordem de posição."""
+
+    @abstractmethod
+    def _upsert(self, chapter: StoredChapter) -> None:
+        """Insere ou substitui o capítulo."""
+
+    @abstractmethod
+    def delete_chapter(self, project_id: str, chapter_id: str) -> bool:
+        """Remove um capítulo. Retorna True se existia."""
+
+    @abstractmethod
+    def chapter_versions(self, project_id: str) -> Dict[str, datetime]:
+        """Mapa chapterId -> updatedAt (sem carregar textos)."""
+
+    @abstractmethod
+    def get_story_state(self, project_id: str) -> Optional[StoryState]:
+        """Estado incremental da história do projeto, se existir."""
+
+    @abstractmethod
+    def save_story_state(self, state: StoryState) -> None:
+        """Grava o estado incremental da história."""
+
+    def chapter_keys(self, project_id: str, chapter_ids: List[str]) -> List[str]:
+        """
+        Chaves de versão (`chapterId@updatedAt`) dos capítulos pedidos, na ordem.
+
+        Raises:
+            ValueError: Se algum id não existir no projeto
+        """
+        versions = self.chapter_versions(project_id)
+        missing = [chapter_id for chapter_id in chapter_ids if chapter_id not in versions]
+        if missing:
+            raise ValueError(
+                f"Capítulos não encontrados no projeto {project_id}: {', '.join(missing)}"
+            )
+        return [f"{chapter_id}@{versions[chapter_id].isoformat()}" for chapter_id in chapter_ids]
+
+    def save_chapter(
+        self,
+        project_id: str,
+        chapter_id: str,
+        title: str,
+        generated_text: str,
+        summary: Optional[str] = None
+    ) -> StoredChapter:
+        """
+        Salva (ou regrava) o texto de um capítulo.
+
+        Capítulos novos vão para o fim do projeto; capítulos existentes mantêm a
+        posição. Como o texto mudou, o resumo antigo é descartado a menos que um
+        novo seja informado.
+        """
+        with self._write_lock:
+            existing = self.get_chapter(project_id, chapter_id)
+            if existing is not None:
+                position = existing.position
+            else:
+                chapters = self.list_chapters(project_id)
+                position = max((c.position for c in chapters), default=-1) + 1
+
+            chapter = StoredChapter(
+                projectId=project_id,
+                chapterId=chapter_id,
+                position=position,
+                title=title,
+                summary=summary,
+                generatedText=generated_text,
+                updatedAt=datetime.utcnow()
+            )
+            self._upsert(chapter)
+            return chapter
+
+    def save_summary(
+        self,
+        project_id: str,
+        chapter_id: str,
+        summary: str
+    ) -> Optional[StoredChapter]:
+        """Associa um resumo a um capítulo salvo. Retorna None se o capítulo não existe."""
+        with self._write_lock:
+            chapter = self.get_chapter(project_id, chapter_id)
+            if chapter is None:
+                return None
+            chapter = chapter.model_copy(update={"summary": summary, "updatedAt": datetime.utcnow()})
+            self._upsert(chapter)
+            return chapter
+
+    def get_chapters(self, project_id: str, chapter_ids: List[str]) -> List[StoredChapter]:
+        """
+        Busca vários capítulos na ordem pedida.
+
+        Raises:
+            ValueError: Se algum id não existir no projeto
+        """
+        chapters = []
+        missing = []
+        for chapter_id in chapter_ids:
+            chapter = self.get_chapter(project_id, chapter_id)
+            if chapter is None:
+                missing.append(chapter_id)
+            else:
+                chapters.append(chapter)
+        if missing:
+            raise ValueError(
+                f"Capítulos não encontrados no projeto {project_id}: {', '.join(missing)}"
+            )
+        return chapters
+
+
+class MemoryProjectStore(ProjectStore):
+    """Armazenamento em memória (útil para testes e desenvolvimento)."""
+
+    def __init__(self):
+        super().__init__()
+        self._chapters: Dict[Tuple[str, str], StoredChapter] = {}
+        self._states: Dict[str, StoryState] = {}
+        self._lock = threading.Lock()
+
+    def get_chapter(self, project_id: str, chapter_id: str) -> Optional[StoredChapter]:
+        return self._chapters.get((project_id, chapter_id))
+
+    def list_chapters(self, project_id: str) -> List[StoredChapter]:
+        chapters = [c for (pid, _), c in self._chapters.items() if pid == project_id]
+        return sorted(chapters, key=lambda c: c.position)
+
+    def _upsert(self, chapter: StoredChapter) -> None:
+        with self._lock:
+            self._chapters[(chapter.projectId, chapter.chapterId)] = chapter
+
+    def delete_chapter(self, project_id: str, chapter_id: str) -> bool:
+        with self._lock:
+            return self._chapters.pop((project_id, chapter_id), None) is not None
+
+    def chapter_versions(self, project_id: str) -> Dict[str, datetime]:
+        return {
+            cid: chapter.updatedAt
+            for (pid, cid), chapter in self._chapters.items()
+            if pid == project_id
+        }
+
+    def get_story_state(self, project_id: str) -> Optional[StoryState]:
+        state = self._states.get(project_id)
+        # Cópia para que alterações transitórias não vazem para o armazenamento
+        return state.model_copy(deep=True) if state else None
+
+    def save_story_state(self, state: StoryState) -> None:
+        with self._lock:
+            self._states[state.projectId] = state.model_copy(deep=True)
+
+
+class SQLiteProjectStore(ProjectStore):
+    """Armazenamento persistente em SQLite."""
+
+    blocking_io = True
+
+    def __init__(self, path: str = "taleseed_projects.db"):
+        super().__init__()
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS chapters (
+                project_id TEXT NOT NULL,
+                chapter_id TEXT NOT NULL,
+                position INTEGER NOT NULL,
+                title TEXT NOT NULL,
+                summary TEXT,
+                generated_text TEXT NOT NULL,
+                updated_at TEXT NOT NULL,
+                PRIMARY KEY (project_id, chapter_id)
+            )"""
+        )
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS story_states (
+                project_id TEXT PRIMARY KEY,
+                state TEXT NOT NULL
+            )"""
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def _row_to_chapter(row) -> StoredChapter:
+        project_id, chapter_id, position, title, summary, generated_text, updated_at = row
+        return StoredChapter(
+            projectId=project_id,
+            chapterId=chapter_id,
+            position=position,
+            title=title,
+            summary=summary,
+            generatedText=generated_text,
+            updatedAt=datetime.fromisoformat(updated_at)
+        )
+
+    def get_chapter(self, project_id: str, chapter_id: str) -> Optional[StoredChapter]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT project_id, chapter_id, position, title, summary, generated_text, updated_at "
+                "FROM chapters WHERE project_id = ? AND chapter_id = ?",
+                (project_id, chapter_id)
+            ).fetchone()
+        return self._row_to_chapter(row) if row else None
+
+    def list_chapters(self, project_id: str) -> List[StoredChapter]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT project_id, chapter_id, position, title, summary, generated_text, updated_at "
+                "FROM chapters WHERE project_id = ? ORDER BY position",
+                (project_id,)
+            ).fetchall()
+        return [self._row_to_chapter(row) for row in rows]
+
+    def _upsert(self, chapter: StoredChapter) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO chapters "
+                "(project_id, chapter_id, position, title, summary, generated_text, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    chapter.projectId,
+                    chapter.chapterId,
+                    chapter.position,
+                    chapter.title,
+                    chapter.summary,
+                    chapter.generatedText,
+                    chapter.updatedAt.isoformat()
+                )
+            )
+            self._conn.commit()
+
+    def delete_chapter(self, project_id: str, chapter_id: str) -> bool:
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM chapters WHERE project_id = ? AND chapter_id = ?",
+                (project_id, chapter_id)
+            )
+            self._conn.commit()
+        return cursor.rowcount > 0
+
+    def chapter_versions(self, project_id: str) -> Dict[str, datetime]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT chapter_id, updated_at FROM chapters WHERE project_id = ?",
+                (project_id,)
+            ).fetchall()
+        return {chapter_id: datetime.fromisoformat(updated_at) for chapter_id, updated_at in rows}
+
+    def get_story_state(self, project_id: str) -> Optional[StoryState]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT state FROM story_states WHERE project_id = ?", (project_id,)
+            ).fetchone()
+        return StoryState.model_validate_json(row[0]) if row else None
+
+    def save_story_state(self, state: StoryState) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO story_states (project_id, state) VALUES (?, ?)",
+                (state.projectId, state.model_dump_json())
+            )
+            self._conn.commit()
+
+
+def create_project_store(
+    backend: str,
+    path: str = "taleseed_projects.db"
+) -> Optional[ProjectStore]:
+    """
+    Cria o backend de armazenamento configurado.
+
+    Args:
+        backend: "sqlite", "memory" ou "none"
+        path: Arquivo do banco (apenas para "sqlite")
+
+    Returns:
+        Instância do armazenamento ou None se desabilitado
+    """
+    backend = backend.lower()
+    if backend == "none":
+        return None
+    if backend == "memory":
+        return MemoryProjectStore()
+    if backend == "sqlite":
+        return SQLiteProjectStore(path=path)
+    raise ValueError(f"Backend de armazenamento desconhecido: {backend}")
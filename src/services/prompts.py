@@ -0,0 +1,214 @@
+"""
+Templates de prompt pré-compilados.
+
+Os textos dos prompts ficam em arquivos versionados
+(`src/prompts/<versão>/<idioma>/*.txt`) e são carregados uma única vez. Cada
+template é compilado em trechos literais e slots `${nome}`; por requisição
+apenas os slots são preenchidos.
+
+O trecho antes do primeiro slot é o prefixo estático do template, idêntico
+entre requisições; seu hash (`prefix_hash`) identifica a versão do texto. A
+versão `v1` reproduz os prompts originais; a `v2` move as instruções fixas
+para antes dos slots, aumentando esse prefixo.
+"""
+
+import hashlib
+import json
+import logging
+import re
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+TEMPLATES_DIR = Path(__file__).resolve().parent.parent / "prompts"
+DEFAULT_VERSION = "v1"
+DEFAULT_LANGUAGE = "pt-BR"
+
+# Templates obrigatórios no idioma padrão de cada versão
+REQUIRED_TEMPLATES = (
+    "first_chapter",
+    "continuation_chapter",
+    "key_points",
+    "first_chapter_key_points",
+    "creative",
+    "creative_json",
+    "creative_exclude",
+    "summarize",
+    "summarize_json",
+    "summarize_chunk",
+    "summarize_reduce",
+    "summarize_part",
+    "chapter_title",
+    "chapter_plan",
+    "chapter_segment",
+    "chapter_segment_final",
+    "chapter_segment_tail",
+)
+
+_SLOT_RE = re.compile(r"\$\{(\w+)\}")
+
+# Chave de fallback em creative_types.json para tipos desconhecidos
+_DEFAULT_TYPE = "*"
+
+
+class PromptTemplate:
+    """Template compilado: trechos literais intercalados com slots."""
+
+    def __init__(self, name: str, text: str, version: str = "", language: str = ""):
+        self.name = name
+        self.version = version
+        self.language = language
+
+        # split com grupo alterna literal, slot, literal, ..., literal
+        parts = _SLOT_RE.split(text)
+        self._literals: List[str] = parts[0::2]
+        self._slots: List[str] = parts[1::2]
+        self.slots = frozenset(self._slots)
+
+        first_slot = _SLOT_RE.search(text)
+        self.static_prefix = text[:first_slot.start()] if first_slot else text
+        self.prefix_hash = hashlib.sha256(self.static_prefix.encode("utf-8")).hexdigest()[:16]
+
+    def render(self, **values) -> str:
+        """
+        Preenche os slots do template.
+
+        Raises:
+            KeyError: Se algum slot não tiver valor
+        """
+        missing = self.slots.difference(values)
+        if missing:
+            raise KeyError(f"Template {self.name} sem valor para: {', '.join(sorted(missing))}")
+
+        out = [self._literals[0]]
+        for slot, literal in zip(self._slots, self._literals[1:]):
+            out.append(str(values[slot]))
+            out.append(literal)
+        return "".join(out)
+
+    def slots_before(self, slot: str) -> frozenset:
+        """Slots que aparecem antes da primeira ocorrência de `slot`."""
+        return frozenset(self._slots[:self._slots.index(slot)])
+
+    def render_until(self, slot: str, **values) -> str:
+        """
+        Renderiza o início do template até o slot `slot` (inclusive).
+
+        O resultado é prefixo exato de `render` com os mesmos valores.
+        """
+        end = self._slots.index(slot)
+        out = [self._literals[0]]
+        for name, literal in zip(self._slots[:end], self._literals[1:end + 1]):
+            out.append(str(values[name]))
+            out.append(literal)
+        out.append(str(values[slot]))
+        return "".join(out)
+
+
+class PromptLibrary:
+    """Templates de uma versão, por idioma, com fallback para o idioma padrão."""
+
+    def __init__(
+        self,
+        version: str = DEFAULT_VERSION,
+        directory: Optional[str] = None,
+        default_language: str = DEFAULT_LANGUAGE
+    ):
+        """
+        Args:
+            version: Versão dos prompts (subpasta de `directory`)
+            directory: Pasta raiz dos templates (None = `src/prompts`)
+            default_language: Idioma usado quando o pedido não tem templates próprios
+        """
+        self.version = version
+        self.directory = Path(directory) if directory else TEMPLATES_DIR
+        self.default_language = default_language
+
+        self._templates: Dict[Tuple[str, str], PromptTemplate] = {}
+        self._creative_types: Dict[str, Dict[str, Dict[str, str]]] = {}
+        self._load()
+
+        # Idioma pedido -> idioma com templates (resolvido uma vez por idioma)
+        self._resolved: Dict[str, str] = {}
+
+    def _load(self) -> None:
+        root = self.directory / self.version
+        if not (root / self.default_language).is_dir():
+            raise ValueError(
+                f"Templates de prompt não encontrados: {root / self.default_language}"
+            )
+
+        for language_dir in sorted(p for p in root.iterdir() if p.is_dir()):
+            language = language_dir.name
+            for path in sorted(language_dir.glob("*.txt")):
+                text = path.read_text(encoding="utf-8")
+                # Editores costumam adicionar uma quebra de linha final
+                if text.endswith("\n"):
+                    text = text[:-1]
+                self._templates[(language, path.stem)] = PromptTemplate(
+                    path.stem, text, self.version, language
+                )
+
+            types_path = language_dir / "creative_types.json"
+            if types_path.exists():
+                with open(types_path, encoding="utf-8") as f:
+                    raw = json.load(f)
+                self._creative_types[language] = {
+                    key: {
+                        "instruction": value["instruction"],
+                        "guidelines": "\n".join(f"- {line}" for line in value["guidelines"])
+                    }
+                    for key, value in raw.items()
+                }
+
+        missing = [
+            name for name in REQUIRED_TEMPLATES
+            if (self.default_language, name) not in self._templates
+        ]
+        if _DEFAULT_TYPE not in self._creative_types.get(self.default_language, {}):
+            missing.append("creative_types")
+        if missing:
+            raise ValueError(
+                f"Templates de prompt ausentes em {root / self.default_language}: {', '.join(missing)}"
+            )
+
+        logger.info(
+            f"Templates de prompt carregados: versão {self.version}, "
+            f"idiomas {', '.join(sorted({language for language, _ in self._templates}))}"
+        )
+
+    def _language(self, language: str) -> str:
+        """Idioma com templates: exato, depois só o idioma base (pt-BR -> pt), depois o padrão."""
+        resolved = self._resolved.get(language)
+        if resolved is None:
+            resolved = self.default_language
+            base = language.split("-")[0]
+            for candidate in (language, base):
+                if (candidate, "first_chapter") in self._templates:
+                    resolved = candidate
+                    break
+            self._resolved[language] = resolved
+        return resolved
+
+    def get(self, name: str, language: Optional[str] = None) -> PromptTemplate:
+        """Template `name` no idioma pedido (ou no padrão)."""
+        resolved = self._language(language or self.default_language)
+        template = self._templates.get((resolved, name))
+        if template is None:
+            template = self._templates[(self.default_language, name)]
+        return template
+
+    def creative_type(self, suggestion_type: str, language: Optional[str] = None) -> Dict[str, str]:
+        """Instrução e diretrizes (já formatadas) de um tipo de sugestão."""
+        resolved = self._language(language or self.default_language)
+        types = self._creative_types.get(resolved) or self._creative_types[self.default_language]
+        return types.get(suggestion_type) or types[_DEFAULT_TYPE]
+
+    def prefix_hashes(self) -> Dict[str, str]:
+        """Hash do prefixo estático de cada template do idioma padrão."""
+        return {
+            name: template.prefix_hash
+            for (language, name), template in sorted(self._templates.items())
+            if language == self.default_language
+        }
@@ -0,0 +1,337 @@
+"""
+Controle de admissão por cliente (tenant).
+
+Cada cliente tem dois token buckets: requisições por minuto e tokens
+estimados por minuto (prompt + extensão pedida). Requisições que não cabem
+esperam até `max_wait` segundos ou são rejeitadas com 429 + Retry-After.
+
+O estado dos buckets fica em memória (um processo) ou em SQLite, para que
+vários workers na mesma máquina compartilhem os limites. O acesso ao SQLite
+roda em uma thread, fora do event loop.
+
+Clientes são identificados pela API key; sem ela, pelo IP. O `projectId` do
+corpo não serve de identificador: é escolhido pelo cliente, que ganharia um
+bucket novo a cada projeto inventado.
+"""
+
+import asyncio
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Tuple
+
+from src.models import (
+    CreativeSuggestionsRequest,
+    GenerateChapterRequest,
+    SummarizeRequest
+)
+from src.services.tokens import estimate_tokens, expected_output_tokens
+
+logger = logging.getLogger(__name__)
+
+# (chave, capacidade, reposição por segundo, custo)
+BucketSpec = Tuple[str, float, float, float]
+
+# Saída típica de um resumo estruturado e de cada sugestão criativa
+SUMMARY_OUTPUT_TOKENS = 1200
+SUGGESTION_OUTPUT_TOKENS = 80
+
+
+class RateLimitExceeded(Exception):
+    """Cliente excedeu o limite; deve tentar novamente após `retry_after` segundos."""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class BucketStore(ABC):
+    """Interface dos backends de token bucket."""
+
+    backend_name = "base"
+    # try_acquire faz IO bloqueante e roda em uma thread
+    blocking_io = False
+
+    @abstractmethod
+    def try_acquire(self, buckets: List[BucketSpec]) -> float:
+        """
+        Consome o custo de todos os buckets de forma atômica.
+
+        Returns:
+            0 se consumiu; caso contrário, segundos até haver saldo (nada é consumido)
+        """
+
+    @staticmethod
+    def _refill(tokens: float, updated: float, capacity: float, rate: float, now: float) -> float:
+        return min(capacity, tokens + max(0.0, now - updated) * rate)
+
+    @staticmethod
+    def _wait(balances: List[float], buckets: List[BucketSpec]) -> float:
+        """Maior espera entre os buckets sem saldo suficiente."""
+        wait = 0.0
+        for balance, (_, _, rate, cost) in zip(balances, buckets):
+            if balance < cost:
+                wait = max(wait, (cost - balance) / rate)
+        return wait
+
+
+class MemoryBucketStore(BucketStore):
+    """
+    Buckets em memória (limites valem por processo).
+
+    Um bucket que já voltou à capacidade cheia equivale a um bucket novo; a
+    cada `sweep_interval` segundos esses buckets ociosos são descartados, para
+    que clientes de passagem não acumulem memória.
+    """
+
+    backend_name = "memory"
+
+    def __init__(self, sweep_interval: float = 60.0):
+        # chave -> (saldo, atualizado em, cheio em)
+        self._buckets: Dict[str, Tuple[float, float, float]] = {}
+        self._lock = threading.Lock()
+        self.sweep_interval = sweep_interval
+        self._next_sweep = time.monotonic() + sweep_interval
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def _sweep(self, now: float) -> None:
+        idle = [key for key, (_, _, full_at) in self._buckets.items() if full_at <= now]
+        for key in idle:
+            del self._buckets[key]
+        self._next_sweep = now + self.sweep_interval
+
+    def try_acquire(self, buckets: List[BucketSpec]) -> float:
+        now = time.monotonic()
+        with self._lock:
+            if now >= self._next_sweep:
+                self._sweep(now)
+
+            balances = []
+            for key, capacity, rate, _ in buckets:
+                tokens, updated, _ = self._buckets.get(key, (capacity, now, now))
+                balances.append(self._refill(tokens, updated, capacity, rate, now))
+
+            wait = self._wait(balances, buckets)
+            if wait > 0:
+                return wait
+
+            for balance, (key, capacity, rate, cost) in zip(balances, buckets):
+                tokens = balance - cost
+                self._buckets[key] = (tokens, now, now + (capacity - tokens) / rate)
+            return 0.0
+
+
+class SQLiteBucketStore(BucketStore):
+    """
+    Buckets em SQLite, compartilhados entre workers da mesma máquina.
+
+    Como no armazenamento em memória, a cada `sweep_interval` segundos as
+    linhas de buckets que já voltaram à capacidade cheia são apagadas.
+    """
+
+    backend_name = "sqlite"
+    blocking_io = True
+
+    def __init__(self, path: str = "taleseed_ratelimit.db", sweep_interval: float = 60.0):
+        self.path = path
+        self.sweep_interval = sweep_interval
+        self._next_sweep = time.time() + sweep_interval
+        self._lock = threading.Lock()
+        # Transações explícitas: BEGIN IMMEDIATE serializa workers concorrentes
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=5)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS rate_buckets (
+                key TEXT PRIMARY KEY,
+                tokens REAL NOT NULL,
+                updated_at REAL NOT NULL,
+                full_at REAL NOT NULL DEFAULT 0
+            )"""
+        )
+        # Bancos criados antes da limpeza: linhas antigas saem na primeira varredura
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(rate_buckets)")}
+        if "full_at" not in columns:
+            self._conn.execute("ALTER TABLE rate_buckets ADD COLUMN full_at REAL NOT NULL DEFAULT 0")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_rate_buckets_full ON rate_buckets(full_at)")
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM rate_buckets").fetchone()[0]
+
+    def try_acquire(self, buckets: List[BucketSpec]) -> float:
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                if now >= self._next_sweep:
+                    self._conn.execute("DELETE FROM rate_buckets WHERE full_at <= ?", (now,))
+                    self._next_sweep = now + self.sweep_interval
+
+                balances = []
+                for key, capacity, rate, _ in buckets:
+                    row = self._conn.execute(
+                        "SELECT tokens, updated_at FROM rate_buckets WHERE key = ?", (key,)
+                    ).fetchone()
+                    tokens, updated = row if row else (capacity, now)
+                    balances.append(self._refill(tokens, updated, capacity, rate, now))
+
+                wait = self._wait(balances, buckets)
+                if wait == 0:
+                    self._conn.executemany(
+                        "INSERT OR REPLACE INTO rate_buckets (key, tokens, updated_at, full_at) "
+                        "VALUES (?, ?, ?, ?)",
+                        [
+                            (key, balance - cost, now, now + (capacity - balance + cost) / rate)
+                            for balance, (key, capacity, rate, cost) in zip(balances, buckets)
+                        ]
+                    )
+                self._conn.execute("COMMIT")
+                return wait
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+
+def estimate_request_tokens(request, previous_context_tokens: int = 0) -> int:
+    """
+    Estimativa de tokens (entrada + saída) de uma requisição, antes de montar o prompt.
+
+    A entrada é estimada pelo texto enviado; a saída, pela extensão pedida
+    (`lengthInPages * 250` palavras nos capítulos). Com `candidates`, cada
+    versão conta como uma chamada.
+
+    Args:
+        request: Requisição do endpoint
+        previous_context_tokens: Orçamento do contexto de capítulos anteriores
+            montado no servidor, cobrado por capítulo com `previousChapterIds`
+            (no mode="full", também por capítulo seguinte do livro)
+    """
+    if isinstance(request, GenerateChapterRequest):
+        tokens = estimate_tokens(request.chapterSummary) + sum(
+            estimate_tokens(chapter.summary) + estimate_tokens(chapter.generatedText or "")
+            for chapter in request.previousChapters
+        )
+        pages = [request.lengthInPages]
+        with_context = 1 if request.previousChapterIds else 0
+        if request.mode == "full":
+            pages += [item.lengthInPages or request.lengthInPages for item in request.nextChapters]
+            with_context += len(request.nextChapters)
+        tokens += with_context * previous_context_tokens
+        return (tokens + sum(expected_output_tokens(p) for p in pages)) * request.candidates
+
+    if isinstance(request, SummarizeRequest):
+        return estimate_tokens(request.chapterText) + SUMMARY_OUTPUT_TOKENS
+
+    if isinstance(request, CreativeSuggestionsRequest):
+        return (estimate_tokens(request.context) + request.count * SUGGESTION_OUTPUT_TOKENS) * request.candidates
+
+    return 0
+
+
+def tenant_key(api_key: Optional[str], client_host: Optional[str]) -> str:
+    """Identificador do cliente: API key (hash), senão IP."""
+    if api_key:
+        return "key:" + hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:32]
+    return f"ip:{client_host or 'unknown'}"
+
+
+class RateLimiter:
+    """Admissão por cliente com limites de requisições e tokens por minuto."""
+
+    def __init__(
+        self,
+        store: BucketStore,
+        requests_per_minute: int = 0,
+        tokens_per_minute: int = 0,
+        max_wait: float = 0.0
+    ):
+        """
+        Args:
+            store: Backend dos buckets
+            requests_per_minute: Requisições por minuto por cliente (0 = sem limite)
+            tokens_per_minute: Tokens estimados por minuto por cliente (0 = sem limite)
+            max_wait: Espera máxima na fila antes de rejeitar (0 = rejeita na hora)
+        """
+        self.store = store
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.max_wait = max_wait
+
+    @property
+    def enabled(self) -> bool:
+        return self.requests_per_minute > 0 or self.tokens_per_minute > 0
+
+    def _buckets(self, tenant: str, tokens: int, requests: int) -> List[BucketSpec]:
+        buckets: List[BucketSpec] = []
+        if self.requests_per_minute > 0:
+            capacity = float(self.requests_per_minute)
+            buckets.append((f"{tenant}:requests", capacity, capacity / 60, min(requests, capacity)))
+        if self.tokens_per_minute > 0:
+            capacity = float(self.tokens_per_minute)
+            # Requisições maiores que o limite consomem o minuto inteiro em vez de nunca passar
+            buckets.append((f"{tenant}:tokens", capacity, capacity / 60, min(tokens, capacity)))
+        return buckets
+
+    async def admit(self, tenant: str, estimated_tokens: int, requests: int = 1) -> None:
+        """
+        Aguarda saldo (até `max_wait`) e consome os buckets do cliente.
+
+        Raises:
+            RateLimitExceeded: Se o cliente não tiver saldo dentro da espera máxima
+        """
+        if not self.enabled:
+            return
+
+        buckets = self._buckets(tenant, estimated_tokens, requests)
+        deadline = time.monotonic() + self.max_wait
+        while True:
+            if self.store.blocking_io:
+                # BEGIN IMMEDIATE pode esperar o lock de outro worker
+                wait = await asyncio.to_thread(self.store.try_acquire, buckets)
+            else:
+                wait = self.store.try_acquire(buckets)
+            if wait == 0:
+                return
+            remaining = deadline - time.monotonic()
+            if wait > remaining:
+                logger.warning(
+                    f"Limite excedido para {tenant} "
+                    f"(~{estimated_tokens} tokens); nova tentativa em {wait:.1f}s"
+                )
+                raise RateLimitExceeded(
+                    "Limite de requisições excedido; tente novamente em instantes.",
+                    retry_after=wait
+                )
+            await asyncio.sleep(wait)
+
+
+def create_rate_limiter(
+    backend: str,
+    requests_per_minute: int = 0,
+    tokens_per_minute: int = 0,
+    max_wait: float = 0.0,
+    path: str = "taleseed_ratelimit.db"
+) -> RateLimiter:
+    """
+    Cria o controle de admissão.
+
+    Args:
+        backend: "memory" (por processo) ou "sqlite" (compartilhado entre workers)
+        requests_per_minute: Requisições por minuto por cliente (0 = sem limite)
+        tokens_per_minute: Tokens estimados por minuto por cliente (0 = sem limite)
+        max_wait: Espera máxima na fila antes de responder 429
+        path: Arquivo do banco (apenas para "sqlite")
+    """
+    backend = backend.lower()
+    if backend == "memory":
+        store: BucketStore = MemoryBucketStore()
+    elif backend == "sqlite":
+        store = SQLiteBucketStore(path=path)
+    else:
+        raise ValueError(f"Backend de rate limit desconhecido: {backend}")
+    return RateLimiter(store, requests_per_minute, tokens_per_minute, max_wait)
@@ -0,0 +1,225 @@
+"""
+Resiliência das chamadas ao modelo.
+
+- Erros transitórios (429, 5xx, timeout) são repetidos com backoff
+  exponencial com jitter;
+- um circuit breaker por processo passa a falhar imediatamente (503 +
+  Retry-After) depois de falhas seguidas, em vez de continuar batendo no
+  provedor enquanto ele está limitando as requisições;
+- cada tentativa tem um prazo máximo (deadline).
+"""
+
+import asyncio
+import logging
+import math
+import random
+import time
+from typing import Awaitable, Callable, Optional, TypeVar
+
+from google.api_core import exceptions as google_exceptions
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Códigos HTTP considerados transitórios
+RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+
+_RETRYABLE_EXCEPTIONS = (
+    asyncio.TimeoutError,
+    ConnectionError,
+    google_exceptions.ResourceExhausted,
+    google_exceptions.TooManyRequests,
+    google_exceptions.ServiceUnavailable,
+    google_exceptions.DeadlineExceeded,
+    google_exceptions.InternalServerError,
+    google_exceptions.BadGateway,
+    google_exceptions.GatewayTimeout,
+)
+
+
+class ModelUnavailableError(Exception):
+    """O modelo está indisponível no momento; o cliente deve tentar depois."""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+    @property
+    def retry_after_header(self) -> str:
+        """Valor do header Retry-After (segundos inteiros, mínimo 1)."""
+        return str(max(1, math.ceil(self.retry_after)))
+
+
+class CircuitOpenError(ModelUnavailableError):
+    """Circuito aberto: chamadas falham imediatamente sem acessar o modelo."""
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """Indica se o erro é transitório (vale a pena repetir a chamada)."""
+    if isinstance(exc, _RETRYABLE_EXCEPTIONS):
+        return True
+    code = getattr(exc, "code", None)
+    try:
+        return int(code) in RETRYABLE_STATUS_CODES
+    except (TypeError, ValueError):
+        return False
+
+
+class RetryPolicy:
+    """Backoff exponencial com jitter ("full jitter")."""
+
+    def __init__(self, max_attempts: int = 3, base_delay: float = 0.5, max_delay: float = 8.0):
+        """
+        Args:
+            max_attempts: Total de tentativas (1 = sem retry)
+            base_delay: Espera base antes da 2ª tentativa (segundos)
+            max_delay: Teto da espera entre tentativas (segundos)
+        """
+        if max_attempts < 1:
+            raise ValueError("max_attempts deve ser >= 1")
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def delay(self, attempt: int) -> float:
+        """Espera antes da próxima tentativa, após a tentativa `attempt` (base 1) falhar."""
+        ceiling = min(self.max_delay, self.base_delay * (2 ** (attempt - 1)))
+        return random.uniform(0, ceiling)
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker simples (fechado → aberto → meio-aberto).
+
+    Depois de `failure_threshold` falhas transitórias seguidas o circuito
+    abre por `reset_timeout` segundos. Em seguida uma única chamada de teste
+    é liberada: se der certo o circuito fecha, se falhar abre de novo.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        if failure_threshold < 1:
+            raise ValueError("failure_threshold deve ser >= 1")
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._probe_in_flight = False
+
+    @property
+    def state(self) -> str:
+        """Estado atual: closed, open ou half_open."""
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def retry_after(self) -> float:
+        """Segundos até o circuito liberar uma nova chamada."""
+        if self._opened_at is None:
+            return 0.0
+        return max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at))
+
+    def before_call(self) -> None:
+        """
+        Libera ou recusa uma chamada.
+
+        Raises:
+            CircuitOpenError: Se o circuito estiver aberto (ou já houver chamada de teste)
+        """
+        state = self.state
+        if state == "closed":
+            return
+        if state == "half_open" and not self._probe_in_flight:
+            self._probe_in_flight = True
+            return
+        raise CircuitOpenError(
+            "Modelo temporariamente indisponível; tente novamente em instantes.",
+            retry_after=self.retry_after() or self.reset_timeout
+        )
+
+    def record_success(self) -> None:
+        if self._opened_at is not None:
+            logger.info("Circuit breaker fechado")
+        self._failures = 0
+        self._opened_at = None
+        self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        if self._probe_in_flight or self._failures >= self.failure_threshold:
+            if self._probe_in_flight or self._opened_at is None:
+                logger.warning(
+                    f"Circuit breaker aberto por {self.reset_timeout}s "
+                    f"após {self._failures} falha(s) seguida(s)"
+                )
+            self._opened_at = time.monotonic()
+            self._probe_in_flight = False
+
+    def release_probe(self) -> None:
+        """Libera a vaga de teste quando a chamada terminou sem veredito (ex.: erro do cliente)."""
+        self._probe_in_flight = False
+
+
+async def call_with_retry(
+    func: Callable[[], Awaitable[T]],
+    policy: RetryPolicy,
+    breaker: Optional[CircuitBreaker] = None,
+    on_retry: Optional[Callable[[BaseException], None]] = None
+) -> T:
+    """
+    Executa `func` com retry e circuit breaker.
+
+    O deadline de cada tentativa fica a cargo de `func` (ex.: `asyncio.wait_for`
+    dentro do limite de concorrência, para não contar o tempo de fila).
+
+    Args:
+        func: Fábrica da chamada (uma nova corrotina por tentativa)
+        policy: Política de retry
+        breaker: Circuit breaker compartilhado (None = desabilitado)
+        on_retry: Chamado com o erro antes de cada nova tentativa (métricas)
+
+    Raises:
+        CircuitOpenError: Se o circuito estiver aberto
+        ModelUnavailableError: Se todas as tentativas falharem com erro transitório
+        Exception: Erros não transitórios são repassados sem retry
+    """
+    for attempt in range(1, policy.max_attempts + 1):
+        if breaker is not None:
+            breaker.before_call()
+        try:
+            result = await func()
+        except asyncio.CancelledError:
+            if breaker is not None:
+                breaker.release_probe()
+            raise
+        except Exception as e:
+            if not is_retryable(e):
+                if breaker is not None:
+                    breaker.release_probe()
+                raise
+            if breaker is not None:
+                breaker.record_failure()
+            reason = "timeout" if isinstance(e, asyncio.TimeoutError) else str(e)
+            if attempt == policy.max_attempts:
+                logger.error(f"Chamada ao modelo falhou após {attempt} tentativa(s): {reason}")
+                retry_after = policy.max_delay
+                if breaker is not None and breaker.state == "open":
+                    retry_after = breaker.retry_after()
+                raise ModelUnavailableError(
+                    "Modelo temporariamente indisponível; tente novamente em instantes.",
+                    retry_after=retry_after
+                ) from e
+            wait = policy.delay(attempt)
+            logger.warning(
+                f"Erro transitório na tentativa {attempt}/{policy.max_attempts} "
+                f"({reason}); nova tentativa em {wait:.2f}s"
+            )
+            if on_retry is not None:
+                on_retry(e)
+            await asyncio.sleep(wait)
+        else:
+            if breaker is not None:
+                breaker.record_success()
+            return result
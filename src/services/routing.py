@@ -0,0 +1,160 @@
+"""
+Roteamento de chamadas entre modelos.
+
+Uma tabela declarativa (JSON) define rotas — modelo e ajustes da configuração
+de geração — e regras que escolhem a rota pelo endpoint e pelo tamanho da
+chamada (tokens do prompt + saída esperada). Cada rota tem seu próprio
+backend, criado uma única vez na inicialização.
+
+Exemplo:
+
+    {
+      "routes": {
+        "fast": {"model": "gemini-2.5-flash-lite", "maxOutputTokens": 2048},
+        "strong": {"model": "gemini-2.5-pro"}
+      },
+      "rules": [
+        {"endpoints": ["creative_suggestions"], "route": "fast"},
+        {"endpoints": ["summarize"], "maxTokens": 8000, "route": "fast"},
+        {"endpoints": ["generate_chapter", "stream_chapter"], "minTokens": 20000, "route": "strong"}
+      ]
+    }
+
+A primeira regra que casa decide; sem regra, vale a rota padrão
+(`GEMINI_MODEL` com a configuração global). Os limites da checagem local de
+tamanho (saída máxima e janela de contexto) são os da rota escolhida.
+"""
+
+import json
+from dataclasses import dataclass
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+
+from src.services.context_cache import ContextCache
+from src.services.model_backend import ModelBackend
+
+DEFAULT_ROUTE = "default"
+
+# Endpoints (labels das métricas) que fazem chamadas ao modelo
+ENDPOINTS = frozenset({"generate_chapter", "stream_chapter", "creative_suggestions", "summarize"})
+
+# Campo da rota na tabela -> chave da generation_config
+_CONFIG_FIELDS = {
+    "temperature": "temperature",
+    "maxOutputTokens": "max_output_tokens",
+    "topP": "top_p",
+    "topK": "top_k",
+}
+
+# Campos da rota que não vão para a generation_config
+_ROUTE_FIELDS = {"model", "contextWindowTokens"}
+
+
+@dataclass
+class ModelRoute:
+    """Modelo, configuração e backend (pré-construído) de uma rota."""
+    name: str
+    model_name: str
+    generation_config: Dict[str, Any]
+    backend: ModelBackend
+    context_cache: Optional[ContextCache] = None
+    # Janela de contexto do modelo (entrada + saída)
+    context_window_tokens: int = 1000000
+
+    @property
+    def temperature(self) -> float:
+        return self.generation_config["temperature"]
+
+    @property
+    def max_output_tokens(self) -> int:
+        return self.generation_config["max_output_tokens"]
+
+
+@dataclass(frozen=True)
+class RoutingRule:
+    """Regra da tabela: endpoints e faixa de tamanho que vão para `route`."""
+    route: str
+    endpoints: FrozenSet[str] = frozenset()
+    min_tokens: int = 0
+    max_tokens: Optional[int] = None
+
+    def matches(self, endpoint: str, tokens: int) -> bool:
+        if self.endpoints and endpoint not in self.endpoints:
+            return False
+        if tokens < self.min_tokens:
+            return False
+        return self.max_tokens is None or tokens <= self.max_tokens
+
+
+def load_routing_table(path: str) -> Dict[str, Any]:
+    """Lê a tabela de roteamento de um arquivo JSON."""
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def parse_routing_table(
+    table: Dict[str, Any]
+) -> Tuple[Dict[str, Tuple[str, Dict[str, Any], Optional[int]]], List[RoutingRule]]:
+    """
+    Valida a tabela de roteamento.
+
+    Returns:
+        Rotas (nome -> modelo, ajustes da generation_config e janela de
+        contexto, None = global) e regras, na ordem
+
+    Raises:
+        ValueError: Se a tabela tiver rotas, regras ou endpoints inválidos
+    """
+    routes: Dict[str, Tuple[str, Dict[str, Any], Optional[int]]] = {}
+    for name, spec in (table.get("routes") or {}).items():
+        if name == DEFAULT_ROUTE:
+            raise ValueError(f"Rota '{DEFAULT_ROUTE}' é reservada (use GEMINI_MODEL)")
+        if not isinstance(spec, dict) or not spec.get("model"):
+            raise ValueError(f"Rota '{name}' sem modelo")
+        unknown = set(spec) - set(_CONFIG_FIELDS) - _ROUTE_FIELDS
+        if unknown:
+            raise ValueError(f"Rota '{name}' com campos desconhecidos: {', '.join(sorted(unknown))}")
+        overrides = {_CONFIG_FIELDS[field]: value for field, value in spec.items() if field in _CONFIG_FIELDS}
+        context_window = spec.get("contextWindowTokens")
+        routes[name] = (spec["model"], overrides, int(context_window) if context_window is not None else None)
+
+    rules: List[RoutingRule] = []
+    for idx, spec in enumerate(table.get("rules") or []):
+        route = spec.get("route")
+        if route != DEFAULT_ROUTE and route not in routes:
+            raise ValueError(f"Regra {idx} aponta para rota desconhecida: {route}")
+        endpoints = frozenset(spec.get("endpoints") or [])
+        unknown = endpoints - ENDPOINTS
+        if unknown:
+            raise ValueError(f"Regra {idx} com endpoints desconhecidos: {', '.join(sorted(unknown))}")
+        rules.append(RoutingRule(
+            route=route,
+            endpoints=endpoints,
+            min_tokens=int(spec.get("minTokens", 0)),
+            max_tokens=int(spec["maxTokens"]) if spec.get("maxTokens") is not None else None
+        ))
+    return routes, rules
+
+
+class ModelRouter:
+    """Escolhe a rota de cada chamada pela primeira regra que casa."""
+
+    def __init__(
+        self,
+        default: ModelRoute,
+        routes: Optional[Dict[str, ModelRoute]] = None,
+        rules: Optional[List[RoutingRule]] = None
+    ):
+        self.default = default
+        self._routes = {DEFAULT_ROUTE: default, **(routes or {})}
+        self.rules = list(rules or [])
+
+    def select(self, endpoint: str, tokens: int) -> ModelRoute:
+        """Rota para uma chamada do `endpoint` com `tokens` (prompt + saída esperada)."""
+        for rule in self.rules:
+            if rule.matches(endpoint, tokens):
+                return self._routes[rule.route]
+        return self.default
+
+    def routes(self) -> List[ModelRoute]:
+        """Todas as rotas (a padrão primeiro)."""
+        return list(self._routes.values())
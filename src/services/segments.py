@@ -0,0 +1,68 @@
+"""
+Geração de capítulos longos em partes.
+
+Um capítulo cuja saída esperada passa do limite de uma chamada é dividido em
+partes de tamanho semelhante. Um plano de cenas (uma chamada curta no modo
+JSON) define o que cada parte cobre; cada parte é gerada com o trecho final
+da anterior, e os textos são unidos no fim.
+"""
+
+import json
+import math
+import re
+from typing import List, Sequence
+
+# Schema do plano de cenas no modo JSON
+PLAN_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "scenes": {"type": "array", "items": {"type": "string"}},
+    },
+    "required": ["scenes"],
+}
+
+# Trecho final da parte anterior enviado no prompt da seguinte
+TAIL_CHARS = 2000
+
+_FENCE_RE = re.compile(r"^\s*```(?:json)?\s*|\s*```\s*$", re.IGNORECASE)
+
+
+def segment_count(expected_tokens: int, segment_tokens: int) -> int:
+    """Partes necessárias para `expected_tokens` de saída (1 = chamada única)."""
+    if segment_tokens <= 0 or expected_tokens <= segment_tokens:
+        return 1
+    return math.ceil(expected_tokens / segment_tokens)
+
+
+def parse_plan_json(text: str) -> List[str]:
+    """
+    Lê as cenas do plano no modo JSON.
+
+    Raises:
+        ValueError: Se a resposta não for JSON com a lista de cenas
+    """
+    data = json.loads(_FENCE_RE.sub("", text))
+    scenes = data.get("scenes") if isinstance(data, dict) else data
+    if not isinstance(scenes, list):
+        raise ValueError("Plano sem a lista de cenas")
+    return [str(scene).strip() for scene in scenes if str(scene).strip()]
+
+
+def distribute(items: Sequence[str], parts: int) -> List[List[str]]:
+    """Divide os itens em `parts` grupos consecutivos de tamanho semelhante."""
+    groups: List[List[str]] = []
+    start = 0
+    for idx in range(parts):
+        end = round(len(items) * (idx + 1) / parts)
+        groups.append(list(items[start:end]))
+        start = end
+    return groups
+
+
+def tail(text: str, max_chars: int = TAIL_CHARS) -> str:
+    """Final do texto, começando em fronteira de palavra."""
+    if len(text) <= max_chars:
+        return text
+    cut = text[-max_chars:]
+    space = cut.find(" ")
+    return cut[space + 1:] if 0 <= space < len(cut) - 1 else cut
@@ -0,0 +1,50 @@
+"""
+Coalescência de chamadas idênticas em andamento (single-flight).
+
+Cliques duplos e retries de clientes enviam o mesmo corpo várias vezes em
+poucos segundos. Enquanto a primeira chamada ao modelo para um prompt está em
+andamento, as seguintes aguardam o mesmo resultado em vez de gerar outra
+chamada.
+"""
+
+import asyncio
+from typing import Awaitable, Callable, Dict, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """Agrupa chamadas concorrentes com a mesma chave em uma única execução."""
+
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.coalesced = 0
+
+    def __len__(self) -> int:
+        return len(self._inflight)
+
+    async def do(self, key: str, func: Callable[[], Awaitable[T]]) -> Tuple[T, bool]:
+        """
+        Executa `func` ou aguarda a execução em andamento com a mesma chave.
+
+        A execução roda em uma task própria: se quem a iniciou desconectar, as
+        demais requisições que aguardam o resultado não são canceladas.
+
+        Returns:
+            Resultado e se ele foi compartilhado com uma chamada já em andamento
+        """
+        task = self._inflight.get(key)
+        shared = task is not None
+        if shared:
+            self.coalesced += 1
+        else:
+            task = asyncio.ensure_future(func())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+        return await asyncio.shield(task), shared
+
+    def _finish(self, key: str, task: asyncio.Task) -> None:
+        self._inflight.pop(key, None)
+        # Marca o erro como tratado mesmo que todos os interessados tenham desistido
+        if not task.cancelled():
+            task.exception()
@@ -0,0 +1,319 @@
+"""
+Estado incremental da história para prompts de continuação.
+
+Em vez de reconstruir o contexto de todos os capítulos anteriores a cada
+requisição, cada projeto mantém um `StoryState` atualizado uma única vez por
+capítulo novo:
+
+- os últimos `recent_chapters` capítulos ficam com detalhe completo
+  (resumo estruturado, início e final do texto);
+- capítulos mais antigos são condensados em uma linha do digest;
+- personagens e locais vão para um registro persistente.
+
+O `assemble_previous_context` monta a seção de capítulos anteriores dentro de
+um orçamento de tokens, descartando primeiro o que é menos importante para a
+continuidade, de forma que o prompt nunca ultrapasse o limite configurado.
+A seção começa pelo digest, que só cresce no fim a cada capítulo: esse início
+é prefixo do contexto dos capítulos seguintes e pode ir para o cache de
+contexto do provedor (`split_previous_context`).
+"""
+
+import logging
+import re
+from dataclasses import dataclass
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from src.models import ChapterDigest, StoryState
+from src.services.tokens import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+# Capítulos com até este tamanho entram inteiros no contexto
+FULL_TEXT_MAX_CHARS = 2000
+OPENING_CHARS = 800
+ENDING_CHARS = 1500
+
+_LEDGER_KEY_RE = re.compile(r"\s*\(.*$")
+
+
+def _ledger_key(entry: str) -> str:
+    """Chave de deduplicação de personagens/locais (nome sem a descrição)."""
+    return _LEDGER_KEY_RE.sub("", entry).strip().lower()
+
+
+def _shorten(text: str, max_chars: int) -> str:
+    """Corta o texto em fronteira de palavra."""
+    text = " ".join(text.split())
+    if len(text) <= max_chars:
+        return text
+    return text[:max_chars].rsplit(" ", 1)[0] + "..."
+
+
+def _merge_ledger(ledger: List[str], entries: List[str]) -> None:
+    """Adiciona entradas ao registro; a descrição mais recente substitui a anterior."""
+    for entry in entries:
+        key = _ledger_key(entry)
+        if not key:
+            continue
+        for idx, existing in enumerate(ledger):
+            if _ledger_key(existing) == key:
+                ledger[idx] = entry
+                break
+        else:
+            ledger.append(entry)
+
+
+class StoryStateBuilder:
+    """Aplica capítulos novos a um StoryState."""
+
+    def __init__(self, recent_chapters: int = 2, digest_chars: int = 500):
+        """
+        Args:
+            recent_chapters: Quantos capítulos finais mantêm detalhe completo
+            digest_chars: Tamanho máximo da linha de digest de cada capítulo antigo
+        """
+        if recent_chapters < 1:
+            raise ValueError("recent_chapters deve ser >= 1")
+        self.recent_chapters = recent_chapters
+        self.digest_chars = digest_chars
+
+    def new_state(self, project_id: str) -> StoryState:
+        """Estado vazio de um projeto."""
+        return StoryState(
+            projectId=project_id,
+            digestCharacters=[],
+            digestLocations=[],
+            updatedAt=datetime.utcnow()
+        )
+
+    def add_chapter(
+        self,
+        state: StoryState,
+        title: str,
+        summary: str,
+        text: Optional[str],
+        brief: str,
+        characters: List[str],
+        locations: List[str],
+        key: Optional[str] = None
+    ) -> StoryState:
+        """
+        Aplica um capítulo ao estado (modifica e retorna o próprio estado).
+
+        Args:
+            state: Estado atual
+            title: Título do capítulo
+            summary: Resumo estruturado (forma compacta, quando disponível)
+            text: Texto gerado (opcional)
+            brief: Resumo curto usado no digest quando o capítulo envelhecer
+            characters: Personagens citados no resumo
+            locations: Locais citados no resumo
+            key: Versão do capítulo salvo (None para capítulos enviados inline)
+        """
+        opening = None
+        ending = None
+        complete = False
+        if text:
+            if len(text) <= FULL_TEXT_MAX_CHARS:
+                ending = text
+                complete = True
+            else:
+                opening = text[:OPENING_CHARS]
+                ending = text[-ENDING_CHARS:]
+
+        if not brief and ending:
+            brief = ending
+
+        state.chapterCount += 1
+        state.recentChapters.append(ChapterDigest(
+            number=state.chapterCount,
+            title=title,
+            summary=summary,
+            brief=_shorten(brief, self.digest_chars),
+            opening=opening,
+            ending=ending,
+            complete=complete,
+            characters=list(characters),
+            locations=list(locations)
+        ))
+        if key is not None:
+            state.chapterKeys.append(key)
+
+        # Capítulos que saem da janela recente viram uma linha do digest
+        while len(state.recentChapters) > self.recent_chapters:
+            old = state.recentChapters.pop(0)
+            state.digest.append(f"Capítulo {old.number}: {old.title} — {old.brief}")
+            if state.digestCharacters is not None and old.characters is not None:
+                _merge_ledger(state.digestCharacters, old.characters)
+            else:
+                state.digestCharacters = None
+            if state.digestLocations is not None and old.locations is not None:
+                _merge_ledger(state.digestLocations, old.locations)
+            else:
+                state.digestLocations = None
+
+        _merge_ledger(state.characters, characters)
+        _merge_ledger(state.locations, locations)
+        state.updatedAt = datetime.utcnow()
+        return state
+
+    def can_rewind(self, state: StoryState, index: int) -> bool:
+        """Indica se o estado pode voltar ao capítulo `index` sem reconstrução total."""
+        first_recent = state.chapterCount - len(state.recentChapters)
+        if index < first_recent:
+            return False
+        # O registro é refeito a partir do digest e dos capítulos mantidos
+        if state.digestCharacters is None or state.digestLocations is None:
+            return False
+        return all(
+            chapter.characters is not None and chapter.locations is not None
+            for chapter in state.recentChapters[:index - first_recent]
+        )
+
+    def rewind(self, state: StoryState, index: int) -> StoryState:
+        """
+        Descarta os capítulos a partir de `index` (base 0) que ainda estão na janela recente.
+
+        Usado quando um capítulo recente foi regravado (ex.: recebeu resumo).
+        Personagens e locais citados só nos capítulos descartados saem do registro.
+        """
+        if not self.can_rewind(state, index):
+            raise ValueError("Capítulo já condensado no digest; reconstrua o estado")
+        first_recent = state.chapterCount - len(state.recentChapters)
+        state.recentChapters = state.recentChapters[:index - first_recent]
+        state.chapterKeys = state.chapterKeys[:index]
+        state.chapterCount = index
+
+        state.characters = list(state.digestCharacters)
+        state.locations = list(state.digestLocations)
+        for chapter in state.recentChapters:
+            _merge_ledger(state.characters, chapter.characters)
+            _merge_ledger(state.locations, chapter.locations)
+        return state
+
+
+@dataclass
+class _Block:
+    """Trecho do contexto com prioridade de descarte (menor = descartado antes)."""
+    text: str
+    priority: float
+    tokens: int = 0
+    # Parte do início estável entre capítulos (cabeçalho e digest)
+    stable: bool = False
+
+
+def _render_chapter_blocks(chapter: ChapterDigest, is_last: bool) -> List[_Block]:
+    """Blocos de um capítulo recente, na ordem de exibição."""
+    blocks = [_Block(f"### Capítulo {chapter.number}: {chapter.title}\n\n", priority=100)]
+
+    if chapter.summary:
+        blocks.append(_Block(
+            f"**Resumo estruturado:**\n{chapter.summary}\n\n",
+            priority=8 if is_last else 5
+        ))
+
+    if chapter.complete and chapter.ending:
+        blocks.append(_Block(
+            f"**Texto completo do capítulo:**\n{chapter.ending}\n\n",
+            priority=9 if is_last else 6
+        ))
+    else:
+        if chapter.opening:
+            blocks.append(_Block(f"**Início do capítulo:**\n{chapter.opening}...\n\n", priority=2))
+        if chapter.ending:
+            blocks.append(_Block(
+                f"**🎯 FINAL DO CAPÍTULO (PONTO DE PARTIDA PARA CONTINUAÇÃO):**\n...{chapter.ending}\n\n",
+                priority=9 if is_last else 6
+            ))
+
+    blocks.append(_Block("---\n\n", priority=100))
+    return blocks
+
+
+def assemble_previous_context(state: StoryState, max_tokens: int) -> str:
+    """Seção de capítulos anteriores dentro de um orçamento de tokens (ver `split_previous_context`)."""
+    return "".join(split_previous_context(state, max_tokens))
+
+
+def split_previous_context(state: StoryState, max_tokens: int) -> Tuple[str, str]:
+    """
+    Monta a seção de capítulos anteriores respeitando um orçamento de tokens.
+
+    Ordem de descarte quando o orçamento estoura: inícios de capítulos, digest
+    (mais antigos primeiro), registro de personagens/locais, resumos e finais
+    dos capítulos recentes mais antigos e, por último, o resumo do último
+    capítulo. Se ainda assim não couber, o final do último capítulo é truncado
+    pela esquerda (preservando as últimas frases).
+
+    Returns:
+        Início estável (cabeçalho e linhas do digest, que só recebem linhas
+        novas no fim) e o restante da seção
+    """
+    header = (
+        "\n\n## 📚 CAPÍTULOS ANTERIORES (CONTEXTO ESSENCIAL):\n\n"
+        "⚠️ **ATENÇÃO**: Este capítulo deve continuar DIRETAMENTE da narrativa abaixo. "
+        "Não ignore nada do que já foi estabelecido.\n\n"
+    )
+    blocks: List[_Block] = [_Block(header, priority=100, stable=True)]
+
+    if state.digest:
+        blocks.append(_Block("### 📜 Capítulos anteriores (resumo condensado):\n", priority=3.9, stable=True))
+        total = len(state.digest)
+        for idx, line in enumerate(state.digest):
+            # Linhas mais antigas saem primeiro
+            blocks.append(_Block(f"- {line}\n", priority=3 + idx / total * 0.8, stable=True))
+        blocks.append(_Block("\n", priority=3.9))
+
+    # O registro muda a cada capítulo (descrições atualizadas): fica depois do digest
+    if state.characters:
+        blocks.append(_Block(
+            "### 🗂️ Personagens estabelecidos:\n" + "\n".join(f"- {c}" for c in state.characters) + "\n\n",
+            priority=4
+        ))
+    if state.locations:
+        blocks.append(_Block(
+            "### 🗺️ Locais estabelecidos:\n" + "\n".join(f"- {l}" for l in state.locations) + "\n\n",
+            priority=4
+        ))
+
+    for idx, chapter in enumerate(state.recentChapters):
+        blocks.extend(_render_chapter_blocks(chapter, idx == len(state.recentChapters) - 1))
+
+    for block in blocks:
+        block.tokens = estimate_tokens(block.text)
+
+    total_tokens = sum(block.tokens for block in blocks)
+    if total_tokens > max_tokens:
+        droppable = sorted(
+            (b for b in blocks if b.priority < 100),
+            key=lambda b: b.priority
+        )
+        # Mantém o bloco mais importante para truncar se necessário
+        keep = droppable.pop() if droppable else None
+        for block in droppable:
+            if total_tokens <= max_tokens:
+                break
+            total_tokens -= block.tokens
+            block.text = ""
+            block.tokens = 0
+
+        if total_tokens > max_tokens and keep is not None:
+            others = total_tokens - keep.tokens
+            available = max(0, max_tokens - others)
+            text = keep.text
+            # Corta pela esquerda até caber (a estimativa não é linear no tamanho)
+            while text and estimate_tokens(text) > available:
+                keep_chars = int(len(text) * available / estimate_tokens(text)) - 8
+                text = "..." + text[-keep_chars:] if keep_chars > 0 else ""
+            keep.text = text
+            keep.tokens = estimate_tokens(text)
+            total_tokens = others + keep.tokens
+
+        logger.info(
+            f"Contexto de continuação reduzido para ~{total_tokens} tokens "
+            f"(orçamento: {max_tokens})"
+        )
+
+    stable = "".join(block.text for block in blocks if block.stable)
+    return stable, "".join(block.text for block in blocks if not block.stable)
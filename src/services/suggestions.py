@@ -0,0 +1,200 @@
+"""
+Sugestões criativas no modo JSON, deduplicação e histórico.
+
+O modelo responde um objeto `{"suggestions": [{"text", "description"}]}`
+restrito por `SUGGESTIONS_SCHEMA`, lido diretamente em `CreativeSuggestion`.
+Itens inválidos são descartados um a um (sem perder o restante da resposta).
+
+Sugestões quase idênticas ("A Última Estrela" / "A Última Estrela Cadente")
+são descartadas pela similaridade de Jaccard entre os shingles de caracteres
+do texto normalizado (minúsculas, sem acentos e pontuação). O histórico guarda
+as sugestões já servidas por projeto e tipo, para que chamadas repetidas não
+as devolvam de novo.
+"""
+
+import json
+import re
+import unicodedata
+from collections import OrderedDict, deque
+from functools import lru_cache
+from typing import Deque, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+from src.models import CreativeSuggestion
+
+# Schema da resposta no modo JSON (subconjunto OpenAPI aceito pelo Gemini)
+SUGGESTIONS_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "suggestions": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "text": {"type": "string"},
+                    "description": {"type": "string"},
+                },
+                "required": ["text", "description"],
+            },
+        },
+    },
+    "required": ["suggestions"],
+}
+
+_FENCE_RE = re.compile(r"^\s*```(?:json)?\s*|\s*```\s*$", re.IGNORECASE)
+_WORD_RE = re.compile(r"\w+")
+
+# Tamanho dos shingles de caracteres e similaridade (Jaccard) a partir da qual
+# duas sugestões contam como a mesma
+SHINGLE_SIZE = 3
+NEAR_DUPLICATE_THRESHOLD = 0.6
+
+
+def parse_suggestions_json(text: str) -> List[CreativeSuggestion]:
+    """
+    Lê as sugestões da resposta do modo JSON.
+
+    Raises:
+        ValueError: Se a resposta não for JSON
+    """
+    data = json.loads(_FENCE_RE.sub("", text))
+    items = data.get("suggestions") if isinstance(data, dict) else data
+    if not isinstance(items, list):
+        raise ValueError("Resposta sem a lista de sugestões")
+
+    suggestions = []
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        suggestion_text = str(item.get("text") or "").strip()
+        if not suggestion_text:
+            continue
+        description = str(item.get("description") or "").strip()
+        suggestions.append(CreativeSuggestion(text=suggestion_text, description=description or None))
+    return suggestions
+
+
+# Em cache: o histórico do projeto é reindexado a cada requisição
+@lru_cache(maxsize=4096)
+def normalize_suggestion(text: str) -> str:
+    """Minúsculas, sem acentos e pontuação, com espaços simples."""
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return " ".join(_WORD_RE.findall(stripped))
+
+
+@lru_cache(maxsize=4096)
+def shingles(text: str, size: int = SHINGLE_SIZE) -> FrozenSet[str]:
+    """Shingles de `size` caracteres do texto normalizado."""
+    normalized = normalize_suggestion(text)
+    if len(normalized) <= size:
+        return frozenset([normalized])
+    return frozenset(normalized[idx:idx + size] for idx in range(len(normalized) - size + 1))
+
+
+class SuggestionIndex:
+    """
+    Índice invertido (shingle -> sugestões) das sugestões aceitas.
+
+    Cada sugestão nova só é comparada às que têm algum shingle em comum, e a
+    interseção sai da contagem nas listas do índice.
+    """
+
+    def __init__(
+        self,
+        suggestions: Iterable[CreativeSuggestion] = (),
+        threshold: float = NEAR_DUPLICATE_THRESHOLD
+    ):
+        self.threshold = threshold
+        self._keys: Set[str] = set()
+        self._sizes: List[int] = []
+        self._postings: Dict[str, List[int]] = {}
+        for suggestion in suggestions:
+            self._add(normalize_suggestion(suggestion.text), shingles(suggestion.text))
+
+    def _add(self, key: str, items: FrozenSet[str]) -> None:
+        idx = len(self._sizes)
+        self._keys.add(key)
+        self._sizes.append(len(items))
+        for item in items:
+            self._postings.setdefault(item, []).append(idx)
+
+    def add(self, suggestion: CreativeSuggestion) -> bool:
+        """Registra a sugestão; False (sem registrar) se ela repete uma já aceita."""
+        key = normalize_suggestion(suggestion.text)
+        if not key or key in self._keys:
+            return False
+        items = shingles(suggestion.text)
+        common: Dict[int, int] = {}
+        for item in items:
+            for idx in self._postings.get(item, ()):
+                common[idx] = common.get(idx, 0) + 1
+        size = len(items)
+        for idx, shared in common.items():
+            # Jaccard >= threshold  <=>  |A ∩ B| >= threshold * |A ∪ B|
+            if shared >= self.threshold * (size + self._sizes[idx] - shared):
+                return False
+        self._add(key, items)
+        return True
+
+
+def merge_suggestions(
+    current: List[CreativeSuggestion],
+    new: Iterable[CreativeSuggestion],
+    count: int,
+    exclude: Iterable[CreativeSuggestion] = ()
+) -> List[CreativeSuggestion]:
+    """
+    Acrescenta sugestões novas até `count` itens.
+
+    Descarta as quase idênticas às já presentes, entre si e às de `exclude`
+    (ex.: o histórico do projeto).
+    """
+    merged = list(current)
+    index = SuggestionIndex([*merged, *exclude])
+    for suggestion in new:
+        if len(merged) >= count:
+            break
+        if index.add(suggestion):
+            merged.append(suggestion)
+    return merged
+
+
+class SuggestionHistory:
+    """
+    Sugestões já servidas por projeto e tipo (em memória, por worker).
+
+    Guarda as `max_items` mais recentes de cada projeto/tipo; os projetos
+    menos usados saem quando há mais de `max_projects`.
+    """
+
+    def __init__(self, max_items: int = 200, max_projects: int = 1024):
+        self.max_items = max_items
+        self.max_projects = max_projects
+        self._entries: "OrderedDict[Tuple[str, str], Deque[CreativeSuggestion]]" = OrderedDict()
+
+    def get(self, project_id: Optional[str], suggestion_type: str) -> List[CreativeSuggestion]:
+        """Sugestões servidas, da mais antiga para a mais recente."""
+        if not project_id:
+            return []
+        entry = self._entries.get((project_id, suggestion_type))
+        if entry is None:
+            return []
+        self._entries.move_to_end((project_id, suggestion_type))
+        return list(entry)
+
+    def add(
+        self,
+        project_id: Optional[str],
+        suggestion_type: str,
+        suggestions: Iterable[CreativeSuggestion]
+    ) -> None:
+        if not project_id or self.max_items <= 0:
+            return
+        key = (project_id, suggestion_type)
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = self._entries[key] = deque(maxlen=self.max_items)
+        self._entries.move_to_end(key)
+        entry.extend(suggestions)
+        while len(self._entries) > self.max_projects:
+            self._entries.popitem(last=False)
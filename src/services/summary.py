@@ -0,0 +1,108 @@
+"""
+Resumo estruturado de capítulos.
+
+O resumo tem cinco seções (narrativa, personagens, ambientações,
+eventos-chave e estado final). Com o modo JSON do modelo, a resposta já
+chega nesses campos (`SUMMARY_SCHEMA`); respostas em texto com marcadores
+`[RESUMO]`, `[PERSONAGENS]`... são lidas pelo parser de regex.
+
+A forma compacta (`compact_summary`) omite personagens e ambientações, que já
+ficam no registro do estado da história, e é a usada nos prompts de
+continuação.
+"""
+
+import json
+import re
+from typing import Dict, List
+
+from src.models import ChapterSummary
+
+# Schema da resposta no modo JSON (subconjunto OpenAPI aceito pelo Gemini)
+SUMMARY_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "summary": {"type": "string"},
+        "characters": {"type": "array", "items": {"type": "string"}},
+        "settings": {"type": "array", "items": {"type": "string"}},
+        "keyEvents": {"type": "array", "items": {"type": "string"}},
+        "endingState": {"type": "string"},
+    },
+    "required": ["summary", "characters", "settings", "keyEvents", "endingState"],
+}
+
+# Marcador de cada seção -> campo do ChapterSummary
+_SECTIONS = {
+    "RESUMO": "summary",
+    "PERSONAGENS": "characters",
+    "AMBIENTAÇÕES": "settings",
+    "EVENTOS-CHAVE": "keyEvents",
+    "ESTADO FINAL": "endingState",
+}
+_LIST_FIELDS = {"characters", "settings", "keyEvents"}
+
+_SECTION_RE = re.compile(r"\[(" + "|".join(map(re.escape, _SECTIONS)) + r")\]", re.IGNORECASE)
+_ITEM_RE = re.compile(r"^\s*(?:[-•*]|\d+[.)])\s*(.+?)\s*$", re.MULTILINE)
+_FENCE_RE = re.compile(r"^\s*```(?:json)?\s*|\s*```\s*$", re.IGNORECASE)
+
+
+def parse_summary_text(text: str) -> ChapterSummary:
+    """
+    Lê um resumo no formato de marcadores.
+
+    As seções podem vir em qualquer ordem; seções ausentes ficam vazias.
+    Sem nenhum marcador, o texto inteiro vira a narrativa.
+    """
+    parts = _SECTION_RE.split(text)
+    if len(parts) == 1:
+        return ChapterSummary(summary=text.strip())
+
+    fields: Dict[str, object] = {}
+    # split com grupo: [antes, marcador, conteúdo, marcador, conteúdo, ...]
+    for marker, content in zip(parts[1::2], parts[2::2]):
+        field = _SECTIONS[marker.upper()]
+        content = content.strip()
+        if field in _LIST_FIELDS:
+            fields[field] = [item for item in _ITEM_RE.findall(content) if item]
+        else:
+            fields[field] = content
+    return ChapterSummary(**fields)
+
+
+def parse_summary_json(text: str) -> ChapterSummary:
+    """
+    Lê a resposta do modo JSON.
+
+    Raises:
+        ValueError: Se a resposta não for um objeto JSON com os campos do resumo
+    """
+    data = json.loads(_FENCE_RE.sub("", text))
+    if not isinstance(data, dict):
+        raise ValueError("Resumo em JSON não é um objeto")
+    return ChapterSummary.model_validate(data)
+
+
+def _list_section(items: List[str], numbered: bool = False) -> str:
+    if numbered:
+        return "\n".join(f"{idx}. {item}" for idx, item in enumerate(items, start=1))
+    return "\n".join(f"- {item}" for item in items)
+
+
+def render_summary_text(summary: ChapterSummary) -> str:
+    """Resumo completo no formato de marcadores (o mesmo das respostas em texto)."""
+    return (
+        f"[RESUMO]\n{summary.summary}\n\n"
+        f"[PERSONAGENS]\n{_list_section(summary.characters)}\n\n"
+        f"[AMBIENTAÇÕES]\n{_list_section(summary.settings)}\n\n"
+        f"[EVENTOS-CHAVE]\n{_list_section(summary.keyEvents, numbered=True)}\n\n"
+        f"[ESTADO FINAL]\n{summary.endingState}"
+    )
+
+
+def compact_summary(summary: ChapterSummary) -> str:
+    """Narrativa, eventos-chave e estado final (sem personagens e ambientações)."""
+    sections = [f"[RESUMO]\n{summary.summary}"]
+    if summary.keyEvents:
+        sections.append(f"[EVENTOS-CHAVE]\n{_list_section(summary.keyEvents, numbered=True)}")
+    if summary.endingState:
+        sections.append(f"[ESTADO FINAL]\n{summary.endingState}")
+    return "\n\n".join(sections)
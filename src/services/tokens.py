@@ -0,0 +1,154 @@
+"""
+Contagem e estimativa de tokens.
+
+A estimativa local é usada antes da chamada ao modelo (pré-checagem de
+limites e orçamento de prompts); a contagem real vem do `usage_metadata`
+devolvido pelo Gemini.
+"""
+
+import re
+from typing import Any, Callable, Iterable, List, Optional
+
+from src.models import TokenUsage
+
+# Palavras ou sinais de pontuação isolados
+_PIECE_RE = re.compile(r"\w+|[^\w\s]")
+
+# Tokenizadores de subpalavra costumam quebrar palavras longas a cada ~4 caracteres
+_CHARS_PER_SUBWORD = 4
+
+# Níveis de quebra do texto, do mais ao menos preferido: parágrafos, frases, palavras
+_SPLIT_LEVELS = (
+    (re.compile(r"\n\s*\n"), "\n\n"),
+    (re.compile(r"(?<=[.!?…])\s+"), " "),
+    (re.compile(r"\s+"), " "),
+)
+
+# Extensão de referência dos capítulos e média de tokens por palavra gerada
+WORDS_PER_PAGE = 250
+TOKENS_PER_WORD = 1.4
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimativa local e rápida de tokens.
+
+    Conta cada sinal de pontuação como um token e cada palavra como um token
+    a cada ~4 caracteres. Tende a superestimar levemente, o que é desejável
+    para checagens de limite.
+    """
+    if not text:
+        return 0
+    tokens = 0
+    for piece in _PIECE_RE.findall(text):
+        tokens += 1 + (len(piece) - 1) // _CHARS_PER_SUBWORD
+    return tokens
+
+
+def expected_output_tokens(length_in_pages: int) -> int:
+    """Tokens de saída esperados para um capítulo de `length_in_pages` páginas."""
+    return int(length_in_pages * WORDS_PER_PAGE * TOKENS_PER_WORD)
+
+
+def pack_by_tokens(
+    units: Iterable[str],
+    max_tokens: int,
+    count_tokens: Callable[[str], int] = estimate_tokens
+) -> List[List[str]]:
+    """
+    Agrupa unidades consecutivas em grupos de até `max_tokens` (guloso).
+
+    Unidades maiores que o limite ficam sozinhas em um grupo.
+    """
+    groups: List[List[str]] = []
+    current: List[str] = []
+    size = 0
+    for unit in units:
+        tokens = count_tokens(unit)
+        if current and size + tokens > max_tokens:
+            groups.append(current)
+            current, size = [], 0
+        current.append(unit)
+        size += tokens
+    if current:
+        groups.append(current)
+    return groups
+
+
+def split_by_tokens(
+    text: str,
+    max_tokens: int,
+    count_tokens: Callable[[str], int] = estimate_tokens,
+    _level: int = 0
+) -> List[str]:
+    """
+    Divide o texto em trechos de até ~`max_tokens`, na ordem original.
+
+    Quebra em parágrafos; parágrafos maiores que o limite são quebrados em
+    frases e, em último caso, em palavras.
+    """
+    pattern, separator = _SPLIT_LEVELS[_level]
+    units: List[str] = []
+    for unit in pattern.split(text):
+        unit = unit.strip()
+        if not unit:
+            continue
+        if count_tokens(unit) > max_tokens and _level + 1 < len(_SPLIT_LEVELS):
+            units.extend(split_by_tokens(unit, max_tokens, count_tokens, _level + 1))
+        else:
+            units.append(unit)
+    return [separator.join(group) for group in pack_by_tokens(units, max_tokens, count_tokens)]
+
+
+def sum_usage(usages: Iterable[TokenUsage]) -> TokenUsage:
+    """Soma o consumo de várias chamadas ao modelo."""
+    usages = list(usages)
+    return TokenUsage(
+        promptTokens=sum(u.promptTokens for u in usages),
+        completionTokens=sum(u.completionTokens for u in usages),
+        totalTokens=sum(u.totalTokens for u in usages),
+        cachedTokens=sum(u.cachedTokens for u in usages),
+        estimated=any(u.estimated for u in usages)
+    )
+
+
+def usage_from_metadata(
+    usage_metadata: Any,
+    prompt: str,
+    completion: str
+) -> TokenUsage:
+    """
+    Monta o TokenUsage a partir do `usage_metadata` do Gemini.
+
+    Se o provedor não informar a contagem, usa a estimativa local para o
+    prompt e para a resposta (marcando `estimated=True`).
+    """
+    prompt_tokens = _get_count(usage_metadata, "prompt_token_count")
+    completion_tokens = _get_count(usage_metadata, "candidates_token_count")
+
+    if prompt_tokens is None or completion_tokens is None:
+        prompt_tokens = estimate_tokens(prompt)
+        completion_tokens = estimate_tokens(completion)
+        return TokenUsage(
+            promptTokens=prompt_tokens,
+            completionTokens=completion_tokens,
+            totalTokens=prompt_tokens + completion_tokens,
+            estimated=True
+        )
+
+    total_tokens = _get_count(usage_metadata, "total_token_count")
+    return TokenUsage(
+        promptTokens=prompt_tokens,
+        completionTokens=completion_tokens,
+        totalTokens=total_tokens if total_tokens is not None else prompt_tokens + completion_tokens,
+        cachedTokens=_get_count(usage_metadata, "cached_content_token_count") or 0,
+        estimated=False
+    )
+
+
+def _get_count(usage_metadata: Any, field: str) -> Optional[int]:
+    """Lê um contador do usage_metadata (None se ausente; zero é uma contagem válida)."""
+    if usage_metadata is None:
+        return None
+    value = getattr(usage_metadata, field, None)
+    return int(value) if value is not None else None
@@ -0,0 +1,46 @@
+"""Fixtures dos testes."""
+
+import sys
+from pathlib import Path
+from typing import Callable, Iterator
+
+import pytest
+
+# Permite rodar os testes a partir da raiz do repositório
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+# Configuração da API nos testes: backend fake e tudo em memória
+_TEST_ENV = {
+    "AI_BACKEND": "fake",
+    "CACHE_BACKEND": "memory",
+    "PROJECT_STORE_BACKEND": "memory",
+    "JOB_STORE_BACKEND": "memory",
+    "RATE_LIMIT_BACKEND": "memory",
+    "CONTEXT_CACHE_TTL_SECONDS": "0",
+    "RETRY_BASE_DELAY_SECONDS": "0",
+    "LOG_LEVEL": "WARNING",
+}
+
+
+@pytest.fixture
+def make_client(monkeypatch) -> Iterator[Callable[..., TestClient]]:
+    """Cria um TestClient da API com o ambiente dos testes e `overrides` (variáveis de ambiente)."""
+    import main
+
+    clients = []
+
+    def factory(**overrides: str) -> TestClient:
+        for name, value in {**_TEST_ENV, **overrides}.items():
+            monkeypatch.setenv(name, value)
+        client = TestClient(main.app)
+        client.__enter__()
+        clients.append(client)
+        return client
+
+    yield factory
+    for client in clients:
+        client.__exit__(None, None, None)
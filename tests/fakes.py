@@ -0,0 +1,30 @@
+"""Backends fake com falhas controladas."""
+
+from typing import Callable, Optional
+
+from google.api_core import exceptions as google_exceptions
+
+from src.services.model_backend import FakeBackend
+
+
+def service_unavailable() -> Exception:
+    return google_exceptions.ServiceUnavailable("Falha injetada no teste")
+
+
+class FlakyBackend(FakeBackend):
+    """FakeBackend cujas `failures` primeiras chamadas falham com `error()` (None = todas)."""
+
+    def __init__(
+        self,
+        failures: Optional[int] = None,
+        error: Callable[[], Exception] = service_unavailable,
+        **kwargs
+    ):
+        super().__init__(**kwargs)
+        self.failures = failures
+        self.error = error
+
+    async def _before_first_token(self) -> None:
+        await super()._before_first_token()
+        if self.failures is None or self.calls <= self.failures:
+            raise self.error()
@@ -0,0 +1,117 @@
+"""Geração de livro completo: conclusão, cancelamento e encerramento do servidor."""
+
+import asyncio
+
+from src.models import ChapterPlan, GenerateChapterRequest
+from src.services.ai_service import AIService
+from src.services.book_pipeline import BookPipeline
+from src.services.jobs import MemoryJobStore
+from src.services.model_backend import FakeBackend
+from src.services.project_store import MemoryProjectStore
+
+
+def make_pipeline(latency: float = 0.0) -> BookPipeline:
+    service = AIService(
+        backend=FakeBackend(latency=latency, output_words=50),
+        project_store=MemoryProjectStore(),
+    )
+    return BookPipeline(service, MemoryJobStore())
+
+
+def book_request() -> GenerateChapterRequest:
+    return GenerateChapterRequest(
+        projectId="p1",
+        chapterId="c1",
+        projectTitle="O Farol",
+        chapterTitle="A Chegada",
+        chapterSummary="Ana chega à ilha",
+        tone="sombrio",
+        writingStyle="conciso",
+        setting="Ilha do norte",
+        lengthInPages=1,
+        mode="full",
+        nextChapters=[ChapterPlan(chapterId="c2", chapterTitle="A Noite", chapterSummary="O farol acende")],
+    )
+
+
+async def _wait_running(pipeline: BookPipeline, job_id: str) -> None:
+    while pipeline.job_store.get_job(job_id).status != "running":
+        await asyncio.sleep(0)
+
+
+def test_book_completes_all_chapters():
+    pipeline = make_pipeline()
+
+    async def run():
+        job = pipeline.start(book_request())
+        await pipeline._tasks[job.jobId]
+        return pipeline.job_store.get_job(job.jobId)
+
+    job = asyncio.run(run())
+
+    assert job.status == "completed"
+    assert job.completedChapterIds == ["c1", "c2"]
+
+
+def test_cancel_marks_job_cancelled():
+    pipeline = make_pipeline(latency=10)
+
+    async def run():
+        job = pipeline.start(book_request())
+        await _wait_running(pipeline, job.jobId)
+        task = pipeline._tasks[job.jobId]
+        pipeline.cancel(job.jobId)
+        await asyncio.gather(task, return_exceptions=True)
+        return pipeline.job_store.get_job(job.jobId)
+
+    assert asyncio.run(run()).status == "cancelled"
+
+
+def test_shutdown_marks_job_interrupted_and_resumable():
+    pipeline = make_pipeline(latency=10)
+
+    async def run():
+        job = pipeline.start(book_request())
+        await _wait_running(pipeline, job.jobId)
+        await pipeline.stop()
+        return pipeline.job_store.get_job(job.jobId)
+
+    job = asyncio.run(run())
+
+    assert job.status == "interrupted"
+    assert job.currentChapterId is None
+    assert not pipeline._tasks
+
+    resumed = make_pipeline()
+    resumed.job_store = pipeline.job_store
+
+    async def resume():
+        resumed.resume(job.jobId)
+        await resumed._tasks[job.jobId]
+        return resumed.job_store.get_job(job.jobId)
+
+    assert asyncio.run(resume()).status == "completed"
+
+
+def test_cancel_before_the_job_starts_marks_it_cancelled():
+    pipeline = make_pipeline()
+
+    async def run():
+        job = pipeline.start(book_request())
+        task = pipeline._tasks[job.jobId]
+        pipeline.cancel(job.jobId)
+        await asyncio.gather(task, return_exceptions=True)
+        return pipeline.job_store.get_job(job.jobId)
+
+    assert asyncio.run(run()).status == "cancelled"
+
+
+def test_shutdown_before_the_job_starts_marks_it_interrupted():
+    pipeline = make_pipeline()
+
+    async def run():
+        job = pipeline.start(book_request())
+        await pipeline.stop()
+        return pipeline.job_store.get_job(job.jobId)
+
+    assert asyncio.run(run()).status == "interrupted"
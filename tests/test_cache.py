@@ -0,0 +1,120 @@
+"""Cache de respostas: chaves, TTL, despejo LRU e backend SQLite."""
+
+import asyncio
+import threading
+
+import pytest
+
+from fakes import FlakyBackend
+
+from src.models import CreativeSuggestionsRequest
+from src.services.ai_service import AIService
+from src.services.cache import MemoryCache, SQLiteCache, create_cache, make_cache_key
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_cache(request, tmp_path):
+    """Fábrica de caches de cada backend (SQLite em arquivo temporário)."""
+    def factory(max_entries: int = 100, default_ttl=3600.0):
+        if request.param == "memory":
+            return MemoryCache(max_entries=max_entries, default_ttl=default_ttl)
+        return SQLiteCache(path=str(tmp_path / "cache.db"), max_entries=max_entries, default_ttl=default_ttl)
+    return factory
+
+
+def test_cache_key_depends_on_prompt_model_and_config():
+    config = {"temperature": 0.7, "top_k": 40}
+    key = make_cache_key("prompt", "modelo", config)
+    assert key == make_cache_key("prompt", "modelo", {"top_k": 40, "temperature": 0.7})
+    assert key != make_cache_key("prompt 2", "modelo", config)
+    assert key != make_cache_key("prompt", "outro", config)
+    assert key != make_cache_key("prompt", "modelo", {**config, "temperature": 0.8})
+
+
+def test_get_set_and_counters(make_cache):
+    cache = make_cache()
+    assert run(cache.get("a")) is None
+    run(cache.set("a", {"text": "olá"}))
+    assert run(cache.get("a")) == {"text": "olá"}
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 1, 1)
+
+
+def test_expired_entries_are_not_served(make_cache):
+    cache = make_cache(default_ttl=0)
+    run(cache.set("a", {"text": "velho"}))
+    run(cache.set("b", {"text": "sem expiração"}, ttl=None))
+    assert run(cache.get("a")) is None
+    assert run(cache.get("b")) == {"text": "sem expiração"}
+
+
+def test_evicts_least_recently_used(make_cache):
+    cache = make_cache(max_entries=3)
+    for key in ("a", "b", "c"):
+        run(cache.set(key, {"text": key}))
+    # "a" acessada: a menos usada passa a ser "b"
+    assert run(cache.get("a")) is not None
+    run(cache.set("d", {"text": "d"}))
+    assert cache.size() == 3
+    assert run(cache.get("b")) is None
+    assert all(run(cache.get(key)) is not None for key in ("a", "c", "d"))
+
+
+def test_replacing_a_key_does_not_evict(make_cache):
+    cache = make_cache(max_entries=2)
+    run(cache.set("a", {"text": "1"}))
+    run(cache.set("b", {"text": "1"}))
+    run(cache.set("a", {"text": "2"}))
+    assert cache.size() == 2
+    assert run(cache.get("a")) == {"text": "2"}
+    assert run(cache.get("b")) is not None
+
+
+def test_sqlite_cache_persists_across_instances(tmp_path):
+    path = str(tmp_path / "cache.db")
+    run(SQLiteCache(path=path).set("a", {"text": "persistido"}, ttl=None))
+    assert run(SQLiteCache(path=path).get("a")) == {"text": "persistido"}
+
+
+def test_sqlite_io_runs_off_the_event_loop(tmp_path):
+    threads = []
+
+    class RecordingCache(SQLiteCache):
+        def _get(self, key):
+            threads.append(threading.get_ident())
+            return super()._get(key)
+
+    cache = RecordingCache(path=str(tmp_path / "cache.db"))
+
+    async def main():
+        await cache.get("a")
+        return threading.get_ident()
+
+    loop_thread = run(main())
+    assert threads and threads[0] != loop_thread
+
+
+def test_create_cache_backends(tmp_path):
+    assert create_cache("none") is None
+    assert isinstance(create_cache("memory"), MemoryCache)
+    assert isinstance(create_cache("sqlite", path=str(tmp_path / "c.db")), SQLiteCache)
+    with pytest.raises(ValueError):
+        create_cache("redis")
+
+
+def test_service_serves_repeated_requests_from_cache():
+    backend = FlakyBackend(failures=0)
+    service = AIService(backend=backend, cache=MemoryCache())
+    request = CreativeSuggestionsRequest(type="title", context="piratas", genre="ficção", tone="leve", count=3)
+
+    first = run(service.generate_creative_suggestions(request))
+    second = run(service.generate_creative_suggestions(request))
+    assert backend.calls == 1
+    assert second.suggestions == first.suggestions
+
+    run(service.generate_creative_suggestions(request, bypass_cache=True))
+    assert backend.calls == 2
@@ -0,0 +1,167 @@
+"""Cache de contexto no provedor: criação sob o limite de concorrência e o deadline."""
+
+import asyncio
+
+import pytest
+
+from src.models import GenerateChapterRequest
+from src.services.ai_service import AIService
+from src.services.context_cache import ContextPrefix
+from src.services.model_backend import FakeBackend
+from src.services.project_store import MemoryProjectStore
+from src.services.prompts import PromptLibrary
+from src.services.resilience import ModelUnavailableError, RetryPolicy
+
+PREFIX = "Contexto dos capítulos anteriores. " * 20
+CONTEXT = ContextPrefix("project:p1", PREFIX, frozenset({"c1"}))
+
+
+class ContextBackend(FakeBackend):
+    """Registra se a vaga de concorrência estava ocupada ao criar o contexto."""
+
+    def __init__(self, create_delay: float = 0.0):
+        super().__init__()
+        self.create_delay = create_delay
+        self.service = None
+        self.semaphore_held = []
+        self.used_contexts = []
+
+    async def create_context_cache(self, text, ttl):
+        self.semaphore_held.append(self.service._semaphore.locked())
+        await asyncio.sleep(self.create_delay)
+        return await super().create_context_cache(text, ttl)
+
+    async def generate(self, prompt, cached_context=None, response_schema=None):
+        self.used_contexts.append(cached_context)
+        return await super().generate(prompt, cached_context, response_schema)
+
+
+def make_service(create_delay: float = 0.0):
+    backend = ContextBackend(create_delay)
+    service = AIService(
+        backend=backend,
+        context_cache_ttl=600,
+        context_cache_min_tokens=1,
+        max_concurrent_requests=1,
+        retry_policy=RetryPolicy(max_attempts=1, base_delay=0),
+    )
+    backend.service = service
+    return service, backend
+
+
+def test_context_created_on_second_use_inside_the_semaphore():
+    service, backend = make_service()
+
+    async def run():
+        await service._generate_content(PREFIX + "pedido 1", context=CONTEXT)
+        await service._generate_content(PREFIX + "pedido 2", context=CONTEXT)
+
+    asyncio.run(run())
+
+    assert backend.semaphore_held == [True]
+    assert list(backend.contexts.values()) == [PREFIX]
+
+
+def test_context_creation_counts_in_the_call_deadline():
+    service, backend = make_service(create_delay=1.0)
+
+    async def run():
+        await service._generate_content(PREFIX + "pedido 1", context=CONTEXT)
+        with pytest.raises(ModelUnavailableError):
+            await service._generate_content(PREFIX + "pedido 2", deadline=0.05, context=CONTEXT)
+
+    asyncio.run(run())
+
+    assert backend.contexts == {}
+
+
+def test_stream_creates_context_inside_the_semaphore():
+    service, backend = make_service()
+
+    async def run():
+        for idx in range(2):
+            async for _ in service._stream_content(PREFIX + f"pedido {idx}", context=CONTEXT):
+                pass
+
+    asyncio.run(run())
+
+    assert backend.semaphore_held == [True]
+
+
+def project_service(version: str):
+    backend = ContextBackend()
+    store = MemoryProjectStore()
+    for idx in range(1, 4):
+        store.save_chapter("p1", f"c{idx}", f"Capítulo {idx}", f"Texto do capítulo {idx}. " * 20)
+    service = AIService(
+        backend=backend,
+        project_store=store,
+        prompts=PromptLibrary(version),
+        story_recent_chapters=1,
+        context_cache_ttl=600,
+        context_cache_min_tokens=1,
+    )
+    backend.service = service
+    return service, backend
+
+
+def continuation_request(number: int) -> GenerateChapterRequest:
+    return GenerateChapterRequest(
+        projectId="p1",
+        chapterId=f"c{number}",
+        projectTitle="O Farol",
+        chapterTitle=f"Capítulo {number}",
+        chapterSummary=f"Resumo do capítulo {number}",
+        tone="sombrio",
+        writingStyle="conciso",
+        setting="Ilha do norte",
+        previousChapterIds=[f"c{idx}" for idx in range(1, number)],
+    )
+
+
+def test_next_chapter_reuses_the_project_context():
+    service, backend = project_service("v2")
+
+    async def run():
+        # Capítulo 4 duas vezes: o contexto é criado no segundo uso do prefixo
+        for _ in range(2):
+            await service.generate_chapter(continuation_request(4))
+        created = list(backend.contexts)
+        backend.used_contexts.clear()
+        await service.generate_chapter(continuation_request(5))
+        return created
+
+    created = asyncio.run(run())
+
+    assert len(created) == 1
+    assert backend.used_contexts == created
+    _, context = service._build_chapter_prompt_parts(continuation_request(5))
+    assert context.text.startswith(backend.contexts[created[0]])
+
+
+def test_v1_chapter_prompt_has_no_project_context():
+    service, _ = project_service("v1")
+
+    prompt, context = service._build_chapter_prompt_parts(continuation_request(4))
+
+    assert "CAPÍTULOS ANTERIORES" in prompt
+    assert context is None
+
+
+def test_first_chapter_has_no_cacheable_prefix():
+    service, _ = make_service()
+    request = GenerateChapterRequest(
+        projectId="p1",
+        chapterId="c1",
+        projectTitle="O Farol",
+        chapterTitle="A Chegada",
+        chapterSummary="Ana chega à ilha",
+        tone="sombrio",
+        writingStyle="conciso",
+        setting="Ilha do norte",
+    )
+
+    prompt, context = service._build_chapter_prompt_parts(request)
+
+    assert prompt
+    assert context is None
@@ -0,0 +1,52 @@
+"""Armazenamento de tarefas compartilhado entre workers: heartbeat e retomada."""
+
+import time
+
+from src.services.jobs import SQLiteJobStore
+
+
+def worker(path, heartbeat_timeout=60.0) -> SQLiteJobStore:
+    return SQLiteJobStore(path=str(path), heartbeat_timeout=heartbeat_timeout)
+
+
+def test_startup_keeps_jobs_of_live_workers(tmp_path):
+    path = tmp_path / "jobs.db"
+    first = worker(path)
+    job = first.create_job("chapter", {"chapterId": "c1"})
+    first.update_job(job, status="running")
+
+    assert worker(path).mark_interrupted() == 0
+    assert first.get_job(job.jobId).status == "running"
+
+
+def test_startup_reclaims_jobs_without_heartbeat(tmp_path):
+    path = tmp_path / "jobs.db"
+    first = worker(path)
+    job = first.create_job("chapter", {"chapterId": "c1"})
+    first.update_job(job, status="running")
+    time.sleep(0.02)
+
+    assert worker(path, heartbeat_timeout=0.01).mark_interrupted() == 1
+    assert first.get_job(job.jobId).status == "interrupted"
+
+
+def test_heartbeat_keeps_long_jobs_alive(tmp_path):
+    path = tmp_path / "jobs.db"
+    first = worker(path)
+    job = first.create_job("chapter", {"chapterId": "c1"})
+    time.sleep(0.05)
+    first.heartbeat()
+
+    assert worker(path, heartbeat_timeout=0.04).mark_interrupted() == 0
+
+
+def test_interrupted_job_is_claimed_by_a_single_worker(tmp_path):
+    path = tmp_path / "jobs.db"
+    first, second = worker(path), worker(path)
+    job = first.create_job("chapter", {"chapterId": "c1"})
+    first.update_job(job, status="interrupted")
+
+    claims = [first.claim_interrupted("chapter"), second.claim_interrupted("chapter")]
+
+    assert sorted(len(claimed) for claimed in claims) == [0, 1]
+    assert first.get_job(job.jobId).status == "pending"
@@ -0,0 +1,59 @@
+"""Armazenamento de projetos: IO em disco fora do event loop."""
+
+import asyncio
+import threading
+
+from src.models import GenerateChapterRequest, SummarizeRequest
+from src.services.ai_service import AIService
+from src.services.model_backend import FakeBackend
+from src.services.project_store import SQLiteProjectStore
+
+
+class ThreadRecordingStore(SQLiteProjectStore):
+    """Registra a thread de cada leitura e gravação."""
+
+    def __init__(self, path):
+        super().__init__(path)
+        self.threads = []
+
+    def _upsert(self, chapter):
+        self.threads.append(threading.get_ident())
+        super()._upsert(chapter)
+
+    def chapter_versions(self, project_id):
+        self.threads.append(threading.get_ident())
+        return super().chapter_versions(project_id)
+
+
+def chapter_request(chapter_id: str, previous=()) -> GenerateChapterRequest:
+    return GenerateChapterRequest(
+        projectId="p1",
+        chapterId=chapter_id,
+        projectTitle="O Farol",
+        chapterTitle="A Chegada",
+        chapterSummary="Ana chega à ilha",
+        tone="sombrio",
+        writingStyle="conciso",
+        setting="Ilha do norte",
+        previousChapterIds=list(previous),
+    )
+
+
+def test_sqlite_store_io_runs_outside_the_event_loop(tmp_path):
+    store = ThreadRecordingStore(str(tmp_path / "projects.db"))
+    service = AIService(backend=FakeBackend(output_words=50), project_store=store)
+
+    async def run():
+        await service.generate_chapter(chapter_request("c1"))
+        await service.generate_chapter(chapter_request("c2", previous=["c1"]))
+        await service.summarize_chapter(SummarizeRequest(
+            chapterText="Ana subiu a escada do farol devagar. " * 10,
+            projectId="p1",
+            chapterId="c1",
+        ))
+        return threading.get_ident()
+
+    loop_thread = asyncio.run(run())
+
+    assert len(store.threads) >= 4
+    assert loop_thread not in store.threads
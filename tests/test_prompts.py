@@ -0,0 +1,94 @@
+"""Templates de prompt: v1 igual aos prompts originais, v2 com instruções primeiro."""
+
+import pytest
+
+from src.models import CreativeSuggestion, CreativeSuggestionsRequest, GenerateChapterRequest
+from src.services.ai_service import AIService
+from src.services.model_backend import FakeBackend
+from src.services.prompts import PromptLibrary, PromptTemplate
+
+
+def make_service(version: str) -> AIService:
+    return AIService(backend=FakeBackend(), prompts=PromptLibrary(version), json_mode=False)
+
+
+def chapter_request(**overrides) -> GenerateChapterRequest:
+    values = dict(
+        projectId="p1",
+        chapterId="c1",
+        projectTitle="O Farol",
+        chapterTitle="A Chegada",
+        chapterSummary="Ana chega à ilha",
+        tone="sombrio",
+        writingStyle="conciso",
+        setting="Ilha do norte",
+        lengthInPages=2,
+        keyPoints=["o farol está apagado"],
+    )
+    values.update(overrides)
+    return GenerateChapterRequest(**values)
+
+
+def test_template_render_and_prefix():
+    template = PromptTemplate("t", "Instruções fixas.\n${a} e ${b}.")
+
+    assert template.render(a=1, b=2) == "Instruções fixas.\n1 e 2."
+    assert template.render_until("a", a=1, b=2) == "Instruções fixas.\n1"
+    assert template.static_prefix == "Instruções fixas.\n"
+    with pytest.raises(KeyError):
+        template.render(a=1)
+
+
+@pytest.mark.parametrize("version", ["v1", "v2"])
+def test_versions_load_with_all_templates(version):
+    library = PromptLibrary(version)
+
+    assert library.get("first_chapter").version == version
+    # Idioma sem pasta própria usa o padrão
+    assert library.get("first_chapter", "en-US").language == "pt-BR"
+
+
+def test_v1_first_chapter_matches_original_prompt():
+    prompt = make_service("v1")._build_first_chapter_prompt(chapter_request())
+
+    assert prompt.startswith(
+        "Você é um escritor profissional de ficção com décadas de experiência em criar "
+        "aberturas memoráveis e envolventes.\n\n## 📚 CONTEXTO DO PROJETO:\n"
+        "- **Título do Livro**: O Farol\n"
+    )
+    assert (
+        "(cerca de 500 palavras)\n\n## PONTOS-CHAVE A INCLUIR:\n- o farol está apagado\n\n\n"
+        "## ⚠️ INSTRUÇÕES CRÍTICAS - PRIMEIRO CAPÍTULO:"
+    ) in prompt
+    assert "   - O tom deve ser sombrio desde o início\n" in prompt
+    assert "   - Ambientação: Ilha do norte\n" in prompt
+    assert prompt.endswith('**Comece agora a escrever o primeiro capítulo de "O Farol":**')
+
+
+def test_v2_moves_instructions_before_request_content():
+    service = make_service("v2")
+    prompt = service._build_first_chapter_prompt(chapter_request())
+    template = service.prompts.get("first_chapter")
+
+    assert prompt.startswith(template.static_prefix)
+    assert "INSTRUÇÕES CRÍTICAS" in template.static_prefix
+    assert "🎯 PONTOS-CHAVE A INCLUIR NESTE CAPÍTULO" in prompt
+    assert template.prefix_hash != make_service("v1").prompts.get("first_chapter").prefix_hash
+
+
+def test_v1_creative_exclude_section_is_optional():
+    service = make_service("v1")
+    request = CreativeSuggestionsRequest(
+        context="Uma ilha isolada", genre="mistério", tone="sombrio", type="title", count=3
+    )
+
+    plain = service._build_creative_prompt(request)
+    assert "- Sugira atmosfera e mood" not in plain
+    assert "- Considere metáforas e simbolismo quando apropriado\n\n## 📝 FORMATO DE RESPOSTA" in plain
+    assert "... (continue até 3 sugestões)" in plain
+
+    excluded = service._build_creative_prompt(
+        request, exclude=[CreativeSuggestion(text="O Farol Apagado")]
+    )
+    assert "- O Farol Apagado\n" in excluded
+    assert "JÁ SUGERIDAS" in excluded and "JÁ SUGERIDAS" not in plain
@@ -0,0 +1,173 @@
+"""Controle de admissão por cliente (token buckets)."""
+
+import asyncio
+import threading
+
+import pytest
+
+from src.models import CreativeSuggestionsRequest, GenerateChapterRequest
+from src.services import rate_limit
+from src.services.rate_limit import (
+    MemoryBucketStore,
+    RateLimiter,
+    RateLimitExceeded,
+    SQLiteBucketStore,
+    estimate_request_tokens,
+    tenant_key
+)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch) -> Clock:
+    clock = Clock()
+    monkeypatch.setattr(rate_limit.time, "monotonic", clock)
+    return clock
+
+
+def test_tenant_is_api_key_or_ip():
+    assert tenant_key("segredo", "10.0.0.1") == tenant_key("segredo", "10.0.0.2")
+    assert "segredo" not in tenant_key("segredo", None)
+    assert tenant_key(None, "10.0.0.1") == "ip:10.0.0.1"
+    assert tenant_key(None, None) == "ip:unknown"
+
+
+def test_memory_bucket_consumes_and_reports_wait(clock):
+    store = MemoryBucketStore()
+    bucket = [("t:requests", 2.0, 1.0, 1.0)]
+    assert store.try_acquire(bucket) == 0
+    assert store.try_acquire(bucket) == 0
+    assert store.try_acquire(bucket) == pytest.approx(1.0)
+
+    clock.now += 1
+    assert store.try_acquire(bucket) == 0
+
+
+def test_memory_store_drops_idle_buckets(clock):
+    store = MemoryBucketStore(sweep_interval=60)
+    for tenant in range(100):
+        store.try_acquire([(f"ip:{tenant}:requests", 10.0, 10 / 60, 1.0)])
+    assert len(store) == 100
+
+    # Após reabastecer (6s por requisição consumida), os buckets voltam a ser novos
+    clock.now += 59
+    store.try_acquire([("ip:ativo:requests", 10.0, 10 / 60, 10.0)])
+    assert len(store) == 101
+    clock.now += 1
+    store.try_acquire([("ip:ativo:requests", 10.0, 10 / 60, 0.0)])
+    # Só o bucket ainda vazio sobrevive à limpeza
+    assert len(store) == 1
+
+
+def test_limiter_rejects_with_retry_after():
+    limiter = RateLimiter(MemoryBucketStore(), requests_per_minute=1)
+    asyncio.run(limiter.admit("ip:a", 10))
+    with pytest.raises(RateLimitExceeded) as info:
+        asyncio.run(limiter.admit("ip:a", 10))
+    assert info.value.retry_after == pytest.approx(60, abs=1)
+    # Outros clientes não são afetados
+    asyncio.run(limiter.admit("ip:b", 10))
+
+
+def test_limiter_waits_up_to_max_wait():
+    limiter = RateLimiter(MemoryBucketStore(), requests_per_minute=600, max_wait=1)
+
+    async def main():
+        for _ in range(600):
+            await limiter.admit("ip:a", 1)
+        # Sem saldo: espera ~0.1s pela reposição em vez de rejeitar
+        await limiter.admit("ip:a", 1)
+
+    asyncio.run(main())
+
+
+def test_oversized_request_consumes_whole_minute():
+    limiter = RateLimiter(MemoryBucketStore(), tokens_per_minute=60)
+    # Maior que o limite: passa, mas esgota o saldo do minuto
+    asyncio.run(limiter.admit("ip:a", 1000))
+    with pytest.raises(RateLimitExceeded):
+        asyncio.run(limiter.admit("ip:a", 1))
+
+
+def test_sqlite_store_is_shared_and_runs_off_the_event_loop(tmp_path):
+    path = str(tmp_path / "ratelimit.db")
+    threads = []
+
+    class RecordingStore(SQLiteBucketStore):
+        def try_acquire(self, buckets):
+            threads.append(threading.get_ident())
+            return super().try_acquire(buckets)
+
+    first = RateLimiter(RecordingStore(path=path), requests_per_minute=1)
+    second = RateLimiter(SQLiteBucketStore(path=path), requests_per_minute=1)
+
+    async def main():
+        await first.admit("ip:a", 1)
+        return threading.get_ident()
+
+    loop_thread = asyncio.run(main())
+    assert threads and threads[0] != loop_thread
+    # Outro worker (outra conexão) vê o bucket já consumido
+    with pytest.raises(RateLimitExceeded):
+        asyncio.run(second.admit("ip:a", 1))
+
+
+def test_estimate_scales_with_candidates():
+    chapter = GenerateChapterRequest(
+        projectId="p", chapterId="c", projectTitle="T", chapterTitle="C", chapterSummary="resumo",
+        tone="t", writingStyle="w", setting="s", lengthInPages=2
+    )
+    suggestions = CreativeSuggestionsRequest(type="title", context="contexto", genre="g", tone="t", count=5)
+    assert estimate_request_tokens(chapter.model_copy(update={"candidates": 3})) == 3 * estimate_request_tokens(chapter)
+    assert estimate_request_tokens(suggestions.model_copy(update={"candidates": 2})) == 2 * estimate_request_tokens(suggestions)
+
+
+def test_estimate_charges_server_assembled_previous_context():
+    chapter = GenerateChapterRequest(
+        projectId="p", chapterId="c3", projectTitle="T", chapterTitle="C", chapterSummary="resumo",
+        tone="t", writingStyle="w", setting="s", lengthInPages=2
+    )
+    continuation = chapter.model_copy(update={"previousChapterIds": ["c1", "c2"]})
+
+    assert estimate_request_tokens(chapter, previous_context_tokens=5000) == estimate_request_tokens(chapter)
+    assert estimate_request_tokens(continuation, previous_context_tokens=5000) == (
+        estimate_request_tokens(chapter) + 5000
+    )
+
+
+def test_sqlite_store_drops_idle_buckets(tmp_path, monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(rate_limit.time, "time", clock)
+    store = SQLiteBucketStore(path=str(tmp_path / "ratelimit.db"), sweep_interval=60)
+    for tenant in range(10):
+        store.try_acquire([(f"ip:{tenant}:requests", 10.0, 10 / 60, 1.0)])
+    assert len(store) == 10
+
+    # 6s reabastecem cada requisição; a varredura só roda a cada 60s
+    clock.now += 59
+    store.try_acquire([("ip:ativo:requests", 10.0, 10 / 60, 1.0)])
+    assert len(store) == 11
+
+    clock.now += 1
+    store.try_acquire([("ip:ativo:requests", 10.0, 10 / 60, 1.0)])
+    assert len(store) == 1
+
+
+def test_api_limits_by_ip_regardless_of_project(make_client):
+    client = make_client(RATE_LIMIT_REQUESTS_PER_MINUTE="1")
+    body = {"type": "title", "context": "piratas", "genre": "ficção", "tone": "leve", "count": 2}
+    assert client.post("/creative-suggestions", json={**body, "projectId": "p1"}).status_code == 200
+
+    response = client.post("/creative-suggestions", json={**body, "projectId": "p2"})
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+
+    # Com API key, o cliente tem o próprio bucket
+    assert client.post("/creative-suggestions", json=body, headers={"X-API-Key": "k"}).status_code == 200
@@ -0,0 +1,237 @@
+"""Retry com backoff, circuit breaker e o mapeamento para 503 + Retry-After."""
+
+import asyncio
+import random
+
+import pytest
+
+from fakes import FlakyBackend, service_unavailable
+
+from src.models import CreativeSuggestionsRequest
+from src.services import resilience
+from src.services.ai_service import AIService
+from src.services.model_backend import FakeBackend
+from src.services.resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    ModelUnavailableError,
+    RetryPolicy,
+    call_with_retry
+)
+
+
+class Clock:
+    """Relógio controlado pelo teste (substitui time.monotonic)."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch) -> Clock:
+    clock = Clock()
+    monkeypatch.setattr(resilience.time, "monotonic", clock)
+    return clock
+
+
+def failing(failures: int, error=service_unavailable):
+    """Fábrica de chamadas que falham `failures` vezes e depois devolvem "ok"."""
+    attempts = []
+
+    async def func():
+        attempts.append(len(attempts) + 1)
+        if len(attempts) <= failures:
+            raise error()
+        return "ok"
+
+    return func, attempts
+
+
+def suggestions_request() -> CreativeSuggestionsRequest:
+    return CreativeSuggestionsRequest(type="title", context="piratas espaciais", genre="ficção", tone="leve", count=3)
+
+
+# ==================== Retry e backoff ====================
+
+def test_retries_transient_errors_until_success():
+    func, attempts = failing(2)
+    result = asyncio.run(call_with_retry(func, RetryPolicy(max_attempts=3, base_delay=0)))
+    assert result == "ok"
+    assert attempts == [1, 2, 3]
+
+
+def test_gives_up_after_max_attempts():
+    func, attempts = failing(10)
+    policy = RetryPolicy(max_attempts=3, base_delay=0, max_delay=4)
+    with pytest.raises(ModelUnavailableError) as info:
+        asyncio.run(call_with_retry(func, policy))
+    assert len(attempts) == 3
+    assert info.value.retry_after == 4
+
+
+def test_does_not_retry_client_errors():
+    func, attempts = failing(10, error=lambda: ValueError("prompt inválido"))
+    with pytest.raises(ValueError):
+        asyncio.run(call_with_retry(func, RetryPolicy(max_attempts=3, base_delay=0)))
+    assert attempts == [1]
+
+
+def test_backoff_grows_exponentially_up_to_max_delay(monkeypatch):
+    # Jitter no teto: a espera é exatamente o limite de cada tentativa
+    monkeypatch.setattr(random, "uniform", lambda low, high: high)
+    policy = RetryPolicy(max_attempts=6, base_delay=0.5, max_delay=3)
+    assert [policy.delay(attempt) for attempt in range(1, 6)] == [0.5, 1, 2, 3, 3]
+
+
+def test_waits_between_attempts(monkeypatch):
+    waits = []
+    monkeypatch.setattr(RetryPolicy, "delay", lambda self, attempt: waits.append(attempt) or 0)
+    retried = []
+    func, attempts = failing(2)
+    asyncio.run(call_with_retry(func, RetryPolicy(max_attempts=3), on_retry=retried.append))
+    assert waits == [1, 2]
+    assert len(retried) == 2
+
+
+# ==================== Circuit breaker ====================
+
+def test_breaker_opens_after_threshold(clock):
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30)
+    for _ in range(2):
+        breaker.before_call()
+        breaker.record_failure()
+    assert breaker.state == "closed"
+
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError) as info:
+        breaker.before_call()
+    assert info.value.retry_after == 30
+
+    clock.now += 10
+    assert breaker.retry_after() == 20
+
+
+def test_breaker_allows_single_half_open_probe(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    breaker.before_call()
+    breaker.record_failure()
+
+    clock.now += 30
+    assert breaker.state == "half_open"
+    breaker.before_call()  # chamada de teste
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    breaker.record_success()
+    assert breaker.state == "closed"
+    breaker.before_call()
+
+
+def test_failed_probe_reopens_breaker(clock):
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30)
+    for _ in range(2):
+        breaker.record_failure()
+
+    clock.now += 30
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert breaker.retry_after() == 30
+
+
+def test_retry_stops_when_breaker_opens(clock):
+    func, attempts = failing(10)
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30)
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(call_with_retry(func, RetryPolicy(max_attempts=5, base_delay=0), breaker))
+    assert len(attempts) == 2
+
+
+def test_client_error_releases_probe(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    breaker.record_failure()
+    clock.now += 30
+
+    func, _ = failing(10, error=lambda: ValueError("prompt inválido"))
+    with pytest.raises(ValueError):
+        asyncio.run(call_with_retry(func, RetryPolicy(max_attempts=1), breaker))
+    # Sem veredito: a próxima chamada pode ser o teste
+    breaker.before_call()
+
+
+# ==================== Serviço com backend fake ====================
+
+def test_service_retries_failed_model_calls():
+    backend = FlakyBackend(failures=2)
+    service = AIService(backend=backend, retry_policy=RetryPolicy(max_attempts=3, base_delay=0))
+    response = asyncio.run(service.generate_creative_suggestions(suggestions_request()))
+    assert len(response.suggestions) == 3
+    assert backend.calls == 3
+
+
+def test_service_raises_unavailable_when_model_keeps_failing():
+    backend = FakeBackend(failure_rate=1.0)
+    service = AIService(
+        backend=backend,
+        retry_policy=RetryPolicy(max_attempts=2, base_delay=0),
+        circuit_breaker=CircuitBreaker(failure_threshold=10)
+    )
+    with pytest.raises(ModelUnavailableError):
+        asyncio.run(service.generate_creative_suggestions(suggestions_request()))
+    assert backend.calls == 2
+
+
+def test_stream_releases_concurrency_slot_during_backoff(monkeypatch):
+    service = AIService(
+        backend=FlakyBackend(failures=1),
+        max_concurrent_requests=1,
+        retry_policy=RetryPolicy(max_attempts=2)
+    )
+    held_during_backoff = []
+    monkeypatch.setattr(
+        RetryPolicy, "delay", lambda self, attempt: held_during_backoff.append(service._semaphore.locked()) or 0
+    )
+
+    async def run():
+        return [chunk.text async for chunk in service._stream_content("Era uma vez")]
+
+    chunks = asyncio.run(run())
+
+    assert chunks
+    assert held_during_backoff == [False]
+    assert not service._semaphore.locked()
+
+
+# ==================== API ====================
+
+SUGGESTIONS_BODY = {"type": "title", "context": "piratas espaciais", "genre": "ficção", "tone": "leve", "count": 3}
+
+
+def test_api_returns_503_with_retry_after_when_retries_exhausted(make_client):
+    client = make_client(FAKE_FAILURE_RATE="1", RETRY_MAX_ATTEMPTS="2", RETRY_MAX_DELAY_SECONDS="5")
+    response = client.post("/creative-suggestions", json=SUGGESTIONS_BODY)
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "5"
+
+
+def test_api_returns_503_while_circuit_is_open(make_client):
+    client = make_client(
+        FAKE_FAILURE_RATE="1",
+        RETRY_MAX_ATTEMPTS="1",
+        CIRCUIT_FAILURE_THRESHOLD="1",
+        CIRCUIT_RESET_SECONDS="60"
+    )
+    assert client.post("/creative-suggestions", json=SUGGESTIONS_BODY).status_code == 503
+
+    backend = client.app.state.ai_service.backend
+    calls = backend.calls
+    response = client.post("/creative-suggestions", json={**SUGGESTIONS_BODY, "count": 4})
+    assert response.status_code == 503
+    assert 1 <= int(response.headers["Retry-After"]) <= 60
+    # Circuito aberto: nenhuma nova chamada ao modelo
+    assert backend.calls == calls
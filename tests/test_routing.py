@@ -0,0 +1,121 @@
+"""Roteamento entre modelos: tabela, regras e limites de cada rota."""
+
+import asyncio
+
+import pytest
+
+from src.models import GenerateChapterRequest
+from src.services.ai_service import AIService
+from src.services.model_backend import FakeBackend
+from src.services.routing import RoutingRule, parse_routing_table
+
+TABLE = {
+    "routes": {
+        "fast": {"model": "fast-model", "maxOutputTokens": 2048, "contextWindowTokens": 4000},
+        "strong": {"model": "strong-model", "temperature": 0.9},
+    },
+    "rules": [
+        {"endpoints": ["creative_suggestions"], "route": "fast"},
+        {"endpoints": ["generate_chapter"], "maxTokens": 5000, "route": "fast"},
+        {"minTokens": 20000, "route": "strong"},
+    ],
+}
+
+
+def make_service(**overrides) -> AIService:
+    values = dict(
+        backend=FakeBackend(),
+        routing=TABLE,
+        max_output_tokens=8192,
+        context_window_tokens=100000,
+        chapter_segment_tokens=6000,
+    )
+    values.update(overrides)
+    return AIService(**values)
+
+
+def chapter_request(pages: int) -> GenerateChapterRequest:
+    return GenerateChapterRequest(
+        projectId="p1",
+        chapterId="c1",
+        projectTitle="O Farol",
+        chapterTitle="A Chegada",
+        chapterSummary="Ana chega à ilha",
+        tone="sombrio",
+        writingStyle="conciso",
+        setting="Ilha do norte",
+        lengthInPages=pages,
+    )
+
+
+def test_parse_routing_table():
+    routes, rules = parse_routing_table(TABLE)
+
+    assert routes["fast"] == ("fast-model", {"max_output_tokens": 2048}, 4000)
+    assert routes["strong"] == ("strong-model", {"temperature": 0.9}, None)
+    assert rules[1] == RoutingRule(
+        route="fast", endpoints=frozenset({"generate_chapter"}), max_tokens=5000
+    )
+    assert rules[2].endpoints == frozenset()
+
+
+@pytest.mark.parametrize("table", [
+    {"routes": {"default": {"model": "m"}}},
+    {"routes": {"fast": {}}},
+    {"routes": {"fast": {"model": "m", "maxTokens": 10}}},
+    {"rules": [{"route": "missing"}]},
+    {"routes": {"fast": {"model": "m"}}, "rules": [{"endpoints": ["ping"], "route": "fast"}]},
+])
+def test_parse_routing_table_rejects_invalid_tables(table):
+    with pytest.raises(ValueError):
+        parse_routing_table(table)
+
+
+def test_first_matching_rule_selects_the_route():
+    router = make_service().router
+
+    assert router.select("creative_suggestions", 100).name == "fast"
+    assert router.select("generate_chapter", 5000).name == "fast"
+    assert router.select("generate_chapter", 5001).name == "default"
+    assert router.select("summarize", 20000).name == "strong"
+    assert router.select("summarize", 100).name == "default"
+
+
+def test_route_limits_come_from_the_table_or_the_globals():
+    router = make_service().router
+    routes = {route.name: route for route in router.routes()}
+
+    assert (routes["fast"].max_output_tokens, routes["fast"].context_window_tokens) == (2048, 4000)
+    assert (routes["strong"].max_output_tokens, routes["strong"].context_window_tokens) == (8192, 100000)
+
+
+def test_preflight_uses_the_route_limits():
+    service = make_service()
+    routes = {route.name: route for route in service.router.routes()}
+    # ~2100 tokens: cabe na rota padrão, mas não com 2048 reservados na janela de 4000
+    prompt = "palavra " * 1500
+
+    assert service._preflight(prompt, routes["default"]) > 0
+    with pytest.raises(ValueError, match="fast-model"):
+        service._preflight(prompt, routes["fast"])
+
+
+def test_segments_are_sized_by_the_route_output_limit():
+    service = make_service()
+    routes = {route.name: route for route in service.router.routes()}
+    request = chapter_request(pages=6)  # ~2100 tokens de saída
+
+    assert service._segment_count(request, routes["default"]) == 1
+    assert service._segment_count(request, routes["fast"]) == 2
+
+
+def test_chapter_routed_to_small_output_model_is_generated_in_parts():
+    service = make_service(routing={
+        "routes": {"fast": {"model": "fast-model", "maxOutputTokens": 2048}},
+        "rules": [{"endpoints": ["generate_chapter"], "route": "fast"}],
+    })
+
+    response = asyncio.run(service.generate_chapter(chapter_request(pages=6)))
+
+    assert response.metadata.model == "fast-model"
+    assert len(response.segments) == 2
@@ -0,0 +1,53 @@
+"""Estado incremental da história: voltar capítulos recentes e o registro de personagens."""
+
+from src.services.story_state import StoryStateBuilder
+
+
+def add(builder, state, number, characters, locations=()):
+    return builder.add_chapter(
+        state,
+        title=f"Capítulo {number}",
+        summary=f"Resumo {number}",
+        text=f"Texto do capítulo {number}.",
+        brief=f"Resumo curto {number}",
+        characters=list(characters),
+        locations=list(locations),
+        key=f"c{number}",
+    )
+
+
+def test_rewind_removes_characters_introduced_by_discarded_chapters():
+    builder = StoryStateBuilder(recent_chapters=2)
+    state = builder.new_state("p1")
+    add(builder, state, 1, ["Ana (pescadora)"], ["Farol"])
+    add(builder, state, 2, ["Ana (capitã)", "Bruno (faroleiro)"], ["Porto"])
+
+    builder.rewind(state, 1)
+
+    assert state.characters == ["Ana (pescadora)"]
+    assert state.locations == ["Farol"]
+    assert state.chapterKeys == ["c1"]
+
+
+def test_rewind_keeps_the_ledger_of_condensed_chapters():
+    builder = StoryStateBuilder(recent_chapters=1)
+    state = builder.new_state("p1")
+    add(builder, state, 1, ["Ana"])
+    add(builder, state, 2, ["Bruno"])
+    add(builder, state, 3, ["Clara"])
+
+    builder.rewind(state, 2)
+
+    assert len(state.digest) == 2
+    assert state.characters == ["Ana", "Bruno"]
+
+
+def test_state_without_chapter_ledgers_is_rebuilt():
+    builder = StoryStateBuilder(recent_chapters=2)
+    state = builder.new_state("p1")
+    add(builder, state, 1, ["Ana"])
+    add(builder, state, 2, ["Bruno"])
+    # Estado salvo antes do registro por capítulo
+    state.digestCharacters = None
+
+    assert not builder.can_rewind(state, 1)
@@ -0,0 +1,127 @@
+"""Sugestões criativas: quase-duplicatas, histórico do projeto e complemento."""
+
+import asyncio
+import json
+
+from src.models import CreativeSuggestion, CreativeSuggestionsRequest
+from src.services.ai_service import AIService
+from src.services.cache import MemoryCache
+from src.services.model_backend import FakeBackend, ModelResult
+from src.services.suggestions import SuggestionHistory, SuggestionIndex, merge_suggestions
+
+
+class RecordingBackend(FakeBackend):
+    """Guarda os prompts recebidos; com `batches`, responde um lote por chamada (o último se repete)."""
+
+    def __init__(self, batches=None):
+        super().__init__()
+        self.batches = batches
+        self.prompts = []
+
+    async def generate(self, prompt, cached_context=None, response_schema=None):
+        self.prompts.append(prompt)
+        if self.batches is None:
+            return await super().generate(prompt, cached_context, response_schema)
+        batch = self.batches[min(self.calls, len(self.batches) - 1)]
+        self.calls += 1
+        text = json.dumps({"suggestions": [{"text": text} for text in batch]})
+        return ModelResult(text=text, usage_metadata=self._usage(prompt, text))
+
+
+def make_service(backend=None):
+    backend = backend or RecordingBackend()
+    return AIService(backend=backend, cache=MemoryCache()), backend
+
+
+def suggestions_request(**overrides) -> CreativeSuggestionsRequest:
+    values = dict(
+        type="title", context="Piratas no mar do norte", genre="aventura", tone="leve",
+        count=5, projectId="p1",
+    )
+    values.update(overrides)
+    return CreativeSuggestionsRequest(**values)
+
+
+def texts(suggestions):
+    return [suggestion.text for suggestion in suggestions]
+
+
+def test_near_duplicates_are_rejected():
+    index = SuggestionIndex([CreativeSuggestion(text="O Farol Apagado")])
+
+    assert not index.add(CreativeSuggestion(text="o farol apagado!"))
+    assert not index.add(CreativeSuggestion(text="O Farol Apagado de Novo"))
+    assert index.add(CreativeSuggestion(text="Marés de Sangue"))
+
+
+def test_merge_keeps_order_and_skips_excluded():
+    merged = merge_suggestions(
+        [CreativeSuggestion(text="O Farol Apagado")],
+        [
+            CreativeSuggestion(text="O farol apagado."),
+            CreativeSuggestion(text="A Ilha Sem Nome"),
+            CreativeSuggestion(text="Marés de Sangue"),
+            CreativeSuggestion(text="Ventos do Norte"),
+        ],
+        count=3,
+        exclude=[CreativeSuggestion(text="A ilha sem nome")],
+    )
+
+    assert texts(merged) == ["O Farol Apagado", "Marés de Sangue", "Ventos do Norte"]
+
+
+def test_history_is_kept_per_project_and_type():
+    history = SuggestionHistory(max_items=2, max_projects=1)
+    history.add("p1", "title", [CreativeSuggestion(text=text) for text in ("a", "b", "c")])
+
+    assert texts(history.get("p1", "title")) == ["b", "c"]
+    assert history.get("p1", "plot") == []
+    assert history.get(None, "title") == []
+
+    history.add("p2", "title", [CreativeSuggestion(text="d")])
+    assert history.get("p1", "title") == []
+
+
+def test_served_suggestions_go_into_the_next_prompt():
+    service, backend = make_service()
+
+    first = asyncio.run(service.generate_creative_suggestions(suggestions_request()))
+    asyncio.run(service.generate_creative_suggestions(suggestions_request()))
+
+    assert "JÁ SUGERIDAS" not in backend.prompts[0]
+    assert all(f"- {text}\n" in backend.prompts[1] for text in texts(first.suggestions))
+
+
+def test_repeated_requests_return_a_full_count_of_new_suggestions():
+    service, _ = make_service()
+    seen = []
+
+    for _ in range(4):
+        response = asyncio.run(service.generate_creative_suggestions(suggestions_request()))
+        assert len(response.suggestions) == 5
+        assert merge_suggestions([], response.suggestions, 5, exclude=seen) == response.suggestions
+        seen.extend(response.suggestions)
+
+
+def test_topup_asks_only_for_the_missing_suggestions():
+    service, backend = make_service(RecordingBackend([
+        ["Marés de Sangue", "marés de sangue!"],
+        ["Ventos do Norte"],
+        ["A Ilha Sem Nome"],
+    ]))
+
+    response = asyncio.run(service.generate_creative_suggestions(suggestions_request(count=3)))
+
+    assert texts(response.suggestions) == ["Marés de Sangue", "Ventos do Norte", "A Ilha Sem Nome"]
+    assert "Gere 2 " in backend.prompts[1] and "Gere 1 " in backend.prompts[2]
+    assert "- Marés de Sangue\n" in backend.prompts[1]
+
+
+def test_topup_stops_when_a_call_adds_nothing_new():
+    service, backend = make_service(RecordingBackend([["Marés de Sangue", "Ventos do Norte"]]))
+
+    response = asyncio.run(service.generate_creative_suggestions(suggestions_request(count=3)))
+
+    # A segunda chamada não trouxe nada novo: para sem gastar as outras tentativas
+    assert texts(response.suggestions) == ["Marés de Sangue", "Ventos do Norte"]
+    assert backend.calls == 2
@@ -0,0 +1,89 @@
+"""Resumo antecipado (prefetchSummary): chave pelo texto e título, cache e espera."""
+
+import asyncio
+
+from src.models import GenerateChapterRequest, SummarizeRequest
+from src.services.ai_service import AIService
+from src.services.cache import MemoryCache, make_summary_key
+from src.services.model_backend import FakeBackend
+
+TEXT = "Ana subiu a escada do farol devagar. " * 10
+
+
+def make_service(latency: float = 0.0):
+    backend = FakeBackend(latency=latency, output_words=50)
+    return AIService(backend=backend, cache=MemoryCache()), backend
+
+
+def chapter_request() -> GenerateChapterRequest:
+    return GenerateChapterRequest(
+        projectId="p1",
+        chapterId="c1",
+        projectTitle="O Farol",
+        chapterTitle="A Chegada",
+        chapterSummary="Ana chega à ilha",
+        tone="sombrio",
+        writingStyle="conciso",
+        setting="Ilha do norte",
+        lengthInPages=1,
+        prefetchSummary=True,
+    )
+
+
+def summarize_request(text: str, title: str = "A Chegada") -> SummarizeRequest:
+    return SummarizeRequest(chapterText=text, chapterTitle=title, language="pt-BR")
+
+
+def test_summary_key_includes_the_title():
+    key = make_summary_key(TEXT, "A Chegada", "pt-BR", "v1")
+
+    assert key == make_summary_key(TEXT, "A Chegada", "pt-BR", "v1")
+    assert key != make_summary_key(TEXT, "Outro Título", "pt-BR", "v1")
+    assert make_summary_key(TEXT, None, "pt-BR", "v1") == make_summary_key(TEXT, "", "pt-BR", "v1")
+
+
+def test_summarize_after_prefetch_reuses_the_summary():
+    service, backend = make_service()
+
+    async def run():
+        chapter = await service.generate_chapter(chapter_request())
+        await asyncio.gather(*service._summary_prefetches.values())
+        calls = backend.calls
+        summary = await service.summarize_chapter(summarize_request(chapter.text))
+        return calls, summary
+
+    calls, summary = asyncio.run(run())
+
+    assert backend.calls == calls
+    assert summary.summary
+
+
+def test_summarize_waits_for_prefetch_in_progress():
+    service, backend = make_service(latency=0.05)
+
+    async def run():
+        chapter = await service.generate_chapter(chapter_request())
+        calls = backend.calls
+        assert service._summary_prefetches
+        await service.summarize_chapter(summarize_request(chapter.text))
+        return calls
+
+    calls = asyncio.run(run())
+
+    # Só a chamada do pré-cálculo, que o /summarize aguardou
+    assert backend.calls == calls + 1
+
+
+def test_summarize_with_another_title_is_not_served_from_prefetch():
+    service, backend = make_service()
+
+    async def run():
+        chapter = await service.generate_chapter(chapter_request())
+        await asyncio.gather(*service._summary_prefetches.values())
+        calls = backend.calls
+        await service.summarize_chapter(summarize_request(chapter.text, title="Outro Título"))
+        return calls
+
+    calls = asyncio.run(run())
+
+    assert backend.calls == calls + 1
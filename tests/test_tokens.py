@@ -0,0 +1,86 @@
+"""Contagem de tokens a partir do usage_metadata e estimativa local."""
+
+from types import SimpleNamespace
+
+from src.models import TokenUsage
+from src.services.tokens import (
+    estimate_tokens,
+    pack_by_tokens,
+    split_by_tokens,
+    sum_usage,
+    usage_from_metadata
+)
+
+
+def metadata(**counts) -> SimpleNamespace:
+    return SimpleNamespace(**counts)
+
+
+def test_usage_uses_provider_counts():
+    usage = usage_from_metadata(
+        metadata(prompt_token_count=120, candidates_token_count=30, total_token_count=150, cached_content_token_count=100),
+        "prompt",
+        "resposta"
+    )
+    assert usage == TokenUsage(promptTokens=120, completionTokens=30, totalTokens=150, cachedTokens=100)
+
+
+def test_zero_counts_are_real_counts():
+    usage = usage_from_metadata(
+        metadata(prompt_token_count=120, candidates_token_count=0, total_token_count=120, cached_content_token_count=0),
+        "prompt",
+        "resposta ignorada"
+    )
+    assert usage.estimated is False
+    assert usage.completionTokens == 0
+    assert usage.cachedTokens == 0
+    assert usage.totalTokens == 120
+
+
+def test_missing_total_is_sum_of_parts():
+    usage = usage_from_metadata(metadata(prompt_token_count=10, candidates_token_count=5), "p", "r")
+    assert usage.totalTokens == 15
+    assert usage.cachedTokens == 0
+    assert usage.estimated is False
+
+
+def test_missing_metadata_falls_back_to_estimate():
+    prompt, completion = "Escreva um capítulo.", "Era uma vez um reino distante."
+    for usage_metadata in (None, metadata(prompt_token_count=10)):
+        usage = usage_from_metadata(usage_metadata, prompt, completion)
+        assert usage.estimated is True
+        assert usage.promptTokens == estimate_tokens(prompt)
+        assert usage.completionTokens == estimate_tokens(completion)
+        assert usage.totalTokens == usage.promptTokens + usage.completionTokens
+
+
+def test_sum_usage_adds_counts_and_propagates_estimate():
+    total = sum_usage([
+        TokenUsage(promptTokens=10, completionTokens=5, totalTokens=15, cachedTokens=4),
+        TokenUsage(promptTokens=20, completionTokens=7, totalTokens=27, estimated=True),
+    ])
+    assert total == TokenUsage(promptTokens=30, completionTokens=12, totalTokens=42, cachedTokens=4, estimated=True)
+
+
+def test_estimate_counts_punctuation_and_long_words():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("Olá, mar!") == 4
+    # Palavras longas contam um token a cada ~4 caracteres
+    assert estimate_tokens("extraordinariamente") == 5
+
+
+def test_pack_keeps_order_and_limit():
+    groups = pack_by_tokens(["a b", "c d", "e f g h i", "j"], max_tokens=4)
+    assert groups == [["a b", "c d"], ["e f g h i"], ["j"]]
+
+
+def test_split_prefers_paragraphs_and_respects_limit():
+    paragraphs = [" ".join(f"p{idx}w{word}" for word in range(30)) + "." for idx in range(6)]
+    text = "\n\n".join(paragraphs)
+    chunks = split_by_tokens(text, max_tokens=200)
+    assert all(estimate_tokens(chunk) <= 200 for chunk in chunks)
+    # Nada se perde e a ordem é mantida
+    assert " ".join(" ".join(chunks).split()) == " ".join(text.split())
+    # Cortes só entre parágrafos
+    assert all(chunk.startswith("p") and chunk.endswith(".") for chunk in chunks)
+    assert len(chunks) > 1